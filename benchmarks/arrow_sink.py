@@ -0,0 +1,99 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares writing and reading a synthetic scenario with the default TSV sink
+# and the Arrow sink (IPC and Parquet files), and checks that all of them read
+# back to equivalent DataFrames.
+#
+# Usage: python arrow_sink.py [num_records] [num_metrics]
+
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from l2logger import l2logger, util
+
+SINKS = {
+    "tsv": ("tsv", {}),
+    "arrow (ipc)": ("arrow", {"file_format": "ipc"}),
+    "arrow (parquet)": ("arrow", {"file_format": "parquet"}),
+}
+BATCH_SIZE = 10000
+RECORDS_PER_BLOCK = 100000
+
+
+def log_scenario(base_dir, sink, sink_options, num_records, metrics):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": metrics},
+        sink=sink,
+        sink_options=sink_options,
+        timestamp_provider=lambda: "20200101T000000.000000",
+    )
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for first in range(0, num_records, BATCH_SIZE):
+        exp_nums = list(range(first, min(first + BATCH_SIZE, num_records)))
+        block_nums = [exp_num // RECORDS_PER_BLOCK for exp_num in exp_nums]
+        columns = {
+            "block_num": block_nums,
+            "exp_num": exp_nums,
+            "block_type": ["train" if b % 2 else "test" for b in block_nums],
+            "task_name": [f"task_{b % 3}" for b in block_nums],
+            "task_params": [{"difficulty": b % 3} for b in block_nums],
+        }
+        for metric in metrics:
+            columns[metric] = [rng.random() for _ in exp_nums]
+        logger.log_columns(columns)
+    logger.close()
+    return logger.scenario_dir, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    num_metrics = int(sys.argv[2]) if len(sys.argv) > 2 else 24
+    metrics = [f"metric_{i:02d}" for i in range(num_metrics)]
+    print(f"{num_records} records, {num_metrics} metrics")
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        logs = {}
+        for name, (sink, sink_options) in SINKS.items():
+            scenario_dir, write_time = log_scenario(
+                base_dir, sink, sink_options, num_records, metrics
+            )
+            start = time.perf_counter()
+            logs[name] = util.read_log_data(Path(scenario_dir))
+            read_time = time.perf_counter() - start
+            size = sum(f.stat().st_size for f in Path(scenario_dir).rglob("data-log*"))
+            print(
+                f"{name:>16}: write {write_time:6.2f} s, read {read_time:6.2f} s, "
+                f"{size / 2 ** 20:8.1f} MiB"
+            )
+
+        expected = logs.pop("tsv")
+        for name, data in logs.items():
+            pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+        print("all sinks read back to equivalent DataFrames")
@@ -0,0 +1,128 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Measures the event loop latency while a coroutine logs records at a sustained
+# rate, comparing the blocking DataLogger with AsyncDataLogger. The logging
+# coroutine logs RECORDS_PER_TICK records every 1 ms, as an environment driver
+# stepping several environments would, while a ticker task sleeps for 1 ms at
+# a time and records how late it wakes up. Each run is repeated with a sink
+# whose flushes take FLUSH_DELAY_MS longer, as on network storage.
+#
+# Usage: python async_logger.py [num_records]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from l2logger import l2logger, sinks
+from l2logger.async_logger import AsyncDataLogger
+
+TICK = 0.001
+RECORDS_PER_TICK = 10
+FLUSH_DELAY_MS = 0.5
+
+
+class SlowTSVLogFile(sinks.TSVLogFile):
+    def flush(self):
+        super().flush()
+        time.sleep(FLUSH_DELAY_MS / 1000)
+
+
+class SlowTSVSink(sinks.TSVSink):
+    name = "slow_tsv"
+
+    def open(self, worker_id, block_num, block_type):
+        block_dir = self.make_block_dir(worker_id, block_num, block_type)
+        log_file_name = os.path.join(block_dir, "data-log.tsv")
+        return SlowTSVLogFile(log_file_name, self.fieldnames, self.flush_policy)
+
+
+sinks.register_sink(SlowTSVSink)
+
+
+def make_record(exp_num):
+    return {
+        "block_num": exp_num // 10000,
+        "exp_num": exp_num,
+        "worker_id": "worker0",
+        "block_type": "train",
+        "task_name": "task_a",
+        "task_params": {"param1": 1},
+        "reward": exp_num * 0.5,
+    }
+
+
+async def ticker(lags, done):
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def log_blocking(base_dir, num_records, sink):
+    logger = l2logger.DataLogger(
+        base_dir, "bench", {"metrics_columns": ["reward"]}, sink=sink
+    )
+    for exp_num in range(num_records):
+        logger.log_record(make_record(exp_num))
+        if exp_num % RECORDS_PER_TICK == RECORDS_PER_TICK - 1:
+            await asyncio.sleep(TICK)
+    logger.close()
+
+
+async def log_async(base_dir, num_records, sink):
+    async with AsyncDataLogger(
+        base_dir, "bench", {"metrics_columns": ["reward"]}, sink=sink
+    ) as logger:
+        for exp_num in range(num_records):
+            await logger.log_record(make_record(exp_num))
+            if exp_num % RECORDS_PER_TICK == RECORDS_PER_TICK - 1:
+                await asyncio.sleep(TICK)
+
+
+async def run(log, num_records, sink):
+    lags = []
+    done = asyncio.Event()
+    with tempfile.TemporaryDirectory() as base_dir:
+        tick_task = asyncio.ensure_future(ticker(lags, done))
+        start = time.perf_counter()
+        await log(base_dir, num_records, sink)
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick_task
+    return np.array(lags) * 1000, elapsed
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{num_records} records")
+    for sink in ["tsv", "slow_tsv"]:
+        for name, log in (("DataLogger", log_blocking), ("AsyncDataLogger", log_async)):
+            lags, elapsed = asyncio.run(run(log, num_records, sink))
+            print(
+                f"{sink:>8}, {name:>15}: loop lag p50 {np.percentile(lags, 50):6.2f} ms, "
+                f"p99 {np.percentile(lags, 99):6.2f} ms, max {lags.max():6.2f} ms, "
+                f"{num_records / elapsed:8.0f} records/s"
+            )
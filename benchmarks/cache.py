@@ -0,0 +1,102 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time to read a scenario of many worker/block files without a
+# cache, when building the cache, when loading it, and when loading it after
+# a row was appended to one of the files (requires pyarrow).
+#
+# Usage: python cache.py [num_workers] [num_blocks] [records_per_file]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from l2logger import l2logger, util
+
+RECORD = {
+    "block_type": "train",
+    "task_name": "task_a",
+    "task_params": {"difficulty": 1},
+    "reward": 0.5,
+    "steps": 10,
+}
+
+
+def log_scenario(base_dir, num_workers, num_blocks, records_per_file):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward", "steps"]},
+        flush_policy=l2logger.FlushPolicy(max_rows=1000),
+    )
+    exp_num = 0
+    for block_num in range(num_blocks):
+        for _ in range(records_per_file):
+            for worker in range(num_workers):
+                logger.log_record(
+                    dict(
+                        RECORD,
+                        block_num=block_num,
+                        exp_num=exp_num,
+                        worker_id=f"worker{worker}",
+                    )
+                )
+                exp_num += 1
+    logger.close()
+    return Path(logger.scenario_dir)
+
+
+def timed(read):
+    start = time.perf_counter()
+    read()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    num_blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    records_per_file = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    print(
+        f"{num_workers} workers x {num_blocks} blocks, "
+        f"{records_per_file} records per file"
+    )
+    with tempfile.TemporaryDirectory() as base_dir:
+        scenario_dir = log_scenario(base_dir, num_workers, num_blocks, records_per_file)
+        read_times = {
+            "no cache": timed(lambda: util.read_log_data(scenario_dir)),
+            "building cache": timed(
+                lambda: util.read_log_data(scenario_dir, cache=True)
+            ),
+            "cached": timed(lambda: util.read_log_data(scenario_dir, cache=True)),
+        }
+
+        # one file gets one more row, a copy of its last one
+        log_file = next(scenario_dir.rglob("data-log.tsv"))
+        with open(log_file) as f:
+            last_row = f.readlines()[-1]
+        with open(log_file, "a") as f:
+            f.write(last_row)
+        read_times["one file changed"] = timed(
+            lambda: util.read_log_data(scenario_dir, cache=True)
+        )
+        for name, read_time in read_times.items():
+            print(f"{name:>16}: {read_time:6.2f} s")
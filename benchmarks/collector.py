@@ -0,0 +1,97 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the queue and shared memory transports of CollectorDataLogger with
+# 1, 8 and 64 worker processes logging the same total number of records. The
+# worker time is the mean time a worker spends in log_record and close, and
+# the total time runs from starting the workers until the collector is closed.
+#
+# Usage: python collector.py [num_records]
+
+import multiprocessing
+import sys
+import tempfile
+import time
+
+from l2logger.collector import CollectorDataLogger
+
+WORKER_COUNTS = [1, 8, 64]
+
+
+def log_worker(proxy, worker_index, num_workers, num_records, worker_times):
+    start = time.perf_counter()
+    for exp_num in range(worker_index, num_records, num_workers):
+        proxy.log_record(
+            {
+                "block_num": 0,
+                "exp_num": exp_num,
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {"param1": 1},
+                "reward": exp_num * 0.5,
+            }
+        )
+    proxy.close()
+    worker_times.put(time.perf_counter() - start)
+
+
+def run(transport, num_workers, num_records):
+    with tempfile.TemporaryDirectory() as base_dir:
+        collector = CollectorDataLogger(
+            base_dir, "bench", {"metrics_columns": ["reward"]}, transport=transport
+        )
+        worker_times = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=log_worker,
+                args=(
+                    collector.get_proxy(f"worker{i}"),
+                    i,
+                    num_workers,
+                    num_records,
+                    worker_times,
+                ),
+            )
+            for i in range(num_workers)
+        ]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        worker_time = sum(worker_times.get() for _ in workers) / num_workers
+        for worker in workers:
+            worker.join()
+        stats = collector.close()
+        elapsed = time.perf_counter() - start
+    assert stats["records"] == num_records
+    return worker_time, elapsed
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{num_records} records, {multiprocessing.cpu_count()} cpus")
+    for num_workers in WORKER_COUNTS:
+        for transport in ["queue", "shm"]:
+            worker_time, elapsed = run(transport, num_workers, num_records)
+            print(
+                f"{num_workers:>3} workers, {transport:>5}: "
+                f"{worker_time * 1e6 * num_workers / num_records:6.2f} us/record "
+                f"in workers, {num_records / elapsed:9.0f} records/s total"
+            )
@@ -0,0 +1,109 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Logs one long test block with several metrics, comparing the best time per
+# record over 3 runs of writing each row as it arrives with accumulating the rows in
+# columnar mode, and the memory held by the pending rows as dicts (e.g. in the
+# queue of async mode) or as columns.
+#
+# Usage: python columnar.py [num_records]
+
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from l2logger import l2logger
+
+METRICS = ["reward", "loss", "steps", "success"]
+FLUSH_POLICY = l2logger.FlushPolicy(max_rows=1000)
+
+
+def make_record(exp_num):
+    return {
+        "block_num": 0,
+        "exp_num": exp_num,
+        "worker_id": "worker0",
+        "block_type": "test",
+        "task_name": "task_a",
+        "task_params": {"param1": 1},
+        "reward": exp_num * 0.5,
+        "loss": 1 / (exp_num + 1),
+        "steps": exp_num % 200,
+        "success": exp_num * 0.25,
+    }
+
+
+def run(columnar, num_records):
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(
+            base_dir,
+            "bench",
+            {"metrics_columns": METRICS},
+            flush_policy=FLUSH_POLICY,
+            columnar=columnar,
+            columnar_max_rows=num_records + 1,
+        )
+        start = time.perf_counter()
+        for exp_num in range(num_records):
+            logger.log_record(make_record(exp_num))
+        logger.close()
+        return time.perf_counter() - start
+
+
+# memory allocated for holding num_records pending rows
+def pending_memory(columnar, num_records):
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(
+            base_dir,
+            "bench",
+            {"metrics_columns": METRICS},
+            columnar=columnar,
+            columnar_max_rows=num_records + 1,
+            async_mode=not columnar,
+            backpressure="grow",
+        )
+        # keep the writer thread from taking rows off the queue
+        blocker = l2logger.threading.Event()
+        if not columnar:
+            logger._writer.put(lambda _: blocker.wait(), {})
+        logger.log_record(make_record(0))
+        tracemalloc.start()
+        for exp_num in range(1, num_records):
+            logger.log_record(make_record(exp_num))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        blocker.set()
+        logger.close()
+        return memory
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{num_records} records, {len(METRICS)} metrics")
+    for columnar in [False, True]:
+        name = "columnar" if columnar else "row by row"
+        elapsed = min(run(columnar, num_records) for _ in range(3))
+        memory = pending_memory(columnar, num_records)
+        print(
+            f"{name:>10}: {elapsed / num_records * 1e6:5.2f} us/record, "
+            f"{memory / num_records:6.1f} bytes/pending row"
+        )
@@ -0,0 +1,90 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the size on disk, and the write and read times, of a scenario
+# logged by the TSV sink uncompressed and with gzip and zstd compression (zstd
+# requires the zstandard package), flushing every row and every 1000 rows.
+#
+# Usage: python compression.py [num_records]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from l2logger import l2logger, sinks, util
+
+FLUSH_POLICIES = {
+    "every row": l2logger.FlushPolicy(max_rows=1),
+    "every 1000 rows": l2logger.FlushPolicy(max_rows=1000),
+}
+RECORDS_PER_BLOCK = 10000
+
+
+def log_scenario(base_dir, compression, flush_policy, num_records):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward", "steps"]},
+        flush_policy=flush_policy,
+        sink_options={"compression": compression},
+    )
+    start = time.perf_counter()
+    for exp_num in range(num_records):
+        block_num = exp_num // RECORDS_PER_BLOCK
+        logger.log_record(
+            {
+                "block_num": block_num,
+                "exp_num": exp_num,
+                "block_type": "train" if block_num % 2 else "test",
+                "task_name": f"task_{block_num % 3}",
+                "task_params": {"difficulty": block_num % 3, "seed": 1234},
+                "reward": exp_num % 100 * 0.5,
+                "steps": exp_num % 200,
+            }
+        )
+    logger.close()
+    return logger.scenario_dir, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    compressions = [None, "gzip"]
+    if sinks.zstandard is not None:
+        compressions.append("zstd")
+    print(f"{num_records} records")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for policy_name, flush_policy in FLUSH_POLICIES.items():
+            for compression in compressions:
+                scenario_dir, write_time = log_scenario(
+                    base_dir, compression, flush_policy, num_records
+                )
+                start = time.perf_counter()
+                util.read_log_data(Path(scenario_dir))
+                read_time = time.perf_counter() - start
+                size = sum(
+                    f.stat().st_size for f in Path(scenario_dir).rglob("data-log*")
+                )
+                name = f"{compression or 'none'}, flush {policy_name}"
+                print(
+                    f"{name:>27}: write {write_time:5.2f} s, "
+                    f"read {read_time:5.2f} s, {size / 2 ** 20:6.2f} MiB"
+                )
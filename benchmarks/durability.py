@@ -0,0 +1,82 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time per record of a scenario logged by the TSV sink with
+# durability "none" and "flush", with an fsync after every row, and with group
+# fsyncs every 100 and 1000 rows or 100 ms.
+#
+# Usage: python durability.py [num_records]
+
+import sys
+import tempfile
+import time
+
+from l2logger import l2logger
+
+DURABILITY_MODES = {
+    "none": ("none", None),
+    "flush": ("flush", None),
+    "fsync every row": ("fsync", l2logger.FlushPolicy(max_rows=1)),
+    "group fsync, 100 rows": (
+        "fsync",
+        l2logger.FlushPolicy(max_rows=100, max_interval_ms=100),
+    ),
+    "group fsync, 1000 rows": ("fsync", None),
+}
+RECORDS_PER_BLOCK = 10000
+
+
+def log_scenario(base_dir, durability, flush_policy, num_records):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward", "steps"]},
+        flush_policy=flush_policy,
+        durability=durability,
+    )
+    start = time.perf_counter()
+    for exp_num in range(num_records):
+        block_num = exp_num // RECORDS_PER_BLOCK
+        logger.log_record(
+            {
+                "block_num": block_num,
+                "exp_num": exp_num,
+                "block_type": "train" if block_num % 2 else "test",
+                "task_name": f"task_{block_num % 3}",
+                "task_params": {"difficulty": block_num % 3, "seed": 1234},
+                "reward": exp_num % 100 * 0.5,
+                "steps": exp_num % 200,
+            }
+        )
+    logger.close()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"{num_records} records")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for name, (durability, flush_policy) in DURABILITY_MODES.items():
+            write_time = log_scenario(base_dir, durability, flush_policy, num_records)
+            print(
+                f"{name:>22}: {write_time:6.2f} s, "
+                f"{write_time / num_records * 1e6:7.1f} us/record"
+            )
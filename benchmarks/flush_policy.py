@@ -0,0 +1,84 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the number of flushes (one write syscall each) and the wall time
+# of logging the same records under several FlushPolicy settings.
+#
+# Usage: python flush_policy.py [num_records]
+
+import sys
+import tempfile
+import time
+
+from l2logger import l2logger
+
+POLICIES = {
+    "every row (default)": l2logger.FlushPolicy(max_rows=1),
+    "every 1000 rows": l2logger.FlushPolicy(max_rows=1000),
+    "every 100 ms": l2logger.FlushPolicy(max_interval_ms=100),
+    "every 64 KiB": l2logger.FlushPolicy(max_bytes=64 * 1024),
+}
+
+
+def run(policy, num_records):
+    flushes = 0
+    flush = l2logger.TSVLogFile.flush
+
+    def counting_flush(self):
+        nonlocal flushes
+        flushes += 1
+        flush(self)
+
+    l2logger.TSVLogFile.flush = counting_flush
+    try:
+        with tempfile.TemporaryDirectory() as base_dir:
+            logger = l2logger.DataLogger(
+                base_dir, "bench", {"metrics_columns": ["reward"]}, flush_policy=policy
+            )
+            start = time.perf_counter()
+            for exp_num in range(num_records):
+                logger.log_record(
+                    {
+                        "block_num": 0,
+                        "exp_num": exp_num,
+                        "worker_id": "worker0",
+                        "block_type": "train",
+                        "task_name": "task_a",
+                        "task_params": {"param1": 1},
+                        "reward": exp_num * 0.5,
+                    }
+                )
+            logger.close()
+            elapsed = time.perf_counter() - start
+    finally:
+        l2logger.TSVLogFile.flush = flush
+    return flushes, elapsed
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"{num_records} records")
+    for name, policy in POLICIES.items():
+        flushes, elapsed = run(policy, num_records)
+        print(
+            f"{name:>20}: {flushes:>7} flushes, {elapsed:.3f} s "
+            f"({num_records / elapsed:,.0f} records/s)"
+        )
@@ -0,0 +1,82 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time to pick up the records logged since the last check by a
+# scenario which keeps growing, by re-reading it with read_log_data and by
+# polling a LogFollower, as the history grows.
+#
+# Usage: python follower.py [num_rounds] [records_per_round]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from l2logger import l2logger, util
+
+NUM_WORKERS = 4
+RECORDS_PER_BLOCK = 20000
+
+
+def timed(read):
+    start = time.perf_counter()
+    read()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    records_per_round = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    print(f"{records_per_round} records per round, {NUM_WORKERS} workers")
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(
+            base_dir,
+            "bench",
+            {"metrics_columns": ["reward", "steps"]},
+            flush_policy=l2logger.FlushPolicy(max_rows=1000),
+        )
+        scenario_dir = Path(logger.scenario_dir)
+        follower = util.LogFollower(scenario_dir)
+        exp_num = 0
+        for _ in range(num_rounds):
+            for _ in range(records_per_round):
+                block_num = exp_num // RECORDS_PER_BLOCK
+                logger.log_record(
+                    {
+                        "block_num": block_num,
+                        "exp_num": exp_num,
+                        "worker_id": f"worker{exp_num % NUM_WORKERS}",
+                        "block_type": "train" if block_num % 2 else "test",
+                        "task_name": f"task_{block_num % 3}",
+                        "task_params": {"difficulty": block_num % 3},
+                        "reward": exp_num % 100 * 0.5,
+                        "steps": exp_num % 200,
+                    }
+                )
+                exp_num += 1
+            logger.flush()
+            read_time = timed(lambda: util.read_log_data(scenario_dir))
+            poll_time = timed(follower.poll)
+            print(
+                f"{exp_num:>8} records: read_log_data {read_time:6.3f} s, "
+                f"poll {poll_time:6.3f} s"
+            )
+        logger.close()
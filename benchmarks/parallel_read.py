@@ -0,0 +1,108 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time to read a scenario logged by many workers over many blocks
+# (one TSV file per worker/block) by concatenating each file onto the logs read
+# so far, as read_log_data used to, and with read_log_data reading the files
+# one at a time or with 2 and 4 jobs in a thread and a process pool.
+#
+# Usage: python parallel_read.py [num_workers] [num_blocks] [records_per_file]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from l2logger import l2logger, util
+
+
+def log_scenario(base_dir, num_workers, num_blocks, records_per_file):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward", "steps"]},
+        flush_policy=l2logger.FlushPolicy(max_rows=1000),
+    )
+    exp_num = 0
+    for block_num in range(num_blocks):
+        for _ in range(records_per_file):
+            for worker in range(num_workers):
+                logger.log_record(
+                    {
+                        "block_num": block_num,
+                        "exp_num": exp_num,
+                        "worker_id": f"worker{worker}",
+                        "block_type": "train" if block_num % 2 else "test",
+                        "task_name": f"task_{block_num % 3}",
+                        "task_params": {"difficulty": block_num % 3},
+                        "reward": exp_num % 100 * 0.5,
+                        "steps": exp_num % 200,
+                    }
+                )
+                exp_num += 1
+    logger.close()
+    return logger.scenario_dir
+
+
+def read_concat_each_file(scenario_dir):
+    logs = None
+    for data_file in sorted(Path(scenario_dir).rglob("data-log.tsv")):
+        df = pd.read_csv(data_file, sep="\t")
+        logs = df if logs is None else pd.concat([logs, df])
+    return logs
+
+
+def best_time(read, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    num_blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    records_per_file = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    print(
+        f"{num_workers} workers x {num_blocks} blocks, "
+        f"{records_per_file} records per file"
+    )
+    with tempfile.TemporaryDirectory() as base_dir:
+        scenario_dir = Path(
+            log_scenario(base_dir, num_workers, num_blocks, records_per_file)
+        )
+        reads = {
+            "concat each file": lambda: read_concat_each_file(scenario_dir),
+            "jobs=None": lambda: util.read_log_data(scenario_dir),
+        }
+        for jobs in [2, 4]:
+            reads[f"jobs={jobs}, threads"] = lambda jobs=jobs: util.read_log_data(
+                scenario_dir, jobs=jobs
+            )
+            reads[f"jobs={jobs}, processes"] = lambda jobs=jobs: util.read_log_data(
+                scenario_dir, jobs=jobs, processes=True
+            )
+        for name, read in reads.items():
+            print(f"{name:>20}: {best_time(read):6.2f} s")
@@ -0,0 +1,69 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the per-record cost of logging with DataLogger.log_record, building
+# a dict for every record, with a recorder returned by DataLogger.bind_schema
+# taking the same values positionally.
+#
+# Usage: python positional.py [num_records]
+
+import sys
+import tempfile
+import time
+
+from l2logger import l2logger
+
+LOGGER_INFO = {"metrics_columns": ["reward", "steps"]}
+TASK_PARAMS = {"param1": 1}
+
+
+def log_dicts(logger, num_records):
+    for exp_num in range(num_records):
+        logger.log_record(
+            {
+                "block_num": 0,
+                "exp_num": exp_num,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": TASK_PARAMS,
+                "reward": exp_num * 0.5,
+                "steps": 10,
+            }
+        )
+
+
+def log_values(logger, num_records):
+    record = logger.bind_schema("worker0").record
+    for exp_num in range(num_records):
+        record(0, exp_num, "train", "task_a", TASK_PARAMS, exp_num * 0.5, 10)
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for name, log in (("log_record", log_dicts), ("bind_schema", log_values)):
+        with tempfile.TemporaryDirectory() as base_dir:
+            logger = l2logger.DataLogger(base_dir, "bench", LOGGER_INFO)
+            start = time.perf_counter()
+            log(logger, num_records)
+            logger.close()
+            elapsed = time.perf_counter() - start
+        print(f"{name:>11}: {elapsed / num_records * 1e6:.2f} us/record")
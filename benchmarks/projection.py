@@ -0,0 +1,102 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time to read a scenario logged with 40 metrics in full and
+# with only 2 of them as analysis variables, and the memory used by the
+# result, with read_log_data and by parsing every column with type inference
+# and then selecting the columns, as read_log_data used to.
+#
+# Usage: python projection.py [num_records]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from l2logger import l2logger, util
+
+METRICS = [f"metric_{i}" for i in range(40)]
+ANALYSIS_VARIABLES = METRICS[:2]
+RECORDS_PER_BLOCK = 50000
+
+
+def log_scenario(base_dir, num_records):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": METRICS},
+        flush_policy=l2logger.FlushPolicy(max_rows=1000),
+    )
+    for exp_num in range(num_records):
+        block_num = exp_num // RECORDS_PER_BLOCK
+        record = {
+            "block_num": block_num,
+            "exp_num": exp_num,
+            "block_type": "train" if block_num % 2 else "test",
+            "task_name": f"task_{block_num % 3}",
+            "task_params": {"difficulty": block_num % 3},
+        }
+        for i, metric in enumerate(METRICS):
+            record[metric] = (exp_num * (i + 1)) % 1000 * 0.25
+        logger.log_record(record)
+    logger.close()
+    return Path(logger.scenario_dir)
+
+
+def read_inferred(scenario_dir, analysis_variables=None):
+    logs = pd.concat(
+        pd.read_csv(data_file, sep="\t")
+        for data_file in sorted(scenario_dir.rglob("data-log.tsv"))
+    )
+    if analysis_variables is not None:
+        logs = logs[util._DEFAULT_COLUMNS + analysis_variables]
+    return logs
+
+
+def best_time(read, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{num_records} records, {len(METRICS)} metrics")
+    with tempfile.TemporaryDirectory() as base_dir:
+        scenario_dir = log_scenario(base_dir, num_records)
+        reads = {
+            "inferred, all": lambda: read_inferred(scenario_dir),
+            "inferred, 2 metrics": lambda: read_inferred(
+                scenario_dir, ANALYSIS_VARIABLES
+            ),
+            "read_log_data, all": lambda: util.read_log_data(scenario_dir),
+            "read_log_data, 2 metrics": lambda: util.read_log_data(
+                scenario_dir, ANALYSIS_VARIABLES
+            ),
+        }
+        for name, read in reads.items():
+            memory = read().memory_usage(deep=True).sum()
+            print(f"{name:>25}: {best_time(read):6.2f} s, {memory / 2 ** 20:6.1f} MiB")
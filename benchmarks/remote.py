@@ -0,0 +1,97 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Measures the throughput of an l2logger server on localhost with 1, 4 and 16
+# concurrent RemoteDataLogger clients, each running in its own process and
+# logging an equal share of the records.
+#
+# Usage: python remote.py [num_records]
+
+import multiprocessing
+import sys
+import tempfile
+import time
+
+from l2logger import l2logger
+from l2logger.remote import LogServer, RemoteDataLogger
+
+CLIENT_COUNTS = [1, 4, 16]
+
+
+def log_client(address, client_index, num_clients, num_records):
+    client = RemoteDataLogger(address)
+    for exp_num in range(client_index, num_records, num_clients):
+        client.log_record(
+            {
+                "block_num": 0,
+                "exp_num": exp_num,
+                "worker_id": f"worker{client_index}",
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {"param1": 1},
+                "reward": exp_num * 0.5,
+            }
+        )
+    client.close()
+
+
+def run(num_clients, num_records, flush_policy):
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(
+            base_dir,
+            "bench",
+            {"metrics_columns": ["reward"]},
+            flush_policy=flush_policy,
+            per_worker_ordering=True,
+        )
+        server = LogServer(logger, ("127.0.0.1", 0))
+        server.start()
+        clients = [
+            multiprocessing.Process(
+                target=log_client,
+                args=(server.address, i, num_clients, num_records),
+            )
+            for i in range(num_clients)
+        ]
+        start = time.perf_counter()
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - start
+        server.close()
+    assert server.stats["records"] == num_records
+    return elapsed
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    print(f"{num_records} records, {multiprocessing.cpu_count()} cpus")
+    for policy_name, flush_policy in (
+        ("flush every row", None),
+        ("flush every 100 ms", l2logger.FlushPolicy(max_interval_ms=100)),
+    ):
+        for num_clients in CLIENT_COUNTS:
+            elapsed = run(num_clients, num_records, flush_policy)
+            print(
+                f"{policy_name}, {num_clients:>2} clients: "
+                f"{num_records / elapsed:9.0f} records/s"
+            )
@@ -0,0 +1,82 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Logs one long block with and without segmentation, then compares the time
+# to read the whole log with the time to read a tenth of it with exp_range,
+# which skips the segments out of range.
+#
+# Usage: python segments.py [num_records]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from l2logger import l2logger, util
+
+SEGMENT_ROWS = 10000
+
+
+def log_scenario(base_dir, sink_options, num_records):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward"]},
+        flush_policy=l2logger.FlushPolicy(max_rows=1000),
+        sink_options=sink_options,
+    )
+    for exp_num in range(num_records):
+        logger.log_record(
+            {
+                "block_num": 0,
+                "exp_num": exp_num,
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {"param1": 1},
+                "reward": exp_num * 0.5,
+            }
+        )
+    logger.close()
+    return Path(logger.scenario_dir)
+
+
+def time_read(scenario_dir, exp_range=None):
+    start = time.perf_counter()
+    logs = util.read_log_data(scenario_dir, exp_range=exp_range)
+    return time.perf_counter() - start, len(logs)
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    exp_range = (num_records // 2, num_records // 2 + num_records // 10)
+    print(f"{num_records} records, reading exp_range {exp_range}")
+    with tempfile.TemporaryDirectory() as base_dir:
+        for name, sink_options in (
+            ("single file", {}),
+            (f"{SEGMENT_ROWS} row segments", {"segment_rows": SEGMENT_ROWS}),
+        ):
+            scenario_dir = log_scenario(base_dir, sink_options, num_records)
+            full_time, _ = time_read(scenario_dir)
+            range_time, num_rows = time_read(scenario_dir, exp_range)
+            print(
+                f"{name:>18}: full read {full_time:5.2f} s, "
+                f"range read {range_time:5.2f} s ({num_rows} rows)"
+            )
@@ -0,0 +1,99 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares the time and peak memory of exporting the completed experiences
+# of a scenario to TSV with regime numbers, by reading it whole with
+# read_log_data and in chunks of 10000 and 100000 rows with iter_log_data.
+# Each export runs in a fresh process, whose peak RSS is reported (Unix only),
+# along with that of a process which only imports the modules.
+#
+# Usage: python streaming.py [num_records]
+
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from l2logger import aggregate, l2logger, util
+
+NUM_WORKERS = 8
+RECORDS_PER_BLOCK = 50000
+
+
+def log_scenario(base_dir, num_records):
+    logger = l2logger.DataLogger(
+        base_dir,
+        "bench",
+        {"metrics_columns": ["reward", "steps"]},
+        flush_policy=l2logger.FlushPolicy(max_rows=1000),
+    )
+    for exp_num in range(num_records):
+        block_num = exp_num // RECORDS_PER_BLOCK
+        logger.log_record(
+            {
+                "block_num": block_num,
+                "exp_num": exp_num,
+                "worker_id": f"worker{exp_num % NUM_WORKERS}",
+                "block_type": "train" if block_num % 2 else "test",
+                "task_name": f"task_{block_num % 3}",
+                "task_params": {"difficulty": block_num % 3},
+                "reward": exp_num % 100 * 0.5,
+                "steps": exp_num % 200,
+            }
+        )
+    logger.close()
+    return Path(logger.scenario_dir)
+
+
+def export(scenario_dir, output, chunksize, results):
+    start = time.perf_counter()
+    if chunksize == 0:
+        pass
+    elif chunksize is None:
+        logs = util.read_log_data(scenario_dir)
+        logs = util.fill_regime_num(logs[logs["exp_status"] == "complete"])
+        logs.to_csv(output, sep="\t", index=False)
+    else:
+        aggregate.export_chunks(scenario_dir, chunksize, "tsv", output[:-4])
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 400000
+    print(f"{num_records} records")
+    with tempfile.TemporaryDirectory() as base_dir:
+        scenario_dir = log_scenario(base_dir, num_records)
+        for chunksize in [0, None, 100000, 10000]:
+            results = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=export,
+                args=(scenario_dir, f"{base_dir}/data.tsv", chunksize, results),
+            )
+            process.start()
+            elapsed, max_rss = results.get()
+            process.join()
+            name = {0: "imports only", None: "read_log_data"}.get(
+                chunksize, f"chunks of {chunksize}"
+            )
+            print(f"{name:>18}: {elapsed:6.2f} s, peak RSS {max_rss / 1024:6.1f} MiB")
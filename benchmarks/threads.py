@@ -0,0 +1,97 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Compares DataLogger shared by 1, 2, 4 and 8 threads, with every call behind
+# a single lock (the only safe way to share it without thread_safe) and in
+# thread-safe mode, where records are validated under a short lock and staged
+# per thread for a single writer thread. Each thread logs its own worker.
+#
+# Usage: python threads.py [num_records]
+
+import sys
+import tempfile
+import threading
+import time
+
+from l2logger import l2logger
+
+THREAD_COUNTS = [1, 2, 4, 8]
+
+
+def log_worker(log_record, worker_id, num_records):
+    for exp_num in range(num_records):
+        log_record(
+            {
+                "block_num": 0,
+                "exp_num": exp_num,
+                "worker_id": worker_id,
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {"param1": 1},
+                "reward": exp_num * 0.5,
+            }
+        )
+
+
+def run(thread_safe, num_threads, num_records):
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(
+            base_dir,
+            "bench",
+            {"metrics_columns": ["reward"]},
+            per_worker_ordering=True,
+            thread_safe=thread_safe,
+        )
+        if thread_safe:
+            log_record = logger.log_record
+        else:
+            lock = threading.Lock()
+
+            def log_record(record):
+                with lock:
+                    logger.log_record(record)
+
+        threads = [
+            threading.Thread(
+                target=log_worker,
+                args=(log_record, f"worker{i}", num_records // num_threads),
+            )
+            for i in range(num_threads)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        logger.close()
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    for num_threads in THREAD_COUNTS:
+        for thread_safe in [False, True]:
+            elapsed = run(thread_safe, num_threads, num_records)
+            mode = "thread_safe" if thread_safe else "locked"
+            print(
+                f"{num_threads} threads, {mode:>11}: "
+                f"{num_records / elapsed:9.0f} records/s"
+            )
@@ -0,0 +1,60 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+# Measures the per-record cost of DataLogger record validation, comparing the
+# generic validator used for the first record with the compiled fast path used
+# for every record after it.
+#
+# Usage: python validation.py [num_records]
+
+import sys
+import tempfile
+import timeit
+
+from l2logger import l2logger
+
+RECORD = {
+    "block_num": 0,
+    "exp_num": 0,
+    "worker_id": "worker0",
+    "block_type": "train",
+    "task_name": "task_a",
+    "task_params": {"param1": 1},
+    "reward": 1.0,
+    "debug_info": "",
+}
+
+
+if __name__ == "__main__":
+    num_records = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as base_dir:
+        logger = l2logger.DataLogger(base_dir, "bench", {"metrics_columns": ["reward"]})
+        logger.log_record(RECORD)
+        record = logger._augment_fields(RECORD)
+        for name, validate in (
+            ("generic", logger._validate_record_generic),
+            ("compiled", logger._validate_record_compiled),
+        ):
+            elapsed = min(
+                timeit.repeat(lambda: validate(record), number=num_records, repeat=3)
+            )
+            print(f"{name:>8}: {elapsed / num_records * 1e6:.2f} us/record")
+        logger.close()
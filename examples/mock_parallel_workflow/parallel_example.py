@@ -32,7 +32,6 @@ import parallel_helper
 from parallel_helper import LoggerInfo, RegimeInfo
 import multiprocessing
 from multiprocessing import Process, Value, Lock, Queue
-from l2logger import l2logger
 
 
 class Task:
@@ -40,7 +39,7 @@ class Task:
         self._logger_info = logger_info
         self._regime_info = regime_info
 
-    def run(self, exp_num, worker_index):
+    def run(self, proxy, exp_num, worker_index):
         name = (
             f"{self._regime_info.to_string()}, exp_num {exp_num}"
             f"(worker-{worker_index})"
@@ -48,12 +47,12 @@ class Task:
         print(f"{name} starting...")
         time.sleep(0.01)
         self._logger_info.write_data(
-            self._regime_info, exp_num, f"worker-{worker_index}"
+            proxy, self._regime_info, exp_num, f"worker-{worker_index}"
         )
         print(f"{name} Done!")
 
 
-def regime_worker(logger_info, regime_info, exp_num_queue, worker_index):
+def regime_worker(logger_info, regime_info, exp_num_queue, worker_index, proxy):
     while True:
         try:
             exp_num = exp_num_queue.get(block=True, timeout=0.1)
@@ -64,7 +63,9 @@ def regime_worker(logger_info, regime_info, exp_num_queue, worker_index):
             else:
                 break
         task = Task(logger_info, regime_info)
-        task.run(exp_num, worker_index)
+        task.run(proxy, exp_num, worker_index)
+    # send any records still batched by the proxy to the collector
+    proxy.close()
 
 
 def spawn_workers(logger_info, regime_info, exp_num_queue):
@@ -77,6 +78,7 @@ def spawn_workers(logger_info, regime_info, exp_num_queue):
                 regime_info,
                 exp_num_queue,
                 i,
+                logger_info.logger.get_proxy(f"worker-{i}"),
             ),
         )
         for i in range(0, logger_info.workers)
@@ -100,6 +102,8 @@ Note a few simplifications employed here for the purpose of example
 * Workers do not synchronize agent state at end of the regime (i.e. updating the model)
 * The N workers are spawned fresh for every regime, rather than using a pool
 * There is no batching of experiences; each is grabbed one-by-one by the next available worker
+* All workers log through proxies to a single collector process, which validates
+and writes their records, and keeps the logs of each worker in order
 
 """
 
@@ -120,6 +124,8 @@ def start(logger_info):
             spawn_workers(logger_info, regime_info, exp_num_queue)
 
             regime_num += 1
+    stats = logger_info.logger.close()
+    print(f"Logged {stats['records']} records through {stats['proxies']} proxies")
 
 
 if __name__ == "__main__":
@@ -30,7 +30,7 @@ from datetime import datetime
 import os
 import sys
 
-from l2logger import l2logger
+from l2logger.collector import CollectorDataLogger
 
 
 class RegimeInfo:
@@ -67,9 +67,9 @@ class RegimeInfo:
         )
 
 
-# This gets ***copied*** into a new process's memory space
-# Hence, don't have to worry about locking around calls to
-# write_to_data_log or write_new_regime
+# This gets ***copied*** into a new process's memory space, so
+# each worker logs through its own proxy to the collector process,
+# which does all of the writing
 class LoggerInfo:
     def __init__(self, input_file_name):
         self._seed = datetime.now()
@@ -96,7 +96,7 @@ class LoggerInfo:
     def logger(self):
         return self._logger
 
-    def write_data(self, regime_info, exp_num, worker_id):
+    def write_data(self, proxy, regime_info, exp_num, worker_id):
         data_record = {
             "block_num": regime_info.block_num,
             "worker_id": worker_id,
@@ -106,7 +106,7 @@ class LoggerInfo:
             "exp_num": exp_num,
             "reward": 1,
         }
-        self.logger.log_record(data_record)
+        proxy.log_record(data_record)
 
     def _create_logger(self, logs_base):
         if not os.path.exists(logs_base):
@@ -123,6 +123,6 @@ class LoggerInfo:
             "script": __file__,
         }
         logger_info = {"metrics_columns": ["reward"], "log_format_version": "1.0"}
-        return l2logger.DataLogger(
+        return CollectorDataLogger(
             logs_base, self._scenario_dirname, logger_info, scenario_info
         )
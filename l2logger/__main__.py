@@ -0,0 +1,132 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+
+from l2logger.l2logger import DataLogger
+from l2logger.remote import LogServer
+from l2logger.sinks import FlushPolicy, SINKS
+
+logger = logging.getLogger("l2logger")
+
+
+def serve(args) -> None:
+    logger_info = {"metrics_columns": args.metrics_columns}
+    scenario_info = None
+    if args.scenario_info:
+        with open(args.scenario_info) as scenario_file:
+            scenario_info = json.load(scenario_file)
+    flush_policy = None
+    if args.flush_interval_ms:
+        flush_policy = FlushPolicy(max_interval_ms=args.flush_interval_ms)
+    data_logger = DataLogger(
+        args.logging_base_dir,
+        args.scenario_name,
+        logger_info,
+        scenario_info,
+        flush_policy=flush_policy,
+        sink=args.sink,
+        per_worker_ordering=True,
+    )
+    address = args.unix or (args.host, args.port)
+    server = LogServer(data_logger, address)
+    # stop gracefully on SIGTERM as well as on Ctrl-C
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    logger.info(f"Logging to {data_logger.scenario_dir}, serving on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        logger.info(f"Server stopped: {server.stats}")
+
+
+def run():
+    # Instantiate parser
+    parser = argparse.ArgumentParser(
+        prog="l2logger", description="Lifelong learning logger"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve remote loggers, writing their records to one scenario"
+    )
+    serve_parser.add_argument(
+        "logging_base_dir", type=str, help="Base directory of the scenario logs"
+    )
+    serve_parser.add_argument("scenario_name", type=str, help="Name of the scenario")
+    serve_parser.add_argument(
+        "-m",
+        "--metrics-columns",
+        nargs="+",
+        required=True,
+        help="Metric columns of the records",
+    )
+    serve_parser.add_argument(
+        "--scenario-info", type=str, help="JSON file with the scenario info"
+    )
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1", type=str, help="Host to listen on over TCP"
+    )
+    serve_parser.add_argument(
+        "--port", default=7878, type=int, help="Port to listen on over TCP"
+    )
+    serve_parser.add_argument(
+        "--unix", type=str, help="Path of a Unix socket to listen on instead of TCP"
+    )
+    serve_parser.add_argument(
+        "--sink", default="tsv", choices=list(SINKS), help="Log sink"
+    )
+    serve_parser.add_argument(
+        "--flush-interval-ms",
+        type=float,
+        help="Flush log files once this many ms have passed, not after every row",
+    )
+
+    # Parse arguments
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args)
+
+
+def main():
+    # Configure logger
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+
+    try:
+        run()
+    except RuntimeError as e:
+        logger.exception(f"Error with serving logs: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,11 @@ from pathlib import Path
 
 from l2logger import util
 
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
 logger = logging.getLogger("l2logger.aggregate")
 
 
@@ -43,6 +48,16 @@ def run():
     # Log directories can be absolute paths, relative paths, or paths found in $L2DATA/logs
     parser.add_argument("log_dir", type=str, help="Log directory of scenario")
 
+    # Number of log files read in parallel
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of files to read at once"
+    )
+
+    # Cache the parsed logs in the log directory for later runs
+    parser.add_argument(
+        "--cache", action="store_true", help="Cache parsed logs in the log directory"
+    )
+
     # Output format
     parser.add_argument(
         "-f",
@@ -58,12 +73,28 @@ def run():
         "-o", "--output", type=str, default="data", help="Output filename"
     )
 
+    # Stream the logs in chunks of rows rather than reading them all at once
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Number of rows to process at a time, for logs larger than memory; "
+        "can't be used with --jobs or --cache",
+    )
+
     # Parse arguments
     args = parser.parse_args()
     log_dir = Path(args.log_dir)
 
+    if args.chunksize is not None:
+        # chunks are streamed from the log files one row at a time
+        if args.jobs is not None or args.cache:
+            parser.error("--chunksize cannot be used with --jobs or --cache")
+        export_chunks(log_dir, args.chunksize, args.format, args.output)
+        return
+
     # Attempt to read log data
-    log_data = util.read_log_data(log_dir)
+    log_data = util.read_log_data(log_dir, jobs=args.jobs, cache=args.cache)
 
     # Filter data by completed experiences
     log_data = log_data[log_data["exp_status"] == "complete"]
@@ -83,6 +114,38 @@ def run():
         log_data.reset_index(drop=True).to_feather(str(Path(args.output + ".feather")))
 
 
+def export_chunks(
+    log_dir: Path, chunksize: int, output_format: str, output: str
+) -> None:
+    # Completed experiences are read and numbered by regime a chunk at a time,
+    # already sorted by regime and exp_num since regimes are numbered in
+    # exp_num order, and appended to the output file
+    chunks = util.iter_fill_regime_num(
+        util.iter_complete(util.iter_log_data(log_dir, chunksize=chunksize))
+    )
+    if output_format == "feather":
+        if pa is None:
+            raise RuntimeError("Writing feather files requires the pyarrow package")
+        # Feather files are Arrow IPC files, written a record batch per chunk
+        writer, schema = None, None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(str(Path(output + ".feather")), schema)
+                writer.write_table(table.cast(schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    sep, extension = ("\t", ".tsv") if output_format == "tsv" else (",", ".csv")
+    with open(Path(output + extension), "w", newline="") as output_file:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(output_file, sep=sep, index=False, header=i == 0)
+
+
 if __name__ == "__main__":
     # Configure logger
     logging.basicConfig(
@@ -0,0 +1,205 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List
+
+from l2logger.l2logger import DataLogger
+
+
+# asyncio front end to DataLogger: records are validated inline on the event
+# loop, while all file I/O (creating the scenario directory, writing and
+# flushing rows, closing) runs on a single writer thread, in batches. Use as
+#
+#   async with AsyncDataLogger(dir, name, cols, meta) as logger:
+#       await logger.log_record(record)
+class AsyncDataLogger:
+    def __init__(
+        self,
+        logging_base_dir: str,
+        scenario_name: str,
+        logger_info: dict,
+        scenario_info: dict = None,
+        batch_size: int = 1000,
+        max_delay_ms: float = 100,
+        max_pending_batches: int = 8,
+        **logger_args,
+    ) -> None:
+        if logger_args.get("async_mode"):
+            raise RuntimeError("async_mode is not supported by AsyncDataLogger")
+        for name, value in (
+            ("batch_size", batch_size),
+            ("max_pending_batches", max_pending_batches),
+        ):
+            if type(value) is not int or value <= 0:
+                raise RuntimeError(f"{name} must be a positive integer")
+        if type(max_delay_ms) not in (int, float) or max_delay_ms <= 0:
+            raise RuntimeError("max_delay_ms must be a positive number")
+        self._logger_args = (
+            (logging_base_dir, scenario_name, logger_info, scenario_info),
+            logger_args,
+        )
+        self._batch_size = batch_size
+        self._max_delay = max_delay_ms / 1000
+        self._max_pending_batches = max_pending_batches
+        self._logger = None
+        self._executor = None
+        self._loop = None
+        # rows validated but not submitted yet, and the writes in progress
+        self._batch = []
+        self._batch_timer = None
+        self._pending = deque()
+        self._error = None
+        self._closed = False
+
+    @property
+    def logger(self):
+        return self._logger
+
+    @property
+    def scenario_dir(self):
+        return self._logger.scenario_dir if self._logger else None
+
+    # creates the underlying DataLogger on the writer thread, since it writes
+    # the info files
+    async def open(self) -> None:
+        if self._logger:
+            return
+        if self._closed:
+            raise RuntimeError("logger is closed")
+        # the running loop; get_running_loop needs Python 3.7
+        self._loop = asyncio.get_event_loop()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="l2logger-writer"
+        )
+        args, kwargs = self._logger_args
+        self._logger = await self._loop.run_in_executor(
+            self._executor, lambda: DataLogger(*args, **kwargs)
+        )
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def log_record(self, record_in: dict) -> None:
+        logger = self._check_open()
+        await self._add_rows([logger._prepare_record(record_in)])
+
+    async def log_records(
+        self, records_in: List[dict], timestamp: datetime = None
+    ) -> None:
+        logger = self._check_open()
+        if not type(records_in) is list:
+            raise RuntimeError("records must be list of dicts")
+        if not records_in:
+            return
+        batch_timestamp = logger._format_batch_timestamp(timestamp)
+        records = [
+            logger._augment_fields(record, batch_timestamp) for record in records_in
+        ]
+        logger._prepare_rows(logger._get_batch_columns(records), records)
+        await self._add_rows(records)
+
+    # writes every row logged so far, then flushes the log files
+    async def flush(self) -> None:
+        logger = self._check_open()
+        self._submit_batch()
+        await self._wait_for_writes(0)
+        await self._loop.run_in_executor(self._executor, logger._flush_files)
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if not self._logger:
+            return
+        try:
+            self._submit_batch()
+            await self._wait_for_writes(0)
+        finally:
+            await self._loop.run_in_executor(self._executor, self._logger.close)
+            self._executor.shutdown()
+        self._check_error()
+
+    def _check_open(self) -> DataLogger:
+        if self._closed:
+            raise RuntimeError("logger is closed")
+        if not self._logger:
+            raise RuntimeError("logger is not open")
+        self._check_error()
+        return self._logger
+
+    def _check_error(self) -> None:
+        if self._error:
+            raise RuntimeError(f"log writer failed: {self._error}") from self._error
+
+    async def _add_rows(self, rows: List[dict]) -> None:
+        # writes submitted by the batch timer are only collected here
+        self._collect_writes()
+        self._check_error()
+        if not self._batch:
+            self._batch_timer = self._loop.call_later(
+                self._max_delay, self._submit_batch
+            )
+        self._batch.extend(rows)
+        if len(self._batch) >= self._batch_size:
+            self._submit_batch()
+            # lets other tasks run, and waits while the writer falls behind
+            await asyncio.sleep(0)
+            await self._wait_for_writes(self._max_pending_batches)
+
+    def _submit_batch(self) -> None:
+        if self._batch_timer:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        if not self._batch:
+            return
+        rows, self._batch = self._batch, []
+        self._collect_writes()
+        self._pending.append(
+            self._loop.run_in_executor(self._executor, self._logger._write_rows, rows)
+        )
+
+    # drops the finished writes, keeping the first error; writes finish in
+    # the order they were submitted, on the single writer thread
+    def _collect_writes(self) -> None:
+        while self._pending and self._pending[0].done():
+            error = self._pending.popleft().exception()
+            self._error = self._error or error
+
+    # waits until at most max_pending writes are in progress, collecting the
+    # errors of finished ones
+    async def _wait_for_writes(self, max_pending: int) -> None:
+        while self._pending and (
+            len(self._pending) > max_pending or self._pending[0].done()
+        ):
+            future = self._pending.popleft()
+            try:
+                await future
+            except Exception as e:
+                self._error = self._error or e
+        self._check_error()
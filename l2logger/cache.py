@@ -0,0 +1,169 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Callable, List
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = ".l2cache"
+SNAPSHOT_FILE_NAME = "snapshot.feather"
+MANIFEST_FILE_NAME = "manifest.json"
+DEFAULT_MAX_CACHE_BYTES = 1 << 30
+# rows of the snapshot are tagged with the index of their data file in the
+# manifest, so that the rows of changed files can be replaced
+_FILE_COLUMN = "_l2cache_file"
+_CACHE_VERSION = 1
+
+
+class LogCache:
+    # Keeps a snapshot of the parsed data files of a scenario in a .l2cache
+    # directory, with a manifest of the size and modification time of each.
+    # Files which are unchanged since the snapshot are loaded from it; new or
+    # changed files are parsed and merged in, and the snapshot is rewritten.
+    # A snapshot larger than max_bytes is not kept.
+    def __init__(
+        self, log_dir: Path, dtypes: dict, max_bytes: int = DEFAULT_MAX_CACHE_BYTES
+    ) -> None:
+        if pa is None:
+            raise RuntimeError("Caching logs requires the pyarrow package")
+        if type(max_bytes) is not int or max_bytes <= 0:
+            raise RuntimeError("max_bytes must be a positive int")
+        self._log_dir = log_dir
+        self._cache_dir = log_dir / CACHE_DIR_NAME
+        # the cache is also invalid if the logs are read with other dtypes
+        self._dtypes = {column: str(dtype) for column, dtype in dtypes.items()}
+        self._max_bytes = max_bytes
+
+    def read(self, data_files: List[Path], read_files: Callable) -> pd.DataFrame:
+        # read_files parses a list of data files into a list of DataFrames
+        fingerprints = [self._get_fingerprint(data_file) for data_file in data_files]
+        cached_files, snapshot = self._load()
+        if snapshot is not None and cached_files == fingerprints:
+            return snapshot.drop(columns=_FILE_COLUMN)
+
+        # the cached rows of unchanged files are kept, tagged with the file's
+        # new index, and the other files are parsed
+        cached_indices = {
+            tuple(fingerprint): index
+            for index, fingerprint in enumerate(cached_files or [])
+        }
+        new_indices = {}
+        changed = []
+        for index, fingerprint in enumerate(fingerprints):
+            if fingerprint in cached_indices:
+                new_indices[cached_indices[fingerprint]] = index
+            else:
+                changed.append(index)
+        frames = []
+        if new_indices:
+            snapshot = snapshot[snapshot[_FILE_COLUMN].isin(list(new_indices))]
+            frames.append(
+                snapshot.assign(
+                    **{_FILE_COLUMN: snapshot[_FILE_COLUMN].map(new_indices)}
+                )
+            )
+        for index, frame in zip(
+            changed, read_files([data_files[index] for index in changed])
+        ):
+            frames.append(frame.assign(**{_FILE_COLUMN: index}))
+        logger.debug(
+            f"Parsed {len(changed)} of {len(data_files)} data files of {self._log_dir}"
+        )
+
+        # rows are kept in the order of their files, as if all were parsed
+        logs = pd.concat(frames, ignore_index=True)
+        logs = logs.sort_values(_FILE_COLUMN, kind="stable", ignore_index=True)
+        self._save(fingerprints, logs)
+        return logs.drop(columns=_FILE_COLUMN)
+
+    def clear(self) -> None:
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+    def _get_fingerprint(self, data_file: Path) -> tuple:
+        stat = data_file.stat()
+        return (
+            data_file.relative_to(self._log_dir).as_posix(),
+            stat.st_size,
+            stat.st_mtime_ns,
+        )
+
+    def _load(self):
+        manifest_file = self._cache_dir / MANIFEST_FILE_NAME
+        snapshot_file = self._cache_dir / SNAPSHOT_FILE_NAME
+        if not manifest_file.exists() or not snapshot_file.exists():
+            return None, None
+        try:
+            with open(manifest_file) as json_file:
+                manifest = json.load(json_file)
+            if (
+                manifest.get("version") != _CACHE_VERSION
+                or manifest.get("dtypes") != self._dtypes
+            ):
+                return None, None
+            snapshot = feather.read_feather(str(snapshot_file))
+        except (OSError, ValueError, pa.ArrowException) as e:
+            logger.warning(f"Ignoring unreadable log cache in {self._cache_dir}: {e}")
+            return None, None
+        return [tuple(fingerprint) for fingerprint in manifest["files"]], snapshot
+
+    def _save(self, fingerprints: List[tuple], logs: pd.DataFrame) -> None:
+        # The manifest is removed while the snapshot is replaced, so that it
+        # never lists the files of another snapshot
+        manifest = {
+            "version": _CACHE_VERSION,
+            "dtypes": self._dtypes,
+            "files": [list(fingerprint) for fingerprint in fingerprints],
+        }
+        try:
+            os.makedirs(self._cache_dir, exist_ok=True)
+            snapshot_file = self._cache_dir / SNAPSHOT_FILE_NAME
+            feather.write_feather(logs, str(snapshot_file) + ".tmp")
+            if os.path.getsize(str(snapshot_file) + ".tmp") > self._max_bytes:
+                logger.warning(
+                    f"Not caching the logs of {self._log_dir}, which take more "
+                    f"than {self._max_bytes} bytes"
+                )
+                self.clear()
+                return
+            manifest_file = self._cache_dir / MANIFEST_FILE_NAME
+            if manifest_file.exists():
+                os.remove(manifest_file)
+            os.replace(str(snapshot_file) + ".tmp", snapshot_file)
+            with open(str(manifest_file) + ".tmp", "w") as json_file:
+                json.dump(manifest, json_file)
+            os.replace(str(manifest_file) + ".tmp", manifest_file)
+        except (OSError, pa.ArrowException) as e:
+            # e.g. a read-only log directory, or columns of mixed types
+            logger.warning(f"Could not cache the logs of {self._log_dir}: {e}")
+            self.clear()
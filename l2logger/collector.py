@@ -0,0 +1,400 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import atexit
+import multiprocessing
+import pickle
+import queue
+import time
+from typing import List
+
+from l2logger.l2logger import DataLogger, TimestampProvider
+
+try:
+    # shared memory is only available from Python 3.8
+    from multiprocessing import resource_tracker
+
+    from l2logger.shm import (
+        SharedMemoryProxy,
+        SharedRing,
+        SharedRingReader,
+        record_dtype,
+    )
+except ImportError:
+    resource_tracker = None
+
+# message sent to the collector process once all proxies are done
+_STOP = None
+
+
+# sends records from a worker process to the collector in batches. Each proxy
+# should only be used from a single process, and each worker_id only from a
+# single proxy, so that the records of a worker arrive in order
+class DataLoggerProxy:
+    def __init__(
+        self,
+        records_queue,
+        proxy_id: int,
+        batch_size: int,
+        worker_id: str = None,
+        timestamp_provider=None,
+    ) -> None:
+        self._queue = records_queue
+        self._proxy_id = proxy_id
+        self._batch_size = batch_size
+        self._worker_id = worker_id
+        self._timestamp_provider = timestamp_provider or TimestampProvider()
+        # pending (timestamp, record) pairs, and sequence number of the next
+        # batch sent
+        self._batch = []
+        self._seq = 0
+
+    @property
+    def proxy_id(self):
+        return self._proxy_id
+
+    @property
+    def worker_id(self):
+        return self._worker_id
+
+    # records are timestamped when they are logged, rather than when the
+    # collector writes them
+    def log_record(self, record: dict) -> None:
+        if not type(record) is dict:
+            raise RuntimeError("record must be dict")
+        record = record.copy()
+        if self._worker_id is not None and not "worker_id" in record:
+            record["worker_id"] = self._worker_id
+        self._batch.append((self._timestamp_provider(), record))
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def log_records(self, records: List[dict]) -> None:
+        if not type(records) is list:
+            raise RuntimeError("records must be list of dicts")
+        for record in records:
+            self.log_record(record)
+
+    # sends any pending records to the collector
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        # pickled here rather than by the queue's feeder thread, so that later
+        # changes to the records don't affect what gets logged
+        payload = pickle.dumps(self._batch, pickle.HIGHEST_PROTOCOL)
+        self._queue.put((self._proxy_id, self._seq, payload))
+        self._seq += 1
+        self._batch = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+# multi-process logger: a single collector process owns validation and I/O for
+# the records of any number of workers, which log through proxies. The
+# underlying DataLogger is created here, so the info files are written once.
+# Records are sent over a queue by default, or through a ring buffer in shared
+# memory for each proxy with the "shm" transport
+class CollectorDataLogger:
+    _TRANSPORTS = ["queue", "shm"]
+
+    def __init__(
+        self,
+        logging_base_dir: str,
+        scenario_name: str,
+        logger_info: dict,
+        scenario_info: dict = None,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        transport: str = "queue",
+        ring_size: int = 65536,
+        **logger_args,
+    ) -> None:
+        if logger_args.get("async_mode"):
+            raise RuntimeError("async_mode is not supported by the collector")
+        if not transport in self._TRANSPORTS:
+            raise RuntimeError(f"transport must be one of {self._TRANSPORTS}")
+        if transport == "shm" and resource_tracker is None:
+            raise RuntimeError("shm transport requires Python 3.8 or later")
+        if type(ring_size) is not int or ring_size < batch_size:
+            raise RuntimeError("ring_size must be an integer of at least batch_size")
+        if type(queue_size) is not int or queue_size <= 0:
+            raise RuntimeError("queue_size must be a positive integer")
+        if type(batch_size) is not int or batch_size <= 0:
+            raise RuntimeError("batch_size must be a positive integer")
+        col_key = "metrics_columns"
+        # records from different workers are interleaved arbitrarily, so they
+        # are only checked for ordering within each worker
+        self._logger = DataLogger(
+            logging_base_dir,
+            scenario_name,
+            logger_info,
+            scenario_info,
+            per_worker_ordering=True,
+            **logger_args,
+        )
+        self._batch_size = batch_size
+        self._next_proxy_id = 0
+        self._stats = None
+        self._transport = transport
+        self._ring_size = ring_size
+        self._rings = []
+
+        context = multiprocessing.get_context()
+        self._results = context.Queue()
+        if transport == "queue":
+            self._queue = context.Queue(queue_size)
+            run_collector = _run_collector
+        else:
+            # the rings carry the records, and the queue only carries new
+            # rings and interned values
+            if not isinstance(self._logger._timestamp_provider, TimestampProvider):
+                raise RuntimeError("shm transport requires a TimestampProvider")
+            self._record_dtype = record_dtype(self._logger.logger_info[col_key])
+            self._queue = context.Queue()
+            # started before the collector, so that every process shares it and
+            # the rings are only cleaned up once
+            resource_tracker.ensure_running()
+            run_collector = _run_shm_collector
+        self._process = context.Process(
+            target=run_collector,
+            args=(self._logger, self._queue, self._results),
+            name="l2logger-collector",
+            daemon=True,
+        )
+        self._process.start()
+        atexit.register(self.close)
+
+    @property
+    def logging_base_dir(self):
+        return self._logger.logging_base_dir
+
+    @property
+    def transport(self):
+        return self._transport
+
+    @property
+    def scenario_dir(self):
+        return self._logger.scenario_dir
+
+    @property
+    def logger_info(self):
+        return self._logger.logger_info
+
+    @property
+    def scenario_info(self):
+        return self._logger.scenario_info
+
+    # throughput metrics from the collector, available once it is closed
+    @property
+    def stats(self):
+        return self._stats
+
+    # creates a proxy for a worker. Proxies must be created in this process,
+    # and passed to the worker processes when they are started
+    def get_proxy(self, worker_id: str = None):
+        if self._stats is not None:
+            raise RuntimeError("collector is closed")
+        proxy_id = self._next_proxy_id
+        self._next_proxy_id += 1
+        if self._transport == "queue":
+            return DataLoggerProxy(
+                self._queue,
+                proxy_id,
+                self._batch_size,
+                worker_id,
+                self._logger._timestamp_provider,
+            )
+        ring = SharedRing(self._record_dtype, self._ring_size)
+        self._rings.append(ring)
+        self._queue.put(("ring", proxy_id, ring))
+        logger = self._logger
+        return SharedMemoryProxy(
+            ring,
+            self._queue,
+            proxy_id,
+            self._batch_size,
+            logger.logger_info["metrics_columns"],
+            {
+                "worker_id": logger._default_worker_id,
+                "block_subtype": logger._default_block_subtype,
+                "exp_status": logger._default_exp_status,
+            },
+            worker_id,
+            logger._timestamp_provider,
+        )
+
+    # stops the collector once it has written the records sent so far, which
+    # requires the workers to have closed their proxies
+    def close(self) -> dict:
+        if self._stats is not None:
+            return self._stats
+        atexit.unregister(self.close)
+        self._queue.put(_STOP)
+        try:
+            result = self._wait_for_result()
+        finally:
+            for ring in self._rings:
+                ring.close()
+                ring.unlink()
+            self._rings = []
+        self._process.join()
+        self._stats, error = result
+        if error:
+            raise RuntimeError(
+                f"log collector rejected {self._stats['rejected_records']} "
+                f"records: {error}"
+            )
+        return self._stats
+
+    def _wait_for_result(self) -> tuple:
+        while True:
+            try:
+                return self._results.get(timeout=0.1)
+            except queue.Empty:
+                if not self._process.is_alive():
+                    break
+        try:
+            return self._results.get_nowait()
+        except queue.Empty:
+            raise RuntimeError(
+                f"log collector exited with code {self._process.exitcode}"
+            )
+
+
+# main loop of the collector process with the queue transport. A batch which
+# fails validation is rejected as a whole; the first error is reported when
+# the collector stops
+def _run_collector(logger: DataLogger, records_queue, results) -> None:
+    stats = _new_stats()
+    next_seqs = {}
+    error = None
+    start = time.perf_counter()
+    while True:
+        message = records_queue.get()
+        if message is _STOP:
+            break
+        proxy_id, seq, payload = message
+        batch = pickle.loads(payload)
+        expected_seq = next_seqs.get(proxy_id, 0)
+        next_seqs[proxy_id] = seq + 1
+
+        def log_batch():
+            if seq != expected_seq:
+                raise RuntimeError(
+                    f"batch {seq} of proxy {proxy_id} is out of order, expected "
+                    f"batch {expected_seq}"
+                )
+            records = [logger._augment_fields(record, ts) for ts, record in batch]
+            logger._log_records(records)
+
+        batch_error = _log_batch(stats, log_batch, len(batch))
+        error = error or batch_error
+    stats["proxies"] = len(next_seqs)
+    results.put(_stop_collector(logger, stats, error, start))
+
+
+# main loop of the collector process with the shm transport, which polls the
+# rings of all proxies; each read from a ring is logged as a batch
+def _run_shm_collector(logger: DataLogger, control_queue, results) -> None:
+    stats = _new_stats()
+    readers = {}
+    # values sent by a proxy before its ring was registered; both are sent over
+    # the same queue, but from different processes
+    early_values = {}
+    metric_fields = logger.logger_info["metrics_columns"]
+    format_timestamp = logger._timestamp_provider.format
+    error = None
+    stopping = False
+    start = time.perf_counter()
+
+    def handle(message):
+        nonlocal stopping
+        if message is _STOP:
+            stopping = True
+        elif message[0] == "ring":
+            reader = SharedRingReader(message[2], metric_fields)
+            for value in early_values.pop(message[1], []):
+                reader.add_value(*value)
+            readers[message[1]] = reader
+        elif message[1] in readers:
+            readers[message[1]].add_value(*message[2:])
+        else:
+            early_values.setdefault(message[1], []).append(message[2:])
+
+    while True:
+        while True:
+            try:
+                handle(control_queue.get_nowait())
+            except queue.Empty:
+                break
+        num_rows = 0
+        # rings can be registered while waiting for values
+        for reader in list(readers.values()):
+            rows = reader.read()
+            if rows is None:
+                continue
+            num_rows += len(rows)
+            # proxies send new values before any record refers to them
+            while reader.num_values < reader.values_needed(rows):
+                handle(control_queue.get())
+            columns = reader.decode(rows, format_timestamp)
+            log_batch = lambda: logger._log_filled_columns(columns)
+            batch_error = _log_batch(stats, log_batch, len(rows))
+            error = error or batch_error
+        # proxies are closed before the collector is stopped, so once it is
+        # their rings only need to be drained
+        if not num_rows:
+            if stopping:
+                break
+            time.sleep(0.0005)
+    for reader in readers.values():
+        reader.ring.close()
+    stats["proxies"] = len(readers)
+    results.put(_stop_collector(logger, stats, error, start))
+
+
+def _new_stats() -> dict:
+    return {"records": 0, "batches": 0, "rejected_records": 0, "proxies": 0}
+
+
+# logs a batch, counting it in the stats; returns the error if it was rejected
+def _log_batch(stats: dict, log_batch, num_records: int) -> str:
+    error = None
+    try:
+        log_batch()
+        stats["records"] += num_records
+    except Exception as e:
+        stats["rejected_records"] += num_records
+        error = str(e)
+    stats["batches"] += 1
+    return error
+
+
+def _stop_collector(logger: DataLogger, stats: dict, error: str, start: float):
+    try:
+        logger.close()
+    except Exception as e:
+        error = error or str(e)
+    stats["elapsed_seconds"] = time.perf_counter() - start
+    elapsed = stats["elapsed_seconds"]
+    stats["records_per_second"] = stats["records"] / elapsed if elapsed else 0.0
+    return (stats, error)
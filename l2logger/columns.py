@@ -0,0 +1,171 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+from array import array
+from itertools import repeat
+
+# array type codes for metric values, by their exact type; any other value is
+# kept as is in a list
+_ARRAY_TYPECODES = {float: "d", int: "q"}
+# positions of the standard fields in a row, in DataLogger's field order
+_BLOCK_NUM, _EXP_NUM, _WORKER_ID, _BLOCK_TYPE = 0, 1, 2, 3
+# block_subtype, task_name, task_params and exp_status are interned
+_INTERNED_START, _NUM_INTERNED = 4, 4
+_TIMESTAMP = 8
+_NUM_STANDARD_FIELDS = 9
+
+
+# returns a column holding a first value, and the type of value it can hold,
+# or None for a list
+def _new_column(value):
+    typecode = _ARRAY_TYPECODES.get(type(value))
+    if typecode is not None:
+        try:
+            return array(typecode, [value]), type(value)
+        except OverflowError:
+            pass
+    return [value], None
+
+
+class ColumnBuffer:
+    # Accumulates the validated rows of one worker/block as columns, rather
+    # than a dict per row. Exp numbers are kept in an int64 array (or a list
+    # once one doesn't fit), repeated strings (including the serialized
+    # task_params) as int32 codes into a table, and metrics in float64 or
+    # int64 arrays for as long as all their values are floats or ints
+    # respectively, which keeps them exact. The block_num, worker_id and
+    # block_type are the same for every row.
+    def __init__(self) -> None:
+        self._num_rows = 0
+        self._key_values = None
+        self._exp_nums = array("q")
+        self._codes = [array("i") for _ in range(_NUM_INTERNED)]
+        self._code_maps = [{} for _ in range(_NUM_INTERNED)]
+        self._tables = [[] for _ in range(_NUM_INTERNED)]
+        self._timestamps = []
+        # created from the first row, as arrays or lists
+        self._extra_columns = []
+        self._extra_types = []
+        self._extra_indices = None
+
+    def __len__(self) -> int:
+        return self._num_rows
+
+    # adds a row given as values in DataLogger's field order
+    def append(self, values) -> None:
+        if not self._num_rows:
+            self._start(values)
+            return
+        try:
+            self._exp_nums.append(values[_EXP_NUM])
+        except OverflowError:
+            self._exp_nums = self._exp_nums.tolist()
+            self._exp_nums.append(values[_EXP_NUM])
+        for value, codes, code_map, table in zip(
+            values[_INTERNED_START:_TIMESTAMP],
+            self._codes,
+            self._code_maps,
+            self._tables,
+        ):
+            try:
+                # strings can't be equal to the keys of other values, which
+                # are keyed with their type since e.g. True, 1 and 1.0 compare
+                # equal but are written differently
+                key = value if type(value) is str else (type(value), value)
+                code = code_map.get(key)
+                if code is None:
+                    code = code_map[key] = len(table)
+                    table.append(value)
+            except TypeError:
+                # unhashable values just get a code of their own
+                code = len(table)
+                table.append(value)
+            codes.append(code)
+        self._timestamps.append(values[_TIMESTAMP])
+        for index, value, value_type, column in zip(
+            self._extra_indices,
+            values[_NUM_STANDARD_FIELDS:],
+            self._extra_types,
+            self._extra_columns,
+        ):
+            if value_type is None:
+                column.append(value)
+            elif type(value) is value_type:
+                try:
+                    column.append(value)
+                except OverflowError:
+                    self._make_list(index, value)
+            else:
+                self._make_list(index, value)
+        self._num_rows += 1
+
+    # adds the first row, which also sets up the metric columns
+    def _start(self, values) -> None:
+        self._key_values = (values[_BLOCK_NUM], values[_WORKER_ID], values[_BLOCK_TYPE])
+        for codes, code_map, table, value in zip(
+            self._codes,
+            self._code_maps,
+            self._tables,
+            values[_INTERNED_START:_TIMESTAMP],
+        ):
+            try:
+                code_map[value if type(value) is str else (type(value), value)] = 0
+            except TypeError:
+                pass
+            table.append(value)
+            codes.append(0)
+        try:
+            self._exp_nums.append(values[_EXP_NUM])
+        except OverflowError:
+            self._exp_nums = [values[_EXP_NUM]]
+        self._timestamps.append(values[_TIMESTAMP])
+        for value in values[_NUM_STANDARD_FIELDS:]:
+            column, value_type = _new_column(value)
+            self._extra_columns.append(column)
+            self._extra_types.append(value_type)
+        self._extra_indices = range(len(self._extra_columns))
+        self._num_rows = 1
+
+    # keeps a metric column as a list from now on, for a value of another type
+    def _make_list(self, index: int, value) -> None:
+        column = self._extra_columns[index].tolist()
+        column.append(value)
+        self._extra_columns[index] = column
+        self._extra_types[index] = None
+
+    # returns an iterator over the rows, as tuples of values in DataLogger's
+    # field order
+    def rows(self):
+        block_num, worker_id, block_type = self._key_values
+        num_rows = self._num_rows
+        columns = [
+            repeat(block_num, num_rows),
+            self._exp_nums,
+            repeat(worker_id, num_rows),
+            repeat(block_type, num_rows),
+        ]
+        columns.extend(
+            map(table.__getitem__, codes)
+            for codes, table in zip(self._codes, self._tables)
+        )
+        columns.append(self._timestamps)
+        columns.extend(self._extra_columns)
+        return zip(*columns)
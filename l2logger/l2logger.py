@@ -19,62 +19,237 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR
 IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
-import csv
+import atexit
 import json
+import math
 import os
+import queue
 import re
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime
+from itertools import islice
 from typing import List
 
+from l2logger.columns import ColumnBuffer
+from l2logger.sinks import (
+    DEFAULT_FLUSH_POLICY,
+    DEFAULT_FSYNC_POLICY,
+    FlushPolicy,
+    TSVLogFile,
+    get_sink,
+)
 
-class TSVLogFile:
-    def __init__(self, log_file_name: str, fieldnames: List[str]) -> None:
-        self._log_file_name = log_file_name
-        self._initialized = False
-        # actual file handle, result of calling open
-        self._tsv_log_file = None
-        # csv DictWriter object
-        self._tsv_log = None
-        # ordered list of fieldnames
-        self._fieldnames = fieldnames
-
-    def _initialize(self) -> None:
-        if os.path.exists(self._log_file_name):
-            mode, write_header = "a", False
-        else:
-            mode, write_header = "w", True
-        self._tsv_log_file = open(self._log_file_name, mode)
-        self._tsv_log = csv.DictWriter(
-            self._tsv_log_file,
-            fieldnames=self._fieldnames,
-            delimiter="\t",
-            quotechar='"',
-            lineterminator="\n",
+
+class TimestampProvider:
+    # Produces record timestamps in the "%Y%m%dT%H%M%S.%f" format expected by
+    # readers of the log. The second-resolution prefix is only formatted once
+    # per second; each call just appends the microseconds. Subclasses can
+    # override _now to use a different clock.
+    def __init__(self) -> None:
+        # (second, prefix) are kept in one tuple so that concurrent callers
+        # never see a prefix from a different second
+        self._cached_prefix = (None, None)
+
+    def __call__(self) -> str:
+        return self.format(self._now())
+
+    def _now(self) -> float:
+        return time.time()
+
+    # formats a POSIX timestamp in local time, like datetime.fromtimestamp
+    def format(self, now: float) -> str:
+        # rounds the same way as datetime.fromtimestamp
+        frac, second = math.modf(now)
+        microsecond = round(frac * 1e6)
+        if microsecond >= 1000000:
+            second, microsecond = second + 1, microsecond - 1000000
+        elif microsecond < 0:
+            second, microsecond = second - 1, microsecond + 1000000
+        cached_second, prefix = self._cached_prefix
+        if second != cached_second:
+            prefix = datetime.fromtimestamp(second).strftime("%Y%m%dT%H%M%S.")
+            self._cached_prefix = (second, prefix)
+        return f"{prefix}{microsecond:06d}"
+
+
+class MonotonicTimestampProvider(TimestampProvider):
+    # Uses the monotonic clock anchored to the wall time at creation, so that
+    # timestamps never go backwards when the system clock is adjusted.
+    def __init__(self) -> None:
+        super().__init__()
+        self._anchor = time.time() - time.monotonic()
+
+    def _now(self) -> float:
+        return self._anchor + time.monotonic()
+
+
+# Types of task_params keys and values whose serialization can be memoized
+_CACHEABLE_PARAM_TYPES = frozenset([str, int, float, bool, type(None)])
+
+
+# snapshot of flat task_params which fully determines their serialization, or
+# None for params which can't be cached. Keys and values are snapshotted with
+# their types, since e.g. True, 1 and 1.0 compare equal but serialize
+# differently
+def get_task_params_key(task_params: dict) -> tuple:
+    keys = tuple(task_params)
+    key_types = tuple(map(type, keys))
+    values = tuple(task_params.values())
+    value_types = tuple(map(type, values))
+    if not _CACHEABLE_PARAM_TYPES.issuperset(key_types + value_types):
+        return None
+    # 0.0 and -0.0 compare equal, but serialize differently
+    if float in key_types and 0 in keys or float in value_types and 0 in values:
+        return None
+    return (keys, key_types, values, value_types)
+
+
+# whether a value is one of a set of valid values; unhashable values are never
+# valid, and are rejected the same way as any other invalid value
+def _is_one_of(value, valid_set: frozenset) -> bool:
+    try:
+        return value in valid_set
+    except TypeError:
+        return False
+
+
+class _AsyncWriter:
+    # Runs the write calls queued by DataLogger on a dedicated thread, so that
+    # formatting and file I/O happen off the caller's thread. Whenever nothing
+    # has been queued for idle_interval seconds, idle_func is called on the
+    # thread too, e.g. to flush rows which are due; after it returns False, it
+    # is only called again once something else has been queued.
+    _BACKPRESSURE_POLICIES = ["block", "drop", "grow"]
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(
+        self,
+        flush_func,
+        queue_size: int,
+        backpressure: str,
+        idle_func=None,
+        idle_interval: float = None,
+    ):
+        if not backpressure in self._BACKPRESSURE_POLICIES:
+            raise RuntimeError(
+                f"backpressure must be one of {self._BACKPRESSURE_POLICIES}"
+            )
+        if type(queue_size) is not int or queue_size <= 0:
+            raise RuntimeError("queue_size must be a positive integer")
+        self._flush_func = flush_func
+        self._idle_func = idle_func
+        self._idle_interval = idle_interval if idle_func else None
+        self._backpressure = backpressure
+        # "grow" keeps accepting records past queue_size rather than blocking
+        self._queue = queue.Queue(0 if backpressure == "grow" else queue_size)
+        self._dropped = 0
+        self._error = None
+        self._thread = threading.Thread(
+            target=self._run, name="l2logger-writer", daemon=True
         )
-        if write_header:
-            self._tsv_log.writeheader()
-        self._initialized = True
+        self._thread.start()
 
-    def __del__(self, *args) -> None:
-        self.close()
+    @property
+    def dropped(self):
+        return self._dropped
 
-    # validation handled in caller
-    def add_row(self, record: dict) -> None:
-        if not self._initialized:
-            self._initialize()
-        self._tsv_log.writerow(record)
-        self._tsv_log_file.flush()
+    @property
+    def failed(self):
+        return self._error is not None
 
-    def close(self) -> None:
-        if self._tsv_log_file and not self._tsv_log_file.closed:
-            self._tsv_log_file.close()
-            self._initialized = False
+    def check_error(self) -> None:
+        error = self._error
+        if error is not None:
+            raise RuntimeError(f"log writer thread failed: {error}") from error
+
+    # queues write_func(data) for the writer thread; data is either a single
+    # record or a batch of rows, and is what gets dropped under backpressure
+    def put(self, write_func, data) -> None:
+        if self._backpressure == "drop":
+            try:
+                self._queue.put_nowait((write_func, data))
+            except queue.Full:
+                self._dropped += 1 if type(data) is dict else len(data)
+        else:
+            self._queue.put((write_func, data))
+
+    def flush(self) -> None:
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def stop(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    # whether no write is queued; only meaningful on the writer thread
+    def is_idle(self) -> bool:
+        return self._queue.empty()
+
+    def _run(self) -> None:
+        timeout = self._idle_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                try:
+                    if self._error is None and self._idle_func():
+                        continue
+                except Exception as e:
+                    self._error = e
+                timeout = None
+                continue
+            timeout = self._idle_interval
+            try:
+                # once failed, keep draining so producers never block forever
+                if item is self._STOP:
+                    return
+                elif self._error is not None:
+                    pass
+                elif item is self._FLUSH:
+                    self._flush_func()
+                else:
+                    write_func, data = item
+                    write_func(data)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+
+class _NoLock:
+    # stands in for the validation lock when DataLogger isn't thread-safe
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_LOCK = _NoLock()
+
+
+class _ThreadBuffer:
+    # Rows validated on one thread, waiting to be handed to the writer thread.
+    # Only the owning thread appends to it; the lock is taken by flush and
+    # close on other threads when they drain it.
+    def __init__(self) -> None:
+        self.thread = threading.current_thread()
+        self.lock = threading.Lock()
+        self.rows = []
+        self.started = 0.0
 
 
 class DataLogger:
 
     _LOG_FORMAT_VERSION = "1.1"
+    _MAX_CACHED_WORKER_IDS = 4096
+    _TASK_PARAMS_CACHE_SIZE = 64
+    _COLUMNAR_CHUNK_ROWS = 1000
+    _DURABILITY_MODES = ["none", "flush", "fsync"]
 
     def __init__(
         self,
@@ -82,6 +257,21 @@ class DataLogger:
         scenario_name: str,
         logger_info: dict,
         scenario_info: dict = None,
+        flush_policy: FlushPolicy = None,
+        async_mode: bool = False,
+        queue_size: int = 10000,
+        backpressure: str = "block",
+        timestamp_provider=None,
+        sink: str = "tsv",
+        sink_options: dict = None,
+        max_open_writers: int = 16,
+        per_worker_ordering: bool = False,
+        thread_safe: bool = False,
+        thread_buffer_size: int = 256,
+        thread_buffer_ms: int = 100,
+        columnar: bool = False,
+        columnar_max_rows: int = 100000,
+        durability: str = "flush",
     ) -> None:
         self._standard_fields = [
             "block_num",
@@ -113,15 +303,40 @@ class DataLogger:
             raise RuntimeError(f"logger_info['{col_key}'] cannot be empty")
         self._logger_info[version_key] = DataLogger._LOG_FORMAT_VERSION
 
+        # the sink's name is recorded so that readers know how to read the logs
+        self._durability = durability
+        self._flush_policy = self._get_flush_policy(flush_policy, durability)
+        self._sink = get_sink(sink)(
+            self._scenario_dir,
+            self._metric_fields,
+            self._flush_policy,
+            **(sink_options or {}),
+        )
+        self._logger_info["log_sink"] = sink
+
         self._scenario_info = scenario_info or {}
         self.write_info_files()
 
-        self._tsv_logger = None
-        self._logging_dir = None
+        # any callable returning a formatted timestamp string
+        self._timestamp_provider = timestamp_provider or TimestampProvider()
+        # writers for recently used worker/blocks, least recently used first,
+        # so that interleaved workers don't reopen their files for every record
+        if type(max_open_writers) is not int or max_open_writers <= 0:
+            raise RuntimeError("max_open_writers must be a positive integer")
+        self._max_open_writers = max_open_writers
+        self._sink_writers = OrderedDict()
+        # writer for the current worker/block
+        self._sink_writer = None
+        self._block_key = None
         # state for validation
         self._all_fields_ordered = None
         self._last_exp_num = None
         self._last_block_num = None
+        # with per-worker ordering, block and exp nums only need to be
+        # non-decreasing within each worker, e.g. for records from a pool of
+        # workers which are merged by a collector
+        self._per_worker_ordering = per_worker_ordering or thread_safe
+        self._worker_last_nums = {}
         self._default_block_subtype = "wake"
         self._default_exp_status = "complete"
         self._default_worker_id = "worker-default"
@@ -129,6 +344,71 @@ class DataLogger:
         self._block_subtypes = ["wake", "sleep"]
         self._exp_statuses = ["complete", "incomplete"]
         self._worker_pattern = re.compile(r"[0-9a-zA-Z_\-.]+")
+        # state for the compiled validator, set up from the first record
+        self._record_keys = None
+        self._field_set = None
+        self._block_type_set = frozenset(self._block_types)
+        self._block_subtype_set = frozenset(self._block_subtypes)
+        self._exp_status_set = frozenset(self._exp_statuses)
+        self._valid_worker_ids = set()
+        # memoized serialization of task_params
+        self._task_params_cache = OrderedDict()
+        self._last_task_params_key = None
+        self._last_task_params = None
+
+        # in columnar mode, validated rows are accumulated as columns for each
+        # worker/block, and only handed to the sink when the worker moves to
+        # another block, once columnar_max_rows are buffered, or on flush
+        self._column_buffers = None
+        if columnar:
+            if type(columnar_max_rows) is not int or columnar_max_rows <= 0:
+                raise RuntimeError("columnar_max_rows must be a positive integer")
+            self._column_buffers = {}
+            self._columnar_max_rows = columnar_max_rows
+            self._buffered_rows = 0
+            # block key of each worker's buffer
+            self._worker_buffer_keys = {}
+
+        # in thread-safe mode, records are validated under a lock and staged
+        # in a buffer per thread; full buffers are handed to a single writer
+        # thread, so no thread waits on file I/O while holding the lock
+        self._lock = _NO_LOCK
+        self._thread_buffers = None
+        if thread_safe:
+            if type(thread_buffer_size) is not int or thread_buffer_size <= 0:
+                raise RuntimeError("thread_buffer_size must be a positive integer")
+            if type(thread_buffer_ms) is not int or thread_buffer_ms < 0:
+                raise RuntimeError("thread_buffer_ms must be a non-negative integer")
+            self._lock = threading.Lock()
+            self._thread_buffers = []
+            self._thread_buffer_size = thread_buffer_size
+            self._thread_buffer_interval = thread_buffer_ms / 1000
+            self._thread_local = threading.local()
+
+        # in async or thread-safe mode, records are written by a background
+        # thread
+        self._writer = None
+        if async_mode or thread_safe:
+            # rows are flushed once due by the flush policy's interval, and
+            # staged rows handed off once stale, even when no more records are
+            # logged
+            self._flush_interval = self._flush_policy.max_interval_ms
+            if self._flush_interval is not None:
+                self._flush_interval /= 1000
+            idle_interval = self._flush_interval
+            if thread_safe and self._thread_buffer_interval:
+                idle_interval = min(
+                    self._thread_buffer_interval,
+                    idle_interval or self._thread_buffer_interval,
+                )
+            self._writer = _AsyncWriter(
+                self._flush_files,
+                queue_size,
+                backpressure,
+                self._on_writer_idle,
+                idle_interval,
+            )
+            atexit.register(self.close)
 
     @property
     def logging_base_dir(self):
@@ -146,6 +426,43 @@ class DataLogger:
     def scenario_info(self):
         return self._scenario_info
 
+    @property
+    def flush_policy(self):
+        return self._flush_policy
+
+    @property
+    def durability(self):
+        return self._durability
+
+    @property
+    def sink(self):
+        return self._sink
+
+    @property
+    def dropped_records(self):
+        # number of records discarded by the "drop" backpressure policy
+        return self._writer.dropped if self._writer else 0
+
+    # "none" never flushes until close, "flush" flushes as the flush policy
+    # says, and "fsync" also syncs the rows to disk on each of those flushes
+    def _get_flush_policy(self, flush_policy: FlushPolicy, durability: str):
+        if not durability in self._DURABILITY_MODES:
+            raise RuntimeError(f"durability must be one of {self._DURABILITY_MODES}")
+        if durability == "none":
+            if flush_policy is not None:
+                raise RuntimeError("flush_policy cannot be used with durability 'none'")
+            return FlushPolicy()
+        elif durability == "fsync":
+            if flush_policy is None:
+                return DEFAULT_FSYNC_POLICY
+            return FlushPolicy(
+                flush_policy.max_rows,
+                flush_policy.max_interval_ms,
+                flush_policy.max_bytes,
+                fsync=True,
+            )
+        return flush_policy or DEFAULT_FLUSH_POLICY
+
     def write_info_files(self) -> None:
         os.makedirs(self._scenario_dir, exist_ok=True)
         logger_info_path = os.path.join(self._scenario_dir, "logger_info.json")
@@ -156,37 +473,442 @@ class DataLogger:
             scenario_file.write(json.dumps(self._scenario_info, indent=2))
 
     def log_record(self, record_in: dict) -> None:
+        if self._writer:
+            self._writer.check_error()
+        with self._lock:
+            record = self._prepare_record(record_in)
+        if self._thread_buffers is not None:
+            self._stage_rows([record])
+        elif self._writer:
+            self._writer.put(self._write_record, record)
+        else:
+            self._write_record(record)
+
+    # validates a record, returning the row to write
+    def _prepare_record(self, record_in: dict) -> dict:
         record = self._augment_fields(record_in)
-        self._validate_record(record)
+        if self._per_worker_ordering:
+            self._load_worker_state(record["worker_id"])
+        task_params = self._validate_record(record)
         self._update_state(record)
 
-        record["task_params"] = json.dumps(record["task_params"])
-        self._tsv_logger.add_row(record)
+        record["task_params"] = task_params
+        return record
+
+    # logs a batch of records, which is validated as a whole before any of it
+    # is written. If a batch timestamp is given, it is used for every record
+    def log_records(self, records_in: List[dict], timestamp: datetime = None) -> None:
+        if self._writer:
+            self._writer.check_error()
+        if not type(records_in) is list:
+            raise RuntimeError("records must be list of dicts")
+        if not records_in:
+            return
+        batch_timestamp = self._format_batch_timestamp(timestamp)
+        records = [
+            self._augment_fields(record, batch_timestamp) for record in records_in
+        ]
+        self._log_records(records)
+
+    # logs a batch of records which have already been augmented
+    def _log_records(self, records: List[dict]) -> None:
+        with self._lock:
+            self._prepare_rows(self._get_batch_columns(records), records)
+        self._put_rows(records)
+
+    # checks the fields of a batch of records, returning it as columns
+    def _get_batch_columns(self, records: List[dict]) -> dict:
+        self._validate_fields(records[0])
+        # the rest of the batch must have the same fields as the first record
+        fields = set(records[0].keys())
+        for record in records:
+            if set(record.keys()) != fields:
+                raise RuntimeError(
+                    f"record field mismatch: expected {fields}, got "
+                    f"{set(record.keys())}"
+                )
+        return {field: [record[field] for record in records] for field in fields}
+
+    # logs a batch of records given as columns, i.e. a dict mapping each field
+    # to a list of values or a pandas DataFrame
+    def log_columns(self, columns_in, timestamp: datetime = None) -> None:
+        if self._writer:
+            self._writer.check_error()
+        if hasattr(columns_in, "columns") and hasattr(columns_in, "to_dict"):
+            columns = {name: columns_in[name].tolist() for name in columns_in.columns}
+        elif type(columns_in) is dict:
+            columns = {
+                name: values.tolist() if hasattr(values, "tolist") else list(values)
+                for name, values in columns_in.items()
+            }
+        else:
+            raise RuntimeError("columns must be dict of lists or DataFrame")
+        lengths = set(len(values) for values in columns.values())
+        if len(lengths) > 1:
+            raise RuntimeError("columns must all have the same length")
+        num_rows = lengths.pop() if lengths else 0
+        if not num_rows:
+            return
+        if "timestamp" in columns:
+            raise RuntimeError("timestamp column cannot be overwritten")
+        batch_timestamp = self._format_batch_timestamp(timestamp)
+        if batch_timestamp is None:
+            get_timestamp = self._timestamp_provider
+            columns["timestamp"] = [get_timestamp() for _ in range(num_rows)]
+        else:
+            columns["timestamp"] = [batch_timestamp] * num_rows
+        for field, default in (
+            ("block_subtype", self._default_block_subtype),
+            ("exp_status", self._default_exp_status),
+            ("worker_id", self._default_worker_id),
+        ):
+            if not field in columns:
+                columns[field] = [default] * num_rows
+        self._log_filled_columns(columns)
+
+    # logs a batch of columns which already have every field filled in
+    def _log_filled_columns(self, columns: dict) -> None:
+        fields = list(columns.keys())
+        records = [dict(zip(fields, row)) for row in zip(*[columns[f] for f in fields])]
+        with self._lock:
+            self._validate_fields(columns)
+            self._prepare_rows(columns, records)
+        self._put_rows(records)
+
+    # passes validated rows on to be written
+    def _put_rows(self, rows: List[dict]) -> None:
+        if self._thread_buffers is not None:
+            self._stage_rows(rows)
+        elif self._writer:
+            self._writer.put(self._write_rows, rows)
+        else:
+            self._write_rows(rows)
+
+    # adds validated rows to the calling thread's buffer, handing it to the
+    # writer thread once it is full or its oldest row has waited long enough
+    def _stage_rows(self, rows: List[dict]) -> None:
+        buffer = getattr(self._thread_local, "buffer", None)
+        if buffer is None:
+            buffer = self._thread_local.buffer = _ThreadBuffer()
+            with self._lock:
+                self._thread_buffers.append(buffer)
+        with buffer.lock:
+            now = time.monotonic()
+            if not buffer.rows:
+                buffer.started = now
+            buffer.rows.extend(rows)
+            if (
+                len(buffer.rows) >= self._thread_buffer_size
+                or now - buffer.started >= self._thread_buffer_interval
+            ):
+                self._put_buffer(buffer)
+
+    # must be called with the buffer's lock held, which keeps each thread's
+    # rows in order on the writer's queue
+    def _put_buffer(self, buffer: _ThreadBuffer) -> None:
+        rows, buffer.rows = buffer.rows, []
+        self._writer.put(self._write_rows, rows)
+
+    # runs on the writer thread once nothing has been queued for a while;
+    # returns whether to keep checking while no more is queued
+    def _on_writer_idle(self) -> bool:
+        keep_checking = False
+        if self._thread_buffers is not None and self._thread_buffer_interval:
+            self._write_stale_buffers()
+            # threads may stage rows without queueing anything
+            keep_checking = True
+        if self._flush_interval is not None:
+            self._flush_files()
+        return keep_checking
+
+    # writes the buffered rows of threads which have stopped logging once they
+    # are stale, as the threads would when logging again. Rows are only taken
+    # while no write is queued, since one queued by the same thread must be
+    # written first, and busy buffers are skipped, since their thread may be
+    # waiting on the queue
+    def _write_stale_buffers(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            buffers = list(self._thread_buffers)
+        for buffer in buffers:
+            if not buffer.lock.acquire(blocking=False):
+                continue
+            try:
+                if (
+                    buffer.rows
+                    and now - buffer.started >= self._thread_buffer_interval
+                    and self._writer.is_idle()
+                ):
+                    rows, buffer.rows = buffer.rows, []
+                    self._write_rows(rows)
+            finally:
+                buffer.lock.release()
+
+    # hands every thread's buffered rows to the writer thread, and forgets the
+    # buffers of threads which have finished
+    def _drain_thread_buffers(self) -> None:
+        with self._lock:
+            buffers = list(self._thread_buffers)
+        for buffer in buffers:
+            with buffer.lock:
+                if buffer.rows:
+                    self._put_buffer(buffer)
+        with self._lock:
+            self._thread_buffers[:] = [
+                buffer
+                for buffer in self._thread_buffers
+                if buffer.rows or buffer.thread.is_alive()
+            ]
+
+    # validates a batch given both as columns and as records, which become the
+    # rows to write
+    def _prepare_rows(self, columns: dict, records: List[dict]) -> None:
+        task_params = self._validate_columns(columns)
+        for record, params in zip(records, task_params):
+            record["task_params"] = params
+        if self._per_worker_ordering:
+            for record in records:
+                self._update_state(record)
+        else:
+            self._update_state(records[-1])
+
+    # returns a recorder for logging the records of one worker as positional
+    # values, which skips building, copying and mapping back a dict for each
+    # record. The values after task_params are for the given fields, which
+    # default to the metrics columns in order
+    def bind_schema(
+        self,
+        worker_id: str = None,
+        block_subtype: str = None,
+        exp_status: str = None,
+        fields: List[str] = None,
+    ) -> "SchemaRecorder":
+        return SchemaRecorder(self, worker_id, block_subtype, exp_status, fields)
+
+    def flush(self) -> None:
+        if self._thread_buffers is not None:
+            self._drain_thread_buffers()
+        if self._writer:
+            self._writer.flush()
+            self._writer.check_error()
+        else:
+            self._flush_files()
 
     def close(self) -> None:
-        if self._tsv_logger:
-            self._tsv_logger.close()
+        if self._thread_buffers is not None:
+            self._drain_thread_buffers()
+        if self._writer:
+            atexit.unregister(self.close)
+            self._writer.stop()
+        # buffered rows are dropped if the writer thread failed
+        if self._column_buffers and not (self._writer and self._writer.failed):
+            self._write_column_buffers()
+        for sink_writer in self._sink_writers.values():
+            sink_writer.close()
+        self._sink_writers.clear()
+        self._sink_writer = None
+        self._block_key = None
+        self._sink.close()
+        if self._writer:
+            self._writer.check_error()
+
+    # writes a validated record, whose task_params are already serialized;
+    # runs on the writer thread in async mode
+    def _write_record(self, record: dict) -> None:
+        if self._column_buffers is not None:
+            self._buffer_values([record[field] for field in self._all_fields_ordered])
+            return
+        self._update_logging_dir(record)
+        self._sink_writer.add_row(record)
+
+    # same as _write_record for a row given as values in fieldnames order,
+    # e.g. by a SchemaRecorder
+    def _write_values(self, values: list) -> None:
+        if self._column_buffers is not None:
+            self._buffer_values(values)
+            return
+        block_key = (values[2], values[0], values[3])
+        if block_key != self._block_key:
+            self._select_writer(block_key)
+        sink_writer = self._sink_writer
+        if hasattr(sink_writer, "add_values"):
+            sink_writer.add_values(values)
+        else:
+            sink_writer.add_row(dict(zip(self._all_fields_ordered, values)))
+
+    # same as _write_record for a batch of rows, with a single write call per
+    # worker/block
+    def _write_rows(self, rows: List[dict]) -> None:
+        if self._column_buffers is not None:
+            fields = self._all_fields_ordered
+            for row in rows:
+                self._buffer_values([row[field] for field in fields])
+            return
+        groups = {}
+        for row in rows:
+            key = (row["worker_id"], row["block_num"], row["block_type"])
+            groups.setdefault(key, []).append(row)
+        for group in groups.values():
+            self._update_logging_dir(group[0])
+            self._sink_writer.add_rows(group)
+
+    # adds a row given as values in fieldnames order to its worker/block's
+    # column buffer
+    def _buffer_values(self, values: list) -> None:
+        block_key = (values[2], values[0], values[3])
+        column_buffer = self._column_buffers.get(block_key)
+        if column_buffer is None:
+            # the worker has moved on from the block of its last buffer
+            last_key = self._worker_buffer_keys.get(values[2])
+            if last_key in self._column_buffers:
+                self._write_column_buffer(last_key)
+            column_buffer = ColumnBuffer()
+            self._column_buffers[block_key] = column_buffer
+            self._worker_buffer_keys[values[2]] = block_key
+        column_buffer.append(values)
+        self._buffered_rows += 1
+        if self._buffered_rows >= self._columnar_max_rows:
+            self._write_column_buffers()
+
+    def _write_column_buffers(self) -> None:
+        for block_key in list(self._column_buffers):
+            self._write_column_buffer(block_key)
 
-    # ensure all record fields are valid
-    def _validate_record(self, record: dict) -> None:
+    # hands the rows of a worker/block's column buffer to its sink writer
+    def _write_column_buffer(self, block_key: tuple) -> None:
+        column_buffer = self._column_buffers.pop(block_key)
+        self._buffered_rows -= len(column_buffer)
+        if block_key != self._block_key:
+            self._select_writer(block_key)
+        sink_writer = self._sink_writer
+        rows = column_buffer.rows()
+        while True:
+            chunk = list(islice(rows, self._COLUMNAR_CHUNK_ROWS))
+            if not chunk:
+                break
+            if hasattr(sink_writer, "add_value_rows"):
+                sink_writer.add_value_rows(chunk)
+            else:
+                fields = self._all_fields_ordered
+                sink_writer.add_rows([dict(zip(fields, row)) for row in chunk])
+
+    def _flush_files(self) -> None:
+        if self._column_buffers:
+            self._write_column_buffers()
+        for sink_writer in self._sink_writers.values():
+            sink_writer.flush()
+        self._sink.flush()
+
+    # ensure all record fields are valid; returns the serialized task_params
+    def _validate_record(self, record: dict) -> str:
+        if self._record_keys is None:
+            return self._validate_record_generic(record)
+        else:
+            return self._validate_record_compiled(record)
+
+    def _validate_record_generic(self, record: dict) -> str:
         self._validate_fields(record)
         self._validate_block_type(record["block_type"])
         self._validate_block_subtype(record["block_subtype"])
         self._validate_exp_status(record["exp_status"])
         self._validate_worker_id(record["worker_id"])
-        self._validate_task_params(record["task_params"])
+        task_params = self._validate_task_params(record["task_params"])
         self._validate_block_num(record["block_num"])
         self._validate_exp_num(record["exp_num"])
+        return task_params
+
+    # fast path used once the schema is known from the first record; checks
+    # the same things in the same order as _validate_record_generic
+    def _validate_record_compiled(self, record: dict) -> str:
+        if tuple(record) != self._record_keys and set(record) != self._field_set:
+            # raises the same error as the generic validator
+            self._validate_fields(record)
+        if not _is_one_of(record["block_type"], self._block_type_set):
+            raise RuntimeError(f"block_type must be one of {self._block_types}")
+        if not _is_one_of(record["block_subtype"], self._block_subtype_set):
+            raise RuntimeError(f"block_subtype must be one of {self._block_subtypes}")
+        if not _is_one_of(record["exp_status"], self._exp_status_set):
+            raise RuntimeError(f"exp_status must be one of {self._exp_statuses}")
+        self._check_worker_id(record["worker_id"])
+        task_params = self._validate_task_params(record["task_params"])
+        block_num = record["block_num"]
+        if (not type(block_num) is int) or block_num < 0:
+            raise RuntimeError(f"block_num must be non-negative integer")
+        elif (not self._last_block_num is None) and block_num < self._last_block_num:
+            raise RuntimeError("block_num must be non-decreasing")
+        exp_num = record["exp_num"]
+        if (not type(exp_num) is int) or exp_num < 0:
+            raise RuntimeError(f"exp_num must be non-negative integer")
+        elif (not self._last_exp_num is None) and exp_num < self._last_exp_num:
+            raise RuntimeError("exp_num must be non-decreasing")
+        return task_params
+
+    # validates a worker id, remembering the ones which have already passed
+    def _check_worker_id(self, worker_id: str) -> None:
+        if not worker_id in self._valid_worker_ids:
+            self._validate_worker_id(worker_id)
+            if len(self._valid_worker_ids) >= self._MAX_CACHED_WORKER_IDS:
+                self._valid_worker_ids.clear()
+            self._valid_worker_ids.add(worker_id)
+
+    # checks a batch of records given as columns in a single pass over each
+    # column, raising the same errors as _validate_record; returns the
+    # serialized task_params
+    def _validate_columns(self, columns: dict) -> List[str]:
+        for field, valid_values, valid_set in (
+            ("block_type", self._block_types, self._block_type_set),
+            ("block_subtype", self._block_subtypes, self._block_subtype_set),
+            ("exp_status", self._exp_statuses, self._exp_status_set),
+        ):
+            try:
+                valid = valid_set.issuperset(columns[field])
+            except TypeError:
+                # unhashable values are never valid
+                valid = False
+            if not valid:
+                raise RuntimeError(f"{field} must be one of {valid_values}")
+        for worker_id in set(columns["worker_id"]):
+            self._check_worker_id(worker_id)
+        task_params = [
+            self._validate_task_params(params) for params in columns["task_params"]
+        ]
+        if self._per_worker_ordering:
+            worker_nums = {}
+            for worker_id, block_num, exp_num in zip(
+                columns["worker_id"], columns["block_num"], columns["exp_num"]
+            ):
+                worker_nums.setdefault(worker_id, []).append((block_num, exp_num))
+            for worker_id, nums in worker_nums.items():
+                last_nums = self._worker_last_nums.get(worker_id, (None, None))
+                self._validate_nums(nums, *last_nums)
+        else:
+            nums = zip(columns["block_num"], columns["exp_num"])
+            self._validate_nums(nums, self._last_block_num, self._last_exp_num)
+        return task_params
+
+    # checks that (block_num, exp_num) pairs are non-decreasing, starting from
+    # the given last values
+    def _validate_nums(self, nums, last_block_num: int, last_exp_num: int) -> None:
+        for block_num, exp_num in nums:
+            if (not type(block_num) is int) or block_num < 0:
+                raise RuntimeError(f"block_num must be non-negative integer")
+            elif (not last_block_num is None) and block_num < last_block_num:
+                raise RuntimeError("block_num must be non-decreasing")
+            if (not type(exp_num) is int) or exp_num < 0:
+                raise RuntimeError(f"exp_num must be non-negative integer")
+            elif (not last_exp_num is None) and exp_num < last_exp_num:
+                raise RuntimeError("exp_num must be non-decreasing")
+            last_block_num, last_exp_num = block_num, exp_num
 
     # adds any automated fields to record (i.e. timestamp)
-    def _augment_fields(self, record: dict) -> dict:
+    def _augment_fields(self, record: dict, timestamp: str = None) -> dict:
         if not type(record) is dict:
             raise RuntimeError("record must be dict")
         new_record = record.copy()
         if "timestamp" in new_record:
             raise RuntimeError("timestamp column cannot be overwritten")
         else:
-            new_record["timestamp"] = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+            new_record["timestamp"] = timestamp or self._timestamp_provider()
         if not "block_subtype" in new_record:
             new_record["block_subtype"] = self._default_block_subtype
         if not "exp_status" in new_record:
@@ -195,24 +917,49 @@ class DataLogger:
             new_record["worker_id"] = self._default_worker_id
         return new_record
 
+    def _format_batch_timestamp(self, timestamp: datetime) -> str:
+        if timestamp is None:
+            return None
+        if not type(timestamp) is datetime:
+            raise RuntimeError("timestamp must be datetime")
+        return timestamp.strftime("%Y%m%dT%H%M%S.%f")
+
     def _update_state(self, record: dict) -> None:
         if not self._all_fields_ordered:
             self._init_fields(record)
         self._last_block_num = record["block_num"]
         self._last_exp_num = record["exp_num"]
+        if self._per_worker_ordering:
+            self._worker_last_nums[record["worker_id"]] = (
+                self._last_block_num,
+                self._last_exp_num,
+            )
 
-        old_logging_dir = self._logging_dir
-        self._logging_dir = os.path.join(
-            self._scenario_dir,
-            record["worker_id"],
-            f'{str(record["block_num"])}-{record["block_type"]}',
-        )
-        if old_logging_dir != self._logging_dir:
-            os.makedirs(self._logging_dir, exist_ok=True)
-            if self._tsv_logger:
-                self._tsv_logger.close()
-            log_file_name = os.path.join(self._logging_dir, "data-log.tsv")
-            self._tsv_logger = TSVLogFile(log_file_name, self._all_fields_ordered)
+    # loads the last block and exp nums of a worker for validating its next
+    # record; a new worker starts from zero, which any valid record passes
+    def _load_worker_state(self, worker_id: str) -> None:
+        last_nums = None
+        if type(worker_id) is str:
+            last_nums = self._worker_last_nums.get(worker_id)
+        self._last_block_num, self._last_exp_num = last_nums or (0, 0)
+
+    def _update_logging_dir(self, record: dict) -> None:
+        block_key = (record["worker_id"], record["block_num"], record["block_type"])
+        if block_key != self._block_key:
+            self._select_writer(block_key)
+
+    # makes the writer for a (worker_id, block_num, block_type) key current
+    def _select_writer(self, block_key: tuple) -> None:
+        self._block_key = block_key
+        self._sink_writer = self._sink_writers.get(block_key)
+        if self._sink_writer:
+            self._sink_writers.move_to_end(block_key)
+            return
+        if len(self._sink_writers) >= self._max_open_writers:
+            _, sink_writer = self._sink_writers.popitem(last=False)
+            sink_writer.close()
+        self._sink_writer = self._sink.open(*block_key)
+        self._sink_writers[block_key] = self._sink_writer
 
     def _init_fields(self, record: dict) -> None:
         standard_set = set(self._standard_fields)
@@ -221,6 +968,10 @@ class DataLogger:
         extra_fields.sort()
         self._all_fields_ordered = self._standard_fields.copy()
         self._all_fields_ordered.extend(extra_fields)
+        self._sink.set_fieldnames(self._all_fields_ordered)
+        # compile the schema for _validate_record_compiled
+        self._record_keys = tuple(record)
+        self._field_set = frozenset(self._all_fields_ordered)
 
     def _validate_fields(self, record: dict) -> None:
         if not self._all_fields_ordered:
@@ -274,13 +1025,33 @@ class DataLogger:
                 f"worker_id can only contain alphanumeric characters, hyphens, dashes, or periods"
             )
 
-    def _validate_task_params(self, task_params: dict) -> None:
+    # returns the serialized task_params, reusing the result for params equal
+    # to recently seen ones
+    def _validate_task_params(self, task_params: dict) -> str:
         if type(task_params) is not dict:
             raise RuntimeError("task_params must be dict")
-        try:
-            json.dumps(task_params)
-        except:
-            raise RuntimeError("task_params must be valid json")
+        key = get_task_params_key(task_params)
+        if key is None:
+            serialized = None
+        elif key == self._last_task_params_key:
+            # within a regime, the params are usually the very same dict, in
+            # which case this only compares identical objects
+            return self._last_task_params
+        else:
+            serialized = self._task_params_cache.get(key)
+        if serialized is None:
+            try:
+                serialized = json.dumps(task_params)
+            except:
+                raise RuntimeError("task_params must be valid json")
+        if key is not None:
+            self._task_params_cache[key] = serialized
+            self._task_params_cache.move_to_end(key)
+            if len(self._task_params_cache) > self._TASK_PARAMS_CACHE_SIZE:
+                self._task_params_cache.popitem(last=False)
+            self._last_task_params_key = key
+            self._last_task_params = serialized
+        return serialized
 
     def _get_log_foldername(
         self, path: str, format_str: str = "{scenario}-{timestamp}"
@@ -289,3 +1060,143 @@ class DataLogger:
         # int(round(time.time() * 1000))
         timestamp = re.sub("[.]", "-", str(time.time()))
         return format_str.format(scenario=scenario_name, timestamp=timestamp)
+
+
+class SchemaRecorder:
+    # Logs the records of one worker for a DataLogger given as positional
+    # values, returned by DataLogger.bind_schema. The worker_id, block_subtype
+    # and exp_status are fixed, and validated once when binding; each record
+    # is checked the same way as by log_record otherwise. Rows are written in
+    # the order of the log's fields without going through a dict, except in
+    # async or thread-safe mode where they are queued as dicts.
+    __slots__ = (
+        "_logger",
+        "_worker_id",
+        "_block_subtype",
+        "_exp_status",
+        "_fields",
+        "_num_values",
+        "_value_order",
+        "_block_type_set",
+        "_timestamp_provider",
+    )
+
+    def __init__(
+        self,
+        logger: DataLogger,
+        worker_id: str = None,
+        block_subtype: str = None,
+        exp_status: str = None,
+        fields: List[str] = None,
+    ) -> None:
+        self._logger = logger
+        self._worker_id = worker_id or logger._default_worker_id
+        self._block_subtype = block_subtype or logger._default_block_subtype
+        self._exp_status = exp_status or logger._default_exp_status
+        if type(self._worker_id) is not str:
+            raise RuntimeError("worker_id must be a string")
+        logger._validate_worker_id(self._worker_id)
+        logger._validate_block_subtype(self._block_subtype)
+        logger._validate_exp_status(self._exp_status)
+
+        fields = list(logger._metric_fields if fields is None else fields)
+        if any(type(field) is not str for field in fields):
+            raise RuntimeError("fields must be a list of strings")
+        if len(set(fields)) != len(fields):
+            raise RuntimeError("fields cannot contain duplicates")
+        if set(fields) & set(logger._standard_fields):
+            raise RuntimeError("fields cannot contain standard record fields")
+        if not set(fields).issuperset(logger._metric_fields):
+            raise RuntimeError(
+                f"fields missing metric columns: expected at least "
+                f"{set(logger._metric_fields)}, got {set(fields)}"
+            )
+        with logger._lock:
+            # binding fixes the log's fields if no record has been logged yet
+            if not logger._all_fields_ordered:
+                logger._init_fields(dict.fromkeys(logger._standard_fields + fields))
+            extra_fields = logger._all_fields_ordered[len(logger._standard_fields) :]
+        if set(extra_fields) != set(fields):
+            raise RuntimeError(
+                f"record field mismatch: expected "
+                f"{set(logger._all_fields_ordered)}, got "
+                f"{set(logger._standard_fields + fields)}"
+            )
+        self._fields = fields
+        self._num_values = len(fields)
+        # positions of the values in the order of the log's fields, or None if
+        # they are in that order already
+        value_order = [fields.index(field) for field in extra_fields]
+        if value_order == list(range(len(fields))):
+            value_order = None
+        self._value_order = value_order
+        self._block_type_set = logger._block_type_set
+        self._timestamp_provider = logger._timestamp_provider
+
+    @property
+    def worker_id(self):
+        return self._worker_id
+
+    @property
+    def fields(self):
+        return self._fields
+
+    def record(
+        self,
+        block_num: int,
+        exp_num: int,
+        block_type: str,
+        task_name: str,
+        task_params: dict,
+        *values,
+    ) -> None:
+        logger = self._logger
+        if logger._writer:
+            logger._writer.check_error()
+        if len(values) != self._num_values:
+            raise RuntimeError(
+                f"expected {self._num_values} values for {self._fields}, got "
+                f"{len(values)}"
+            )
+        if self._value_order is not None:
+            values = [values[i] for i in self._value_order]
+        with logger._lock:
+            if not _is_one_of(block_type, self._block_type_set):
+                raise RuntimeError(f"block_type must be one of {logger._block_types}")
+            serialized = logger._validate_task_params(task_params)
+            if logger._per_worker_ordering:
+                last_block_num, last_exp_num = logger._worker_last_nums.get(
+                    self._worker_id, (0, 0)
+                )
+            else:
+                last_block_num = logger._last_block_num or 0
+                last_exp_num = logger._last_exp_num or 0
+            # same checks as _validate_nums
+            if (not type(block_num) is int) or block_num < 0:
+                raise RuntimeError(f"block_num must be non-negative integer")
+            elif block_num < last_block_num:
+                raise RuntimeError("block_num must be non-decreasing")
+            if (not type(exp_num) is int) or exp_num < 0:
+                raise RuntimeError(f"exp_num must be non-negative integer")
+            elif exp_num < last_exp_num:
+                raise RuntimeError("exp_num must be non-decreasing")
+            if logger._per_worker_ordering:
+                logger._worker_last_nums[self._worker_id] = (block_num, exp_num)
+            logger._last_block_num = block_num
+            logger._last_exp_num = exp_num
+            row = [
+                block_num,
+                exp_num,
+                self._worker_id,
+                block_type,
+                self._block_subtype,
+                task_name,
+                serialized,
+                self._exp_status,
+                self._timestamp_provider(),
+            ]
+        row.extend(values)
+        if logger._writer is None:
+            logger._write_values(row)
+        else:
+            logger._put_rows([dict(zip(logger._all_fields_ordered, row))])
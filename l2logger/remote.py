@@ -0,0 +1,436 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+import logging
+import os
+import select
+import socket
+import socketserver
+import struct
+import threading
+import time
+import uuid
+from collections import deque
+from typing import List
+
+from l2logger.l2logger import DataLogger, TimestampProvider
+
+logger = logging.getLogger("l2logger.remote")
+
+# Frames are a 4-byte big-endian length followed by a JSON message. A client
+# starts with a hello, to which the server replies with the last batch it has
+# logged for that client; each records batch is then acknowledged in order
+_HEADER = struct.Struct(">I")
+_MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+def _encode_frame(message: str) -> bytes:
+    body = message.encode("utf-8")
+    return _HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            if data:
+                raise ConnectionError("connection closed in the middle of a frame")
+            return None
+        data.extend(chunk)
+    return bytes(data)
+
+
+# returns the next message, or None once the connection is closed
+def _recv_message(sock: socket.socket) -> dict:
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > _MAX_FRAME_SIZE:
+        raise ConnectionError(f"frame of {size} bytes is too large")
+    body = _recv_exactly(sock, size)
+    if body is None:
+        raise ConnectionError("connection closed in the middle of a frame")
+    return json.loads(body)
+
+
+def _create_socket(address) -> socket.socket:
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+# Client mirroring the log_record API of DataLogger, which sends records in
+# batches to an l2logger server. Batches are kept in memory (the spill buffer)
+# until the server acknowledges them, and are sent again after reconnecting;
+# the server skips batches it has already logged for the same client_id
+class RemoteDataLogger:
+    def __init__(
+        self,
+        address,
+        client_id: str = None,
+        batch_size: int = 100,
+        max_spill_records: int = 100000,
+        timeout: float = 10.0,
+        reconnect_interval: float = 1.0,
+        timestamp_provider=None,
+    ) -> None:
+        if type(batch_size) is not int or batch_size <= 0:
+            raise RuntimeError("batch_size must be a positive integer")
+        if type(max_spill_records) is not int or max_spill_records < batch_size:
+            raise RuntimeError(
+                "max_spill_records must be an integer of at least batch_size"
+            )
+        self._address = address
+        self._client_id = client_id or (
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        )
+        self._batch_size = batch_size
+        self._max_spill_records = max_spill_records
+        self._timeout = timeout
+        self._reconnect_interval = reconnect_interval
+        self._timestamp_provider = timestamp_provider or TimestampProvider()
+        # encoded records of the current batch
+        self._batch = []
+        # batches sent but not acknowledged yet, as (seq, num_records, frame)
+        self._pending = deque()
+        self._pending_records = 0
+        self._next_seq = 0
+        self._sock = None
+        self._last_connect = None
+        self._error = None
+        self._rejected_records = 0
+        self._connect()
+
+    @property
+    def address(self):
+        return self._address
+
+    @property
+    def client_id(self):
+        return self._client_id
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    # number of records logged but not yet acknowledged by the server
+    @property
+    def spilled_records(self):
+        return self._pending_records + len(self._batch)
+
+    @property
+    def rejected_records(self):
+        return self._rejected_records
+
+    # records are timestamped and serialized when they are logged; the server
+    # validates them
+    def log_record(self, record: dict) -> None:
+        self._check_error()
+        if not type(record) is dict:
+            raise RuntimeError("record must be dict")
+        if "timestamp" in record:
+            raise RuntimeError("timestamp column cannot be overwritten")
+        try:
+            encoded = json.dumps(record)
+        except (TypeError, ValueError):
+            raise RuntimeError("record must be JSON serializable")
+        self._batch.append(f'["{self._timestamp_provider()}",{encoded}]')
+        if len(self._batch) >= self._batch_size:
+            self._send_batch()
+
+    def log_records(self, records: List[dict]) -> None:
+        if not type(records) is list:
+            raise RuntimeError("records must be list of dicts")
+        for record in records:
+            self.log_record(record)
+
+    # sends the current batch, and waits until the server has acknowledged
+    # every batch, reconnecting if needed
+    def flush(self) -> None:
+        self._send_batch()
+        deadline = time.monotonic() + self._timeout
+        while self._pending:
+            if self._sock is None:
+                if time.monotonic() >= deadline:
+                    raise RuntimeError(
+                        f"could not reach log server at {self._address}, "
+                        f"{self._pending_records} records are not logged"
+                    )
+                time.sleep(min(self._reconnect_interval, 0.1))
+                self._connect()
+            else:
+                self._read_acks(block=True)
+        self._check_error()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._disconnect()
+
+    def _check_error(self) -> None:
+        if self._error:
+            raise RuntimeError(f"log server rejected records: {self._error}")
+
+    def _send_batch(self) -> None:
+        if not self._batch:
+            return
+        seq = self._next_seq
+        self._next_seq += 1
+        frame = _encode_frame(
+            f'{{"type":"records","seq":{seq},"records":[{",".join(self._batch)}]}}'
+        )
+        self._pending.append((seq, len(self._batch), frame))
+        self._pending_records += len(self._batch)
+        self._batch = []
+        if self._sock is None:
+            self._connect()
+        elif self._send(frame):
+            self._read_acks(block=False)
+        # waits for the server while the spill buffer is full
+        while self._pending_records > self._max_spill_records:
+            if self._sock is None:
+                self._connect(force=True)
+                if self._sock is None:
+                    raise RuntimeError(
+                        f"spill buffer full: could not reach log server at "
+                        f"{self._address}"
+                    )
+            else:
+                self._read_acks(block=True)
+
+    def _send(self, frame: bytes) -> bool:
+        try:
+            self._sock.sendall(frame)
+            return True
+        except OSError as e:
+            self._disconnect(e)
+            return False
+
+    # (re)connects to the server at most once per reconnect_interval, then
+    # sends again any batches it hasn't logged yet
+    def _connect(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if (
+            not force
+            and self._last_connect is not None
+            and now - self._last_connect < self._reconnect_interval
+        ):
+            return
+        self._last_connect = now
+        sock = _create_socket(self._address)
+        try:
+            sock.settimeout(self._timeout)
+            sock.connect(self._address)
+            hello = json.dumps({"type": "hello", "client_id": self._client_id})
+            sock.sendall(_encode_frame(hello))
+            reply = _recv_message(sock)
+            if reply is None:
+                raise ConnectionError("connection closed by log server")
+        except (OSError, ValueError) as e:
+            sock.close()
+            logger.debug(f"could not connect to log server at {self._address}: {e}")
+            return
+        self._sock = sock
+        self._handle_ack(reply["seq"], None)
+        for _, _, frame in self._pending:
+            if not self._send(frame):
+                return
+
+    def _disconnect(self, error: Exception = None) -> None:
+        if self._sock is None:
+            return
+        if error:
+            logger.debug(f"lost connection to log server at {self._address}: {error}")
+        self._sock.close()
+        self._sock = None
+
+    # reads acknowledgements, waiting for at least one if block is set
+    def _read_acks(self, block: bool) -> None:
+        try:
+            while self._pending:
+                if not block:
+                    readable, _, _ = select.select([self._sock], [], [], 0)
+                    if not readable:
+                        return
+                message = _recv_message(self._sock)
+                if message is None:
+                    raise ConnectionError("connection closed by log server")
+                self._handle_ack(message["seq"], message.get("error"))
+                block = False
+        except (OSError, ValueError) as e:
+            self._disconnect(e)
+
+    # acknowledgements are in order, so every batch up to seq is done
+    def _handle_ack(self, seq: int, error: str) -> None:
+        while self._pending and self._pending[0][0] <= seq:
+            pending_seq, num_records, _ = self._pending.popleft()
+            self._pending_records -= num_records
+            if error and pending_seq == seq:
+                self._rejected_records += num_records
+                self._error = self._error or error
+
+
+class _LogRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        log_server = self.server.log_server
+        log_server._add_connection(self.request)
+        try:
+            hello = _recv_message(self.request)
+            if hello is None or hello.get("type") != "hello":
+                return
+            client_id = str(hello["client_id"])
+            last_seq = log_server._get_last_seq(client_id)
+            self.request.sendall(_encode_frame(json.dumps({"seq": last_seq})))
+            while True:
+                message = _recv_message(self.request)
+                if message is None or message.get("type") != "records":
+                    return
+                seq = message["seq"]
+                error = log_server._log_batch(client_id, seq, message["records"])
+                ack = {"seq": seq}
+                if error:
+                    ack["error"] = error
+                self.request.sendall(_encode_frame(json.dumps(ack)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.info(f"closing connection from {self.client_address}: {e}")
+        finally:
+            log_server._remove_connection(self.request)
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        pass
+
+
+# Server writing the records of any number of RemoteDataLogger clients through
+# a single DataLogger, which should use per-worker ordering since the records
+# of different clients are interleaved. The address is a (host, port) tuple
+# for TCP, or a path for a Unix socket
+class LogServer:
+    def __init__(self, data_logger: DataLogger, address) -> None:
+        self._logger = data_logger
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _UnixServer(address, _LogRequestHandler)
+        else:
+            self._server = _TCPServer(tuple(address), _LogRequestHandler)
+        self._server.log_server = self
+        # the logger is shared by the connection threads
+        self._lock = threading.Lock()
+        self._last_seqs = {}
+        self._connections = set()
+        self._thread = None
+        self._serving = False
+        self._closed = False
+        self._stats = {
+            "records": 0,
+            "batches": 0,
+            "rejected_records": 0,
+            "duplicate_batches": 0,
+        }
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    @property
+    def logger(self):
+        return self._logger
+
+    @property
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, clients=len(self._last_seqs))
+
+    def serve_forever(self) -> None:
+        self._serving = True
+        self._server.serve_forever()
+
+    # serves on a background thread
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="l2logger-server", daemon=True
+        )
+        self._thread.start()
+
+    # stops accepting connections, closes the open ones once their current
+    # batch is logged, then closes the logger
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._serving:
+            self._server.shutdown()
+        with self._lock:
+            for connection in self._connections:
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+        self._logger.close()
+        if isinstance(self._server.server_address, str):
+            os.unlink(self._server.server_address)
+
+    def _add_connection(self, connection: socket.socket) -> None:
+        with self._lock:
+            self._connections.add(connection)
+
+    def _remove_connection(self, connection: socket.socket) -> None:
+        with self._lock:
+            self._connections.discard(connection)
+
+    def _get_last_seq(self, client_id: str) -> int:
+        with self._lock:
+            return self._last_seqs.setdefault(client_id, -1)
+
+    # logs a batch unless it was already logged before the client reconnected;
+    # returns the error if it was rejected
+    def _log_batch(self, client_id: str, seq: int, batch: list) -> str:
+        with self._lock:
+            if seq <= self._last_seqs[client_id]:
+                self._stats["duplicate_batches"] += 1
+                return None
+            self._last_seqs[client_id] = seq
+            self._stats["batches"] += 1
+            try:
+                records = [
+                    self._logger._augment_fields(record, timestamp)
+                    for timestamp, record in batch
+                ]
+                self._logger._log_records(records)
+                self._stats["records"] += len(records)
+            except Exception as e:
+                self._stats["rejected_records"] += len(batch)
+                return str(e)
+        return None
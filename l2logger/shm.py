@@ -0,0 +1,310 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+import time
+from multiprocessing import shared_memory
+from typing import List
+
+import numpy as np
+
+from l2logger.l2logger import TimestampProvider, get_task_params_key
+
+# fields of a record which are sent as codes into a table of interned values
+_STRING_FIELDS = ["worker_id", "block_type", "block_subtype", "task_name", "exp_status"]
+_INTERNED_FIELDS = _STRING_FIELDS + ["task_params"]
+_MISSING = object()
+# ring buffer header, with the head (next slot written) and tail (next slot
+# read) counters on separate cache lines
+_HEAD = 0
+_TAIL = 8
+_HEADER_SIZE = 128
+
+
+# fixed layout of a record in a ring buffer; metrics are stored as floats
+def record_dtype(metric_fields: List[str]) -> np.dtype:
+    fields = [("block_num", np.int64), ("exp_num", np.int64), ("time", np.float64)]
+    fields.extend((field, np.int32) for field in _INTERNED_FIELDS)
+    fields.extend((f"metric{i}", np.float64) for i in range(len(metric_fields)))
+    return np.dtype(fields)
+
+
+# Lock-free ring buffer of records in shared memory, for a single producer
+# and a single consumer: only the producer advances the head, only the
+# consumer advances the tail, and each only does so after it is done with the
+# slots involved. Counters are aligned 64-bit values, whose stores are atomic.
+class SharedRing:
+    def __init__(
+        self, dtype: np.dtype, capacity: int, name: str = None, create: bool = True
+    ) -> None:
+        self._dtype = dtype
+        self._capacity = capacity
+        size = _HEADER_SIZE + capacity * dtype.itemsize
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self._counters = np.ndarray((_HEADER_SIZE // 8,), np.uint64, self._shm.buf)
+        self._slots = np.ndarray((capacity,), dtype, self._shm.buf, offset=_HEADER_SIZE)
+        if create:
+            self._counters[:] = 0
+
+    # attached to the same shared memory when passed to another process
+    def __getstate__(self):
+        return (self._dtype, self._capacity, self._shm.name)
+
+    def __setstate__(self, state):
+        dtype, capacity, name = state
+        self.__init__(dtype, capacity, name, create=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def dtype(self):
+        return self._dtype
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    # appends rows, waiting for the consumer while the ring is full
+    def write(self, rows: np.ndarray) -> None:
+        num_rows = len(rows)
+        head = int(self._counters[_HEAD])
+        while head + num_rows - int(self._counters[_TAIL]) > self._capacity:
+            time.sleep(0.0001)
+        start = head % self._capacity
+        end = start + num_rows
+        if end <= self._capacity:
+            self._slots[start:end] = rows
+        else:
+            split = self._capacity - start
+            self._slots[start:] = rows[:split]
+            self._slots[: num_rows - split] = rows[split:]
+        # published only once the slots are written
+        self._counters[_HEAD] = head + num_rows
+
+    # removes and returns a copy of all rows written so far, or None
+    def read(self) -> np.ndarray:
+        tail = int(self._counters[_TAIL])
+        head = int(self._counters[_HEAD])
+        if head == tail:
+            return None
+        start = tail % self._capacity
+        end = start + head - tail
+        if end <= self._capacity:
+            rows = self._slots[start:end].copy()
+        else:
+            rows = np.concatenate(
+                (self._slots[start:], self._slots[: end - self._capacity])
+            )
+        self._counters[_TAIL] = head
+        return rows
+
+    def close(self) -> None:
+        self._counters = None
+        self._slots = None
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
+
+
+# sends records from a worker process to the collector through a ring buffer.
+# Values of the interned fields are replaced by codes, and each new value is
+# sent once to the collector over the control queue. Records can only have
+# the standard fields and the metric fields, whose values must be numbers
+class SharedMemoryProxy:
+    def __init__(
+        self,
+        ring: SharedRing,
+        control_queue,
+        proxy_id: int,
+        batch_size: int,
+        metric_fields: List[str],
+        defaults: dict,
+        worker_id: str = None,
+        timestamp_provider: TimestampProvider = None,
+    ) -> None:
+        self._ring = ring
+        self._control_queue = control_queue
+        self._proxy_id = proxy_id
+        self._batch_size = batch_size
+        self._metric_fields = metric_fields
+        self._worker_id = worker_id
+        defaults = dict(defaults)
+        if worker_id is not None:
+            defaults["worker_id"] = worker_id
+        self._string_fields = [
+            (field, defaults.get(field, _MISSING)) for field in _STRING_FIELDS
+        ]
+        self._timestamp_provider = timestamp_provider or TimestampProvider()
+        self._fields = frozenset(
+            ["block_num", "exp_num"] + _INTERNED_FIELDS + metric_fields
+        )
+        self._codes = {}
+        self._batch = []
+
+    @property
+    def proxy_id(self):
+        return self._proxy_id
+
+    @property
+    def worker_id(self):
+        return self._worker_id
+
+    def log_record(self, record: dict) -> None:
+        if not type(record) is dict:
+            raise RuntimeError("record must be dict")
+        if not self._fields.issuperset(record):
+            if "timestamp" in record:
+                raise RuntimeError("timestamp column cannot be overwritten")
+            raise RuntimeError(
+                f"record fields not supported by the shared memory transport: "
+                f"{sorted(set(record) - self._fields, key=str)}"
+            )
+        block_num = record.get("block_num")
+        exp_num = record.get("exp_num")
+        if not type(block_num) is int:
+            raise RuntimeError(f"block_num must be non-negative integer")
+        if not type(exp_num) is int:
+            raise RuntimeError(f"exp_num must be non-negative integer")
+        row = [block_num, exp_num, self._timestamp_provider._now()]
+        codes = self._codes
+        for field, default in self._string_fields:
+            value = record.get(field, default)
+            if value is _MISSING:
+                raise RuntimeError(f"standard record field missing: '{field}'")
+            # strings can't be equal to the keys of other values
+            key = value if type(value) is str else (type(value), value)
+            try:
+                code = codes.get(key)
+            except TypeError:
+                raise RuntimeError(f"{field} must be hashable")
+            if code is None:
+                code = self._add_value(key, value)
+            row.append(code)
+        row.append(self._intern_task_params(record.get("task_params", _MISSING)))
+        for field in self._metric_fields:
+            value = record.get(field, _MISSING)
+            if type(value) is float or type(value) is int:
+                row.append(value)
+            elif value is None:
+                row.append(np.nan)
+            elif value is _MISSING:
+                raise RuntimeError(f"metric record field missing: '{field}'")
+            elif isinstance(value, (int, float, np.number)):
+                row.append(value)
+            else:
+                raise RuntimeError(f"metric '{field}' must be a number")
+        self._batch.append(tuple(row))
+        if len(self._batch) >= self._batch_size:
+            self.flush()
+
+    def log_records(self, records: List[dict]) -> None:
+        if not type(records) is list:
+            raise RuntimeError("records must be list of dicts")
+        for record in records:
+            self.log_record(record)
+
+    # writes any pending records into the ring buffer
+    def flush(self) -> None:
+        if not self._batch:
+            return
+        self._ring.write(np.array(self._batch, dtype=self._ring.dtype))
+        self._batch = []
+
+    def close(self) -> None:
+        self.flush()
+
+    # flat params are keyed by a snapshot of their items, and any others by
+    # their serialization; they are sent to the collector serialized
+    def _intern_task_params(self, task_params: dict) -> int:
+        if task_params is _MISSING:
+            raise RuntimeError("standard record field missing: 'task_params'")
+        if type(task_params) is not dict:
+            raise RuntimeError("task_params must be dict")
+        key = get_task_params_key(task_params)
+        if key is not None:
+            key = ("task_params", key)
+            code = self._codes.get(key)
+            if code is not None:
+                return code
+        try:
+            serialized = json.dumps(task_params)
+        except:
+            raise RuntimeError("task_params must be valid json")
+        if key is None:
+            key = ("task_params", serialized)
+            code = self._codes.get(key)
+            if code is not None:
+                return code
+        return self._add_value(key, serialized, serialized=True)
+
+    # assigns the next code to a value, sending the value to the collector
+    # before any record refers to it
+    def _add_value(self, key, value, serialized: bool = False) -> int:
+        code = len(self._codes)
+        self._codes[key] = code
+        self._control_queue.put(("value", self._proxy_id, code, value, serialized))
+        return code
+
+
+# collector side of a ring buffer: turns the rows read from it back into
+# columns of the original values
+class SharedRingReader:
+    def __init__(self, ring: SharedRing, metric_fields: List[str]) -> None:
+        self._ring = ring
+        self._metric_fields = metric_fields
+        self._values = []
+
+    @property
+    def ring(self):
+        return self._ring
+
+    # adds a value sent by the proxy, in the order of their codes
+    def add_value(self, code: int, value, serialized: bool) -> None:
+        if code != len(self._values):
+            raise RuntimeError(f"value {code} is out of order")
+        self._values.append(json.loads(value) if serialized else value)
+
+    def read(self) -> np.ndarray:
+        return self._ring.read()
+
+    # number of values which must be known to decode the given rows
+    def values_needed(self, rows: np.ndarray) -> int:
+        return max(int(rows[field].max()) for field in _INTERNED_FIELDS) + 1
+
+    @property
+    def num_values(self):
+        return len(self._values)
+
+    def decode(self, rows: np.ndarray, format_timestamp) -> dict:
+        columns = {
+            "block_num": rows["block_num"].tolist(),
+            "exp_num": rows["exp_num"].tolist(),
+            "timestamp": [format_timestamp(now) for now in rows["time"].tolist()],
+        }
+        values = self._values
+        for field in _INTERNED_FIELDS:
+            columns[field] = [values[code] for code in rows[field].tolist()]
+        for i, field in enumerate(self._metric_fields):
+            columns[field] = rows[f"metric{i}"].tolist()
+        return columns
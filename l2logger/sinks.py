@@ -0,0 +1,855 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sqlite3
+import time
+from typing import List
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# standard fields with fixed types in typed sinks
+_INTEGER_FIELDS = ["block_num", "exp_num"]
+_STRING_FIELDS = [
+    "worker_id",
+    "block_type",
+    "block_subtype",
+    "task_name",
+    "task_params",
+    "exp_status",
+    "timestamp",
+]
+
+
+class FlushPolicy:
+    # Controls when a sink writer flushes buffered rows to disk. A flush happens
+    # as soon as any configured threshold is reached; thresholds left as None
+    # are ignored, so a policy with none set only flushes on close (or when the
+    # underlying file buffer fills up). With fsync, every flush also waits for
+    # the rows to reach the disk, so a group of rows is synced at once. The
+    # interval is checked as rows are written; DataLogger's writer thread also
+    # flushes once it has passed without new rows.
+    def __init__(
+        self,
+        max_rows: int = None,
+        max_interval_ms: float = None,
+        max_bytes: int = None,
+        fsync: bool = False,
+    ) -> None:
+        for name, value in (
+            ("max_rows", max_rows),
+            ("max_interval_ms", max_interval_ms),
+            ("max_bytes", max_bytes),
+        ):
+            if value is not None and (type(value) not in (int, float) or value <= 0):
+                raise RuntimeError(f"{name} must be a positive number or None")
+        if type(fsync) is not bool:
+            raise RuntimeError("fsync must be a bool")
+        self._fsync = fsync
+        self._max_rows = max_rows
+        self._max_interval = None if max_interval_ms is None else max_interval_ms / 1000
+        self._max_bytes = max_bytes
+
+    @property
+    def max_rows(self):
+        return self._max_rows
+
+    @property
+    def max_interval_ms(self):
+        return None if self._max_interval is None else self._max_interval * 1000
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def fsync(self):
+        return self._fsync
+
+    def should_flush(self, pending_rows: int, pending_bytes: int, last_flush: float):
+        if self._max_rows is not None and pending_rows >= self._max_rows:
+            return True
+        if self._max_bytes is not None and pending_bytes >= self._max_bytes:
+            return True
+        if (
+            self._max_interval is not None
+            and time.monotonic() - last_flush >= self._max_interval
+        ):
+            return True
+        return False
+
+
+# flushing after every row is the most durable option, and remains the default
+DEFAULT_FLUSH_POLICY = FlushPolicy(max_rows=1)
+# syncing every row would be too slow, so rows are synced in groups
+DEFAULT_FSYNC_POLICY = FlushPolicy(max_rows=1000, max_interval_ms=100, fsync=True)
+
+
+# file name extensions of compressed TSV logs
+TSV_COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+# opens a TSV log file for writing text, compressing it as a stream with
+# "gzip" or "zstd" if given. Appending to a compressed file adds a new gzip
+# member or zstd frame, which readers decompress as one stream
+def open_tsv_log(
+    file_name: str, mode: str, compression: str = None, compression_level: int = None
+):
+    if compression is None:
+        return open(file_name, mode)
+    elif compression == "gzip":
+        level = 6 if compression_level is None else compression_level
+        return gzip.open(file_name, mode + "t", compresslevel=level)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression requires the zstandard package")
+        level = 3 if compression_level is None else compression_level
+        compressor = zstandard.ZstdCompressor(level=level)
+        raw_file = open(file_name, mode + "b")
+        return io.TextIOWrapper(compressor.stream_writer(raw_file))
+    raise RuntimeError(f"compression must be one of {list(TSV_COMPRESSION_EXTENSIONS)}")
+
+
+# manifest of the segments of a worker/block's TSV log, in the block directory
+SEGMENT_MANIFEST_FILE_NAME = "data-log.manifest.json"
+
+
+# returns the segments listed in the manifest of a block directory, each a
+# dict with the segment's file name and its number of rows, bytes (before
+# compression), and min and max exp_num
+def read_segment_manifest(block_dir: str) -> List[dict]:
+    manifest_file_name = os.path.join(block_dir, SEGMENT_MANIFEST_FILE_NAME)
+    if not os.path.exists(manifest_file_name):
+        return []
+    with open(manifest_file_name) as manifest_file:
+        return json.load(manifest_file)["segments"]
+
+
+def _write_segment_manifest(block_dir: str, segments: List[dict]) -> None:
+    manifest_file_name = os.path.join(block_dir, SEGMENT_MANIFEST_FILE_NAME)
+    # replaced as a whole, so readers never see a partial manifest
+    temp_file_name = manifest_file_name + ".tmp"
+    with open(temp_file_name, "w") as manifest_file:
+        json.dump({"segments": segments}, manifest_file, indent=2)
+    os.replace(temp_file_name, manifest_file_name)
+
+
+# truncates a partially written last row of an uncompressed TSV log, e.g. left
+# by a crash, so that appended rows start on a new line; returns whether the
+# file was truncated
+def truncate_torn_row(file_name: str) -> bool:
+    with open(file_name, "rb+") as log_file:
+        size = log_file.seek(0, os.SEEK_END)
+        if not size:
+            return False
+        log_file.seek(size - 1)
+        if log_file.read(1) == b"\n":
+            return False
+        # search backwards for the end of the last complete row
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            log_file.seek(start)
+            newline = log_file.read(end - start).rfind(b"\n")
+            if newline >= 0:
+                log_file.truncate(start + newline + 1)
+                return True
+            end = start
+        log_file.truncate(0)
+        return True
+
+
+class TSVLogFile:
+    # Writes the TSV log of one worker/block. With segment_rows or
+    # segment_bytes, the log is split into segments once the current one
+    # reaches either threshold: data-log.tsv, then data-log.00001.tsv, etc.
+    # Segments are listed in a manifest with their exp_num range once they
+    # are complete or the file is closed. A segment which is appended to
+    # after being reopened is taken off the manifest until it is closed again,
+    # so that the manifest never understates the range of a segment.
+    def __init__(
+        self,
+        log_file_name: str,
+        fieldnames: List[str],
+        flush_policy: FlushPolicy = None,
+        compression: str = None,
+        compression_level: int = None,
+        segment_rows: int = None,
+        segment_bytes: int = None,
+    ) -> None:
+        self._log_file_name = log_file_name
+        self._compression = compression
+        self._compression_level = compression_level
+        self._segment_rows = segment_rows
+        self._segment_bytes = segment_bytes
+        self._segmented = segment_rows is not None or segment_bytes is not None
+        # the segment being written to, loaded when the file is opened
+        self._segment = None
+        self._segment_num = None
+        self._segments = None
+        self._block_dir, base_name = os.path.split(log_file_name)
+        # e.g. "data-log" and ".tsv.gz"
+        self._base_name, _, extension = base_name.partition(".")
+        self._extension = "." + extension
+        self._exp_num_index = (
+            fieldnames.index("exp_num") if "exp_num" in fieldnames else None
+        )
+        self._initialized = False
+        # actual file handle, result of calling open
+        self._tsv_log_file = None
+        # csv DictWriter object
+        self._tsv_log = None
+        # csv writer object for rows given as values in fieldnames order
+        self._tsv_values_log = None
+        # ordered list of fieldnames
+        self._fieldnames = fieldnames
+        self._flush_policy = flush_policy or DEFAULT_FLUSH_POLICY
+        # rows/bytes written since the last flush
+        self._pending_rows = 0
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def _initialize(self) -> None:
+        if self._segmented and self._segment is None:
+            self._load_segment()
+        if self._compression is None and os.path.exists(self._log_file_name):
+            truncate_torn_row(self._log_file_name)
+        if os.path.exists(self._log_file_name) and (
+            self._compression is not None or os.path.getsize(self._log_file_name)
+        ):
+            mode, write_header = "a", False
+        else:
+            mode, write_header = "w", True
+        self._tsv_log_file = open_tsv_log(
+            self._log_file_name, mode, self._compression, self._compression_level
+        )
+        self._tsv_log = csv.DictWriter(
+            self._tsv_log_file,
+            fieldnames=self._fieldnames,
+            delimiter="\t",
+            quotechar='"',
+            lineterminator="\n",
+        )
+        self._tsv_values_log = csv.writer(
+            self._tsv_log_file, delimiter="\t", quotechar='"', lineterminator="\n"
+        )
+        if write_header:
+            self._tsv_log.writeheader()
+        self._initialized = True
+        self._last_flush = time.monotonic()
+
+    def __del__(self, *args) -> None:
+        self.close()
+
+    def _get_segment_file_name(self, segment_num: int) -> str:
+        if segment_num == 0:
+            base_name = self._base_name + self._extension
+        else:
+            base_name = f"{self._base_name}.{segment_num:05d}{self._extension}"
+        return os.path.join(self._block_dir, base_name)
+
+    def _is_full(self, segment: dict) -> bool:
+        return (
+            self._segment_rows is not None
+            and segment["rows"] >= self._segment_rows
+            or self._segment_bytes is not None
+            and segment["bytes"] >= self._segment_bytes
+        )
+
+    # continues the last segment on disk if it is listed in the manifest and
+    # isn't full, and starts a new one otherwise, e.g. if it was left unlisted
+    # by a crash
+    def _load_segment(self) -> None:
+        self._segments = read_segment_manifest(self._block_dir)
+        segment_num = 0
+        while os.path.exists(self._get_segment_file_name(segment_num + 1)):
+            segment_num += 1
+        file_name = self._get_segment_file_name(segment_num)
+        base_name = os.path.basename(file_name)
+        last_segment = self._segments[-1] if self._segments else None
+        if (
+            last_segment is not None
+            and last_segment["file"] == base_name
+            and not self._is_full(last_segment)
+        ):
+            self._segment = self._segments.pop()
+            _write_segment_manifest(self._block_dir, self._segments)
+        else:
+            if os.path.exists(file_name):
+                segment_num += 1
+                file_name = self._get_segment_file_name(segment_num)
+            self._segment = {
+                "file": os.path.basename(file_name),
+                "rows": 0,
+                "bytes": 0,
+                "min_exp_num": None,
+                "max_exp_num": None,
+            }
+        self._segment_num = segment_num
+        self._log_file_name = file_name
+
+    # lists the current segment in the manifest
+    def _close_segment(self) -> None:
+        if self._segment["rows"]:
+            self._segments.append(self._segment)
+            _write_segment_manifest(self._block_dir, self._segments)
+        self._segment = None
+
+    # writes rows, starting new segments as needed; rows are given as dicts,
+    # or as values in fieldnames order
+    def _add_segmented(self, rows: list, as_values: bool) -> None:
+        start = 0
+        while start < len(rows):
+            if not self._initialized:
+                self._initialize()
+            segment = self._segment
+            end = len(rows)
+            if self._segment_rows is not None:
+                end = min(end, start + self._segment_rows - segment["rows"])
+            writer = self._tsv_values_log if as_values else self._tsv_log
+            num_bytes = 0
+            for row in rows[start:end]:
+                num_bytes += writer.writerow(row)
+            exp_key = self._exp_num_index if as_values else "exp_num"
+            first_exp_num, last_exp_num = rows[start][exp_key], rows[end - 1][exp_key]
+            if segment["min_exp_num"] is None:
+                segment["min_exp_num"] = segment["max_exp_num"] = first_exp_num
+            segment["min_exp_num"] = min(segment["min_exp_num"], first_exp_num)
+            segment["max_exp_num"] = max(segment["max_exp_num"], last_exp_num)
+            segment["rows"] += end - start
+            segment["bytes"] += num_bytes
+            self._pending_rows += end - start
+            self._pending_bytes += num_bytes
+            start = end
+            if self._is_full(segment):
+                # the next write opens the next segment
+                self.close()
+            elif self._flush_policy.should_flush(
+                self._pending_rows, self._pending_bytes, self._last_flush
+            ):
+                self.flush()
+
+    # validation handled in caller
+    def add_row(self, record: dict) -> None:
+        if self._segmented:
+            self._add_segmented([record], False)
+            return
+        if not self._initialized:
+            self._initialize()
+        # csv writers return the number of characters handed to the file
+        self._pending_bytes += self._tsv_log.writerow(record)
+        self._pending_rows += 1
+        if self._flush_policy.should_flush(
+            self._pending_rows, self._pending_bytes, self._last_flush
+        ):
+            self.flush()
+
+    # same as add_row for a row given as a sequence of values in fieldnames
+    # order, which skips mapping a dict back to that order
+    def add_values(self, values) -> None:
+        if self._segmented:
+            self._add_segmented([values], True)
+            return
+        if not self._initialized:
+            self._initialize()
+        self._pending_bytes += self._tsv_values_log.writerow(values)
+        self._pending_rows += 1
+        if self._flush_policy.should_flush(
+            self._pending_rows, self._pending_bytes, self._last_flush
+        ):
+            self.flush()
+
+    # same as add_rows for rows given as sequences of values
+    def add_value_rows(self, rows: List[tuple]) -> None:
+        if self._segmented:
+            self._add_segmented(rows, True)
+            return
+        if not self._initialized:
+            self._initialize()
+        if self._flush_policy.max_bytes is None:
+            self._tsv_values_log.writerows(rows)
+        else:
+            for row in rows:
+                self._pending_bytes += self._tsv_values_log.writerow(row)
+        self._pending_rows += len(rows)
+        if self._flush_policy.should_flush(
+            self._pending_rows, self._pending_bytes, self._last_flush
+        ):
+            self.flush()
+
+    # validation handled in caller
+    def add_rows(self, records: List[dict]) -> None:
+        if self._segmented:
+            self._add_segmented(records, False)
+            return
+        if not self._initialized:
+            self._initialize()
+        if self._flush_policy.max_bytes is None:
+            self._tsv_log.writerows(records)
+        else:
+            for record in records:
+                self._pending_bytes += self._tsv_log.writerow(record)
+        self._pending_rows += len(records)
+        if self._flush_policy.should_flush(
+            self._pending_rows, self._pending_bytes, self._last_flush
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._tsv_log_file and not self._tsv_log_file.closed:
+            self._tsv_log_file.flush()
+            if self._flush_policy.fsync and self._pending_rows:
+                os.fsync(self._tsv_log_file.fileno())
+        self._pending_rows = 0
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self._tsv_log_file and not self._tsv_log_file.closed:
+            if self._flush_policy.fsync:
+                self.flush()
+            self._tsv_log_file.close()
+            self._initialized = False
+        if self._segment is not None:
+            self._close_segment()
+        self._pending_rows = 0
+        self._pending_bytes = 0
+
+
+class LogSink:
+    # Base class for DataLogger output back-ends. A sink is created along with
+    # the logger, given the ordered fields of the scenario once they are known
+    # from the first record, and then opens a writer for each (worker, block)
+    # pair records are logged to. Writers implement add_row, add_rows, flush
+    # and close like TSVLogFile; rows are dicts with every field in fieldnames,
+    # and task_params already serialized. Writers may also implement
+    # add_values and add_value_rows, taking rows as values in fieldnames order.
+    #
+    # Sinks are selected by name, so new ones must be registered with
+    # register_sink; their name is recorded in logger_info.json, which is how
+    # util.read_log_data knows how to read the logs back.
+    name = None
+
+    def __init__(
+        self,
+        scenario_dir: str,
+        metric_fields: List[str],
+        flush_policy: FlushPolicy = None,
+    ) -> None:
+        self._scenario_dir = scenario_dir
+        self._metric_fields = metric_fields
+        self._fieldnames = None
+        # block directories which are known to exist
+        self._block_dirs = set()
+        self._flush_policy = flush_policy or DEFAULT_FLUSH_POLICY
+
+    @property
+    def scenario_dir(self):
+        return self._scenario_dir
+
+    @property
+    def metric_fields(self):
+        return self._metric_fields
+
+    @property
+    def flush_policy(self):
+        return self._flush_policy
+
+    @property
+    def fieldnames(self):
+        return self._fieldnames
+
+    def set_fieldnames(self, fieldnames: List[str]) -> None:
+        self._fieldnames = fieldnames
+
+    def block_dir(self, worker_id: str, block_num: int, block_type: str) -> str:
+        return os.path.join(self._scenario_dir, worker_id, f"{block_num}-{block_type}")
+
+    # creates the block directory if it wasn't already, and returns it
+    def make_block_dir(self, worker_id: str, block_num: int, block_type: str) -> str:
+        block_dir = self.block_dir(worker_id, block_num, block_type)
+        if not block_dir in self._block_dirs:
+            os.makedirs(block_dir, exist_ok=True)
+            self._block_dirs.add(block_dir)
+        return block_dir
+
+    def open(self, worker_id: str, block_num: int, block_type: str):
+        raise NotImplementedError
+
+    # flushes and closes anything shared between the sink's writers
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class TSVSink(LogSink):
+    # Default sink, writing a data-log.tsv file for each worker/block. With
+    # compression, the files are compressed as they are written, e.g. as
+    # data-log.tsv.gz; each flush then compresses the rows written since the
+    # previous one, so batching flushes gives much better compression. With
+    # segment_rows or segment_bytes, the files are split into segments listed
+    # in a manifest (see TSVLogFile).
+    name = "tsv"
+
+    def __init__(
+        self,
+        scenario_dir: str,
+        metric_fields: List[str],
+        flush_policy: FlushPolicy = None,
+        compression: str = None,
+        compression_level: int = None,
+        segment_rows: int = None,
+        segment_bytes: int = None,
+    ) -> None:
+        if compression is not None:
+            if not compression in TSV_COMPRESSION_EXTENSIONS:
+                raise RuntimeError(
+                    f"compression must be one of {list(TSV_COMPRESSION_EXTENSIONS)}"
+                )
+            if compression == "zstd" and zstandard is None:
+                raise RuntimeError("zstd compression requires the zstandard package")
+        if compression_level is not None:
+            max_level = 9
+            if compression == "zstd":
+                max_level = zstandard.MAX_COMPRESSION_LEVEL
+            if type(compression_level) is not int or compression_level > max_level:
+                raise RuntimeError(
+                    f"compression_level must be an integer up to {max_level}"
+                )
+            if compression == "gzip" and compression_level < 0:
+                raise RuntimeError("compression_level must be non-negative for gzip")
+        for name, value in (
+            ("segment_rows", segment_rows),
+            ("segment_bytes", segment_bytes),
+        ):
+            if value is not None and (type(value) is not int or value <= 0):
+                raise RuntimeError(f"{name} must be a positive integer")
+        super().__init__(scenario_dir, metric_fields, flush_policy)
+        self._compression = compression
+        self._compression_level = compression_level
+        self._segment_rows = segment_rows
+        self._segment_bytes = segment_bytes
+        self._file_name = "data-log.tsv" + TSV_COMPRESSION_EXTENSIONS.get(
+            compression, ""
+        )
+
+    def open(self, worker_id: str, block_num: int, block_type: str) -> TSVLogFile:
+        logging_dir = self.make_block_dir(worker_id, block_num, block_type)
+        log_file_name = os.path.join(logging_dir, self._file_name)
+        return TSVLogFile(
+            log_file_name,
+            self._fieldnames,
+            self._flush_policy,
+            self._compression,
+            self._compression_level,
+            self._segment_rows,
+            self._segment_bytes,
+        )
+
+
+class ArrowLogFile:
+    # Buffers the rows of one worker/block and writes them as Arrow record
+    # batches, either to an Arrow IPC file or a Parquet file
+    def __init__(self, log_file_name: str, sink, batch_rows: int) -> None:
+        self._log_file_name = log_file_name
+        # the schema is shared by all of the sink's files
+        self._sink = sink
+        self._batch_rows = batch_rows
+        self._rows = []
+        self._writer = None
+
+    def __del__(self, *args) -> None:
+        self.close()
+
+    def add_row(self, record: dict) -> None:
+        self._rows.append(record)
+        if len(self._rows) >= self._batch_rows:
+            self.flush()
+
+    def add_rows(self, records: List[dict]) -> None:
+        self._rows.extend(records)
+        if len(self._rows) >= self._batch_rows or self._flush_policy.should_flush(
+            len(self._rows), 0, self._last_flush
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        columns = {
+            field: [row[field] for row in self._rows] for field in self._sink.fieldnames
+        }
+        schema = self._sink.get_schema(columns)
+        try:
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(columns[field.name], field.type) for field in schema],
+                schema=schema,
+            )
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise RuntimeError(f"record values do not match arrow schema: {e}")
+        if self._writer is None:
+            if self._log_file_name.endswith(".parquet"):
+                self._writer = pq.ParquetWriter(self._log_file_name, schema)
+            else:
+                self._writer = pa.ipc.new_file(self._log_file_name, schema)
+        self._writer.write_batch(batch)
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ArrowSink(LogSink):
+    # Columnar sink writing Arrow IPC (default) or Parquet files for each
+    # worker/block, with metric columns typed as float64 and task_params as a
+    # string. The types of any other columns are inferred from the first
+    # batch written, and fixed from then on. Rows are buffered
+    # and written as a record batch every batch_rows rows, on flush, and on
+    # close. Since these files can't be appended to, reopening a worker/block
+    # starts a new part, e.g. data-log.00001.arrow after data-log.arrow.
+    name = "arrow"
+    _FILE_FORMATS = {"ipc": "arrow", "parquet": "parquet"}
+
+    def __init__(
+        self,
+        scenario_dir: str,
+        metric_fields: List[str],
+        flush_policy: FlushPolicy = None,
+        file_format: str = "ipc",
+        batch_rows: int = 65536,
+    ) -> None:
+        if pa is None:
+            raise RuntimeError("arrow log sink requires the pyarrow package")
+        if not file_format in self._FILE_FORMATS:
+            raise RuntimeError(f"file_format must be one of {list(self._FILE_FORMATS)}")
+        if type(batch_rows) is not int or batch_rows <= 0:
+            raise RuntimeError("batch_rows must be a positive integer")
+        super().__init__(scenario_dir, metric_fields, flush_policy)
+        self._extension = self._FILE_FORMATS[file_format]
+        self._batch_rows = batch_rows
+        self._schema = None
+
+    def set_fieldnames(self, fieldnames: List[str]) -> None:
+        super().set_fieldnames(fieldnames)
+        self._schema = None
+
+    # schema of the log files, inferred from the first batch of columns
+    def get_schema(self, columns: dict):
+        if self._schema is None:
+            self._schema = pa.schema(
+                [
+                    (field, self._get_field_type(field, columns[field]))
+                    for field in self._fieldnames
+                ]
+            )
+        return self._schema
+
+    def _get_field_type(self, field: str, values: list):
+        if field in _INTEGER_FIELDS:
+            return pa.int64()
+        elif field in self._metric_fields:
+            return pa.float64()
+        elif field in _STRING_FIELDS:
+            return pa.string()
+        try:
+            field_type = pa.array(values).type
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            raise RuntimeError(f"cannot infer arrow type of column: {field}")
+        return pa.string() if field_type == pa.null() else field_type
+
+    def open(self, worker_id: str, block_num: int, block_type: str) -> ArrowLogFile:
+        logging_dir = self.make_block_dir(worker_id, block_num, block_type)
+        log_file_name = os.path.join(logging_dir, f"data-log.{self._extension}")
+        part = 0
+        while os.path.exists(log_file_name):
+            part += 1
+            log_file_name = os.path.join(
+                logging_dir, f"data-log.{part:05d}.{self._extension}"
+            )
+        return ArrowLogFile(log_file_name, self, self._batch_rows)
+
+
+class SQLiteLogWriter:
+    # Writer for one worker/block of a SQLiteSink; rows already hold their
+    # worker/block, so this only forwards them to the sink's shared buffer
+    def __init__(self, sink) -> None:
+        self._sink = sink
+
+    def add_row(self, record: dict) -> None:
+        self._sink.add_rows([record])
+
+    def add_rows(self, records: List[dict]) -> None:
+        self._sink.add_rows(records)
+
+    def flush(self) -> None:
+        self._sink.flush()
+
+    # the database stays open until the sink is closed
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSink(LogSink):
+    # Sink writing every record of the scenario into a single data-log.sqlite
+    # database in the scenario directory, in a data_log table indexed on
+    # exp_num, (block_num, block_type) and worker_id. The database uses WAL
+    # journaling, and buffered rows are inserted in a single transaction
+    # whenever the flush policy says (its max_bytes aside, as rows aren't
+    # encoded until inserted), once batch_rows rows are buffered, on flush,
+    # and on close. Commits only sync the WAL to disk with fsync.
+    name = "sqlite"
+    TABLE_NAME = "data_log"
+    FILE_NAME = "data-log.sqlite"
+    _INDEXES = [["exp_num"], ["block_num", "block_type"], ["worker_id"]]
+
+    def __init__(
+        self,
+        scenario_dir: str,
+        metric_fields: List[str],
+        flush_policy: FlushPolicy = None,
+        batch_rows: int = 10000,
+    ) -> None:
+        if type(batch_rows) is not int or batch_rows <= 0:
+            raise RuntimeError("batch_rows must be a positive integer")
+        super().__init__(scenario_dir, metric_fields, flush_policy)
+        self._batch_rows = batch_rows
+        self._rows = []
+        self._last_flush = time.monotonic()
+        self._connection = None
+        self._insert = None
+
+    def open(self, worker_id: str, block_num: int, block_type: str):
+        if self._connection is None:
+            self._connect()
+        return SQLiteLogWriter(self)
+
+    def add_rows(self, records: List[dict]) -> None:
+        self._rows.extend(records)
+        if len(self._rows) >= self._batch_rows or self._flush_policy.should_flush(
+            len(self._rows), 0, self._last_flush
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._rows:
+            return
+        fieldnames = self._fieldnames
+        with self._connection:
+            self._connection.executemany(
+                self._insert,
+                [[row[field] for field in fieldnames] for row in self._rows],
+            )
+        self._rows = []
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+
+    def _connect(self) -> None:
+        # used from the writer thread in async mode, but never concurrently
+        self._connection = sqlite3.connect(
+            os.path.join(self._scenario_dir, self.FILE_NAME),
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # with WAL journaling, NORMAL keeps committed rows when the process
+        # crashes, like a flushed file, and FULL also syncs the WAL on every
+        # commit
+        if self._flush_policy.fsync:
+            self._connection.execute("PRAGMA synchronous=FULL")
+        else:
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(
+            f"{quote_identifier(field)} {self._get_column_type(field)}".rstrip()
+            for field in self._fieldnames
+        )
+        table = quote_identifier(self.TABLE_NAME)
+        with self._connection:
+            self._connection.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+            for index in self._INDEXES:
+                index_name = quote_identifier(f"{self.TABLE_NAME}_{'_'.join(index)}")
+                index_columns = ", ".join(quote_identifier(field) for field in index)
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index_name} "
+                    f"ON {table} ({index_columns})"
+                )
+        placeholders = ", ".join("?" for _ in self._fieldnames)
+        self._insert = f"INSERT INTO {table} VALUES ({placeholders})"
+        self._last_flush = time.monotonic()
+
+    def _get_column_type(self, field: str) -> str:
+        if field in _INTEGER_FIELDS:
+            return "INTEGER"
+        elif field in self._metric_fields:
+            return "REAL"
+        elif field in _STRING_FIELDS:
+            return "TEXT"
+        # other columns keep the type of their values
+        return ""
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+SINKS = {}
+
+
+def register_sink(sink_class: type) -> type:
+    if not (isinstance(sink_class, type) and issubclass(sink_class, LogSink)):
+        raise RuntimeError("sink must be a subclass of LogSink")
+    if not type(sink_class.name) is str or not sink_class.name:
+        raise RuntimeError("sink name must be a non-empty string")
+    SINKS[sink_class.name] = sink_class
+    return sink_class
+
+
+def get_sink(name: str) -> type:
+    if not name in SINKS:
+        raise RuntimeError(f"log sink must be one of {list(SINKS)}")
+    return SINKS[name]
+
+
+register_sink(TSVSink)
+register_sink(ArrowSink)
+register_sink(SQLiteSink)
@@ -19,20 +19,80 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR
 IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import gzip
+import io
 import json
 import logging
 import os
 import platform
 import re
+import shutil
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List, Tuple
 
 import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from l2logger.cache import CACHE_DIR_NAME, DEFAULT_MAX_CACHE_BYTES, LogCache
+from l2logger.sinks import (
+    TSV_COMPRESSION_EXTENSIONS,
+    SQLiteSink,
+    quote_identifier,
+    read_segment_manifest,
+)
 
 logger = logging.getLogger(__name__)
 
+# Columns always read by read_log_data, even when analysis variables are given
+_DEFAULT_COLUMNS = [
+    "block_num",
+    "exp_num",
+    "block_type",
+    "worker_id",
+    "task_name",
+    "task_params",
+    "exp_status",
+    "timestamp",
+]
+
+# Declared dtypes of the standard columns, so that they skip type inference.
+# Repeated strings are read as categoricals; the timestamp is nearly unique.
+_STANDARD_DTYPES = {
+    "block_num": "int64",
+    "exp_num": "int64",
+    "block_type": "category",
+    "block_subtype": "category",
+    "worker_id": "category",
+    "task_name": "category",
+    "task_params": "category",
+    "exp_status": "category",
+}
+
+# Fewest rows read at a time from each data log file by iter_log_data
+_MIN_FILE_CHUNK_ROWS = 1000
+
+# A change in any of these columns from one row to the next starts a regime
+_REGIME_COLUMNS = ["block_num", "block_type", "block_subtype", "task_name"]
+
+# File name endings of TSV logs, compressed or not
+_TSV_FILE_SUFFIXES = tuple(
+    [".tsv"] + [".tsv" + extension for extension in TSV_COMPRESSION_EXTENSIONS.values()]
+)
+
 
 def get_l2data_root(warn: bool = True) -> Path:
     """Get the root directory where L2 data and logs are saved.
@@ -108,55 +168,812 @@ def get_fully_qualified_name(log_dir: Path) -> Path:
         raise NotADirectoryError
 
 
-def read_log_data(log_dir: Path, analysis_variables: List[str] = None) -> pd.DataFrame:
+def read_log_data(
+    log_dir: Path,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+    jobs: int = None,
+    processes: bool = False,
+    cache: bool = False,
+    max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+) -> pd.DataFrame:
     """Parse input directory for data log files and aggregate into Pandas DataFrame.
 
+    The data log files are read with the reader registered for the log sink recorded in the
+    logger info file, defaulting to TSV for logs written before sinks were recorded.
+
     Args:
         log_dir (Path): The top-level log directory.
         analysis_variables (List[str], optional): Filtered column names to import. Defaults to None.
+        filters (dict, optional): Only import rows matching these filters, mapping column names
+            to a value or a list of accepted values. Defaults to None.
+        exp_range (Tuple[int, int], optional): Only import rows with a start <= exp_num < stop,
+            given as (start, stop); either can be None for no bound. Segmented TSV logs skip
+            reading the segments outside of the range. Defaults to None.
+        jobs (int, optional): Number of data log files to read in parallel. The result is the
+            same for any number of jobs. Defaults to None, reading one file at a time.
+        processes (bool, optional): Read the files in a process pool rather than a thread
+            pool, when jobs is given. Defaults to False.
+        cache (bool, optional): Keep the parsed TSV logs in a .l2cache directory in the log
+            directory, so that only new or changed files are parsed by later calls. Requires
+            pyarrow. Defaults to False.
+        max_cache_bytes (int, optional): The cache is not kept if it would take more than
+            this many bytes on disk. Defaults to 1 GiB.
 
     Raises:
         FileNotFoundError: If log directory is not found.
+        RuntimeError: If there is no reader for the log sink, or exp_range or jobs is invalid.
+        RuntimeError: If cache is set for logs which are not TSV, or without pyarrow.
 
     Returns:
         pd.DataFrame: The aggregated log data.
     """
 
-    logs = None
+    fully_qualified_dir = get_fully_qualified_name(log_dir)
+
+    if not fully_qualified_dir.is_dir():
+        raise FileNotFoundError(f"Log directory not found!")
+
+    log_sink = get_log_sink(fully_qualified_dir)
+    if log_sink not in _LOG_READERS:
+        raise RuntimeError(f"No reader registered for log sink: {log_sink}")
+    reader_args = {}
+    if exp_range is not None:
+        reader_args["exp_range"] = _get_exp_range(exp_range)
+    if jobs is not None:
+        if type(jobs) is not int or jobs <= 0:
+            raise RuntimeError("jobs must be a positive int or None")
+        reader_args["jobs"] = jobs
+        reader_args["processes"] = processes
+    if cache:
+        if log_sink != "tsv":
+            raise RuntimeError("Only tsv logs can be cached")
+        reader_args["cache"] = LogCache(
+            fully_qualified_dir, _get_parse_dtypes(fully_qualified_dir), max_cache_bytes
+        )
+    logs = _LOG_READERS[log_sink](
+        fully_qualified_dir, analysis_variables, filters, **reader_args
+    )
+    # Logs of every sink have the same dtypes, whatever types they were read as,
+    # and only the categories left after filtering
+    logs = _set_log_dtypes(logs, _get_log_dtypes(fully_qualified_dir))
+    for column in logs.select_dtypes("category"):
+        logs[column] = logs[column].cat.remove_unused_categories()
+
+    # A stable sort keeps rows with equal keys in the order of their files,
+    # which readers return sorted by path
+    logs = logs.sort_values(["exp_num", "block_num"], ignore_index=True, kind="stable")
+    if len(logs):
+        logs["task_name"] = _lower_strings(logs["task_name"])
+
+    # Add default values for block subtype if it doesn't exist
+    if "block_subtype" not in logs.columns:
+        logs["block_subtype"] = "wake"
+
+    return logs
+
+
+def iter_log_data(
+    log_dir: Path,
+    chunksize: int = 100000,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+) -> Iterator[pd.DataFrame]:
+    """Iterate over the log data of a scenario in chunks, for logs too large for memory.
+
+    The chunks are in the same order as read_log_data returns the logs, by exp_num and then
+    block_num. Data log files of TSV logs, which are each sorted by exp_num, are read a chunk
+    at a time and merged, so only a bounded number of rows of each file are held in memory.
+    SQLite logs are sorted and read in chunks by the database. Unlike read_log_data, strings
+    are not read as categoricals, so that the chunks can be concatenated.
+
+    Args:
+        log_dir (Path): The top-level log directory.
+        chunksize (int, optional): Number of rows of each chunk, apart from the last one.
+            Defaults to 100000.
+        analysis_variables (List[str], optional): Filtered column names to import. Defaults to None.
+        filters (dict, optional): Only import rows matching these filters, mapping column names
+            to a value or a list of accepted values. Defaults to None.
+        exp_range (Tuple[int, int], optional): Only import rows with a start <= exp_num < stop,
+            given as (start, stop); either can be None for no bound. Defaults to None.
+
+    Raises:
+        FileNotFoundError: If log directory is not found.
+        RuntimeError: If the logs are not TSV or SQLite logs, or chunksize or exp_range is
+            invalid, or a data log file is not sorted by exp_num.
+
+    Yields:
+        pd.DataFrame: The next chunk of log data.
+    """
 
     fully_qualified_dir = get_fully_qualified_name(log_dir)
 
     if not fully_qualified_dir.is_dir():
         raise FileNotFoundError(f"Log directory not found!")
+    if type(chunksize) is not int or chunksize <= 0:
+        raise RuntimeError("chunksize must be a positive int")
+    if exp_range is not None:
+        exp_range = _get_exp_range(exp_range)
+
+    log_sink = get_log_sink(fully_qualified_dir)
+    if log_sink == "tsv":
+        chunks = _iter_tsv_log_data(
+            fully_qualified_dir, chunksize, analysis_variables, filters, exp_range
+        )
+    elif log_sink == "sqlite":
+        chunks = _iter_sqlite_log_data(
+            fully_qualified_dir, chunksize, analysis_variables, filters, exp_range
+        )
+    else:
+        raise RuntimeError(f"Log sink {log_sink} can't be read in chunks")
+
+    for chunk in chunks:
+        chunk["task_name"] = chunk["task_name"].str.lower()
+        if "block_subtype" not in chunk.columns:
+            chunk["block_subtype"] = "wake"
+        yield chunk
+
+
+def get_log_sink(log_dir: Path) -> str:
+    """Get the name of the log sink used to write a log directory.
+
+    Args:
+        log_dir (Path): The top-level log directory.
+
+    Returns:
+        str: The log sink recorded in the logger info file, or 'tsv' if none is recorded.
+    """
+
+    logger_info_file = get_fully_qualified_name(log_dir) / "logger_info.json"
+
+    if not logger_info_file.exists():
+        return "tsv"
+
+    with open(logger_info_file) as json_file:
+        return json.load(json_file).get("log_sink", "tsv")
+
+
+def register_log_reader(log_sink: str, reader: Callable) -> None:
+    """Register the function used by read_log_data to read logs written by a log sink.
+
+    Args:
+        log_sink (str): The name of the log sink, as recorded in the logger info file.
+        reader (Callable): Function taking the fully qualified log directory, the analysis
+            variables (or None) and the filters (or None), and returning the unsorted log data
+            as a DataFrame. If read_log_data is given an exp_range, it is also passed as a
+            (start, stop) keyword argument, and only rows in that range must be returned.
+            If it is given jobs, the jobs and processes keyword arguments are also passed.
+    """
+
+    _LOG_READERS[log_sink] = reader
+
+
+def clear_log_cache(log_dir: Path) -> None:
+    """Remove the cache of parsed logs kept by read_log_data with cache=True.
+
+    Args:
+        log_dir (Path): The top-level log directory.
+    """
+
+    shutil.rmtree(
+        get_fully_qualified_name(log_dir) / CACHE_DIR_NAME, ignore_errors=True
+    )
+
+
+def _get_log_dtypes(log_dir: Path) -> dict:
+    # Metrics are declared as floats if the logger info lists them
+    dtypes = dict(_STANDARD_DTYPES)
+    logger_info_file = log_dir / "logger_info.json"
+    if logger_info_file.exists():
+        with open(logger_info_file) as json_file:
+            metrics_columns = json.load(json_file).get("metrics_columns", [])
+        for column in metrics_columns:
+            dtypes.setdefault(column, "float64")
+    return dtypes
+
+
+def _set_log_dtypes(data: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    for column, dtype in dtypes.items():
+        if column in data.columns and data[column].dtype != dtype:
+            try:
+                data[column] = data[column].astype(dtype)
+            except (TypeError, ValueError):
+                # e.g. malformed values, which validate_log reports
+                pass
+    return data
+
+
+def _lower_strings(values: pd.Series):
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        return np.char.lower(list(values))
+    # Only the categories are lowered, merging those which only differ by case
+    categories, category_codes = np.unique(
+        np.char.lower(list(values.cat.categories)), return_inverse=True
+    )
+    codes = values.cat.codes.to_numpy()
+    return pd.Categorical.from_codes(
+        np.where(codes >= 0, category_codes[codes], -1), categories
+    )
+
+
+def _filter_log_data(data: pd.DataFrame, filters: dict = None) -> pd.DataFrame:
+    for column, values in (filters or {}).items():
+        data = data[data[column].isin(_get_filter_values(values))]
+    return data
+
+
+def _get_exp_range(exp_range) -> Tuple[int, int]:
+    if not isinstance(exp_range, (list, tuple)) or len(exp_range) != 2:
+        raise RuntimeError("exp_range must be a (start, stop) pair")
+    if any(
+        bound is not None and (type(bound) is not int or bound < 0)
+        for bound in exp_range
+    ):
+        raise RuntimeError("exp_range bounds must be non-negative integers or None")
+    return tuple(exp_range)
+
+
+def _in_exp_range(min_exp_num: int, max_exp_num: int, exp_range) -> bool:
+    start, stop = exp_range or (None, None)
+    return (start is None or max_exp_num >= start) and (
+        stop is None or min_exp_num < stop
+    )
+
+
+def _filter_exp_range(data: pd.DataFrame, exp_range=None) -> pd.DataFrame:
+    start, stop = exp_range or (None, None)
+    if start is not None:
+        data = data[data["exp_num"] >= start]
+    if stop is not None:
+        data = data[data["exp_num"] < stop]
+    return data
+
+
+def _get_filter_values(values) -> list:
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    # Convert numpy scalars to Python ones, so they can be bound in SQL queries
+    return [
+        value.item() if isinstance(value, np.generic) else value for value in values
+    ]
+
+
+def _read_files(
+    read_file: Callable, data_files: List[Path], jobs: int = None, processes=False
+) -> list:
+    # Results are in the order of the files, however many jobs read them
+    if jobs is None or jobs == 1 or len(data_files) < 2:
+        return [read_file(data_file) for data_file in data_files]
+    executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+    with executor_class(max_workers=min(jobs, len(data_files))) as executor:
+        return list(executor.map(read_file, data_files))
+
+
+def _read_tsv_log_data(
+    log_dir: Path,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+    jobs: int = None,
+    processes: bool = False,
+    cache: LogCache = None,
+) -> pd.DataFrame:
+    if cache is not None:
+        # The cache holds every file in full, which is filtered once loaded
+        data_files = _get_tsv_files(log_dir)
+        if not data_files:
+            return None
+        read_file = partial(_read_tsv_data_file, dtypes=_get_parse_dtypes(log_dir))
+        logs = cache.read(
+            data_files,
+            partial(_read_files, read_file, jobs=jobs, processes=processes),
+        )
+        return _select_log_data(logs, analysis_variables, filters, exp_range)
+
+    data_files = _get_tsv_files(log_dir, exp_range)
+    if not data_files:
+        # Every segment is out of range, so only read the columns of one
+        data_files = _get_tsv_files(log_dir)[:1]
+    if not data_files:
+        return None
+
+    # Files are filtered as they are read, then concatenated once
+    read_file = partial(
+        _read_tsv_data_file,
+        analysis_variables=analysis_variables,
+        filters=filters,
+        exp_range=exp_range,
+        dtypes=_get_parse_dtypes(log_dir),
+    )
+    return pd.concat(_read_files(read_file, data_files, jobs, processes))
+
+
+def _get_parse_dtypes(log_dir: Path) -> dict:
+    # Strings are only made categorical once the files are concatenated, since
+    # categoricals with different categories can't be concatenated as such
+    return {
+        column: dtype
+        for column, dtype in _get_log_dtypes(log_dir).items()
+        if dtype != "category"
+    }
+
+
+def _read_tsv_data_file(
+    data_file: Path,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+    dtypes: dict = None,
+) -> pd.DataFrame:
+    # Only the columns needed for the analysis and the filters are parsed
+    usecols = None
+    if analysis_variables is not None:
+        usecols = set(_DEFAULT_COLUMNS + analysis_variables).union(filters or {})
+    df = _read_tsv_file(data_file, usecols, dtypes)
+    return _select_log_data(df, analysis_variables, filters, exp_range)
+
+
+def _select_log_data(
+    data: pd.DataFrame,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+) -> pd.DataFrame:
+    data = _filter_exp_range(data, exp_range)
+    data = _filter_log_data(data, filters)
+    if analysis_variables is not None:
+        data = data[_DEFAULT_COLUMNS + analysis_variables]
+    return data
+
+
+def _get_tsv_files(log_dir: Path, exp_range: Tuple[int, int] = None) -> List[Path]:
+    # Compressed logs are read transparently, e.g. data-log.tsv.gz
+    data_files = [
+        data_file
+        for data_file in sorted(log_dir.rglob("data-log*.tsv*"))
+        if data_file.name.endswith(_TSV_FILE_SUFFIXES)
+    ]
+    if exp_range is None:
+        return data_files
+
+    # Segments listed in a manifest are skipped if they are out of range;
+    # unlisted ones may still be written to, so they are always read
+    segments = {}
+    for block_dir in set(data_file.parent for data_file in data_files):
+        for segment in read_segment_manifest(str(block_dir)):
+            segments[block_dir / segment["file"]] = segment
+    return [
+        data_file
+        for data_file in data_files
+        if data_file not in segments
+        or _in_exp_range(
+            segments[data_file]["min_exp_num"],
+            segments[data_file]["max_exp_num"],
+            exp_range,
+        )
+    ]
+
+
+def _read_tsv_file(data_file: Path, usecols=None, dtypes: dict = None) -> pd.DataFrame:
+    if data_file.suffix in (".gz", ".zst"):
+        data = _skip_torn_row(_decompress_tsv_file(data_file), data_file)
+        return _parse_tsv(io.BytesIO(data), usecols, dtypes)
+
+    # Rows always end with a newline, so only a torn file needs to be copied
+    with open(data_file, "rb") as tsv_file:
+        tsv_file.seek(0, os.SEEK_END)
+        if tsv_file.tell():
+            tsv_file.seek(-1, os.SEEK_END)
+            if tsv_file.read(1) != b"\n":
+                tsv_file.seek(0)
+                data = _skip_torn_row(tsv_file.read(), data_file)
+                return _parse_tsv(io.BytesIO(data), usecols, dtypes)
+    return _parse_tsv(data_file, usecols, dtypes)
+
+
+def _parse_tsv(source, usecols=None, dtypes: dict = None) -> pd.DataFrame:
+    if usecols is not None:
+        usecols = usecols.__contains__
+    try:
+        return pd.read_csv(source, sep="\t", usecols=usecols, dtype=dtypes)
+    except ValueError:
+        if dtypes is None:
+            raise
+    # Values which don't fit the declared dtypes are left to type inference,
+    # e.g. for validate_log to report malformed logs
+    if isinstance(source, io.BytesIO):
+        source.seek(0)
+    return pd.read_csv(source, sep="\t", usecols=usecols)
+
+
+def _decompress_tsv_file(data_file: Path) -> bytes:
+    if data_file.suffix == ".gz":
+        compressed_file = gzip.open(data_file, "rb")
+        stream_errors = (EOFError,)
+    else:
+        if zstandard is None:
+            raise RuntimeError(
+                "Reading zstd compressed logs requires the zstandard package"
+            )
+        # Appending to a log adds a new zstd frame, so all frames must be read
+        compressed_file = zstandard.ZstdDecompressor().stream_reader(
+            open(data_file, "rb"), read_across_frames=True, closefd=True
+        )
+        stream_errors = (EOFError, zstandard.ZstdError)
+
+    # A logger that crashed mid-write leaves a truncated stream, in which case
+    # everything decompressed up to that point is kept. read1 is used since a
+    # buffered read discards what it decompressed if the stream ends early.
+    chunks = []
+    with compressed_file:
+        try:
+            while True:
+                chunk = compressed_file.read1(1 << 16)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        except stream_errors:
+            logger.warning(f"Compressed log {data_file} is truncated")
+    return b"".join(chunks)
+
+
+def _skip_torn_row(data: bytes, data_file: Path) -> bytes:
+    if data and not data.endswith(b"\n"):
+        logger.warning(f"Skipping torn final row of {data_file}")
+        data = data[: data.rfind(b"\n") + 1]
+    return data
+
+
+def _iter_tsv_log_data(
+    log_dir: Path,
+    chunksize: int,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+) -> Iterator[pd.DataFrame]:
+    data_files = _get_tsv_files(log_dir, exp_range) or _get_tsv_files(log_dir)[:1]
+    if not data_files:
+        return
+
+    # Strings are declared too, so that every chunk has the same dtypes
+    dtypes = {
+        column: str if dtype == "category" else dtype
+        for column, dtype in _get_log_dtypes(log_dir).items()
+    }
+    file_chunksize = max(_MIN_FILE_CHUNK_ROWS, chunksize // len(data_files))
+    streams = [
+        _TSVStream(
+            data_file, file_chunksize, dtypes, analysis_variables, filters, exp_range
+        )
+        for data_file in data_files
+    ]
 
-    for data_file in fully_qualified_dir.rglob("data-log.tsv"):
+    # Each round, every row up to the smallest last (exp_num, block_num) read
+    # from the files which aren't done is merged in, since the rest of those
+    # files can only come after it
+    pending, num_pending = [], 0
+    try:
+        while True:
+            for stream in streams:
+                stream.fill()
+            keys = [stream.last_key for stream in streams if not stream.done]
+            if not keys and not any(stream.has_rows for stream in streams):
+                break
+            rows = [stream.take(min(keys) if keys else None) for stream in streams]
+            rows = [frame for frame in rows if frame is not None]
+            if not rows:
+                continue
+            merged = pd.concat(rows).sort_values(
+                ["exp_num", "block_num"], ignore_index=True, kind="stable"
+            )
+            pending.append(merged)
+            num_pending += len(merged)
+            while num_pending >= chunksize:
+                logs = pd.concat(pending, ignore_index=True)
+                yield logs.iloc[:chunksize].reset_index(drop=True)
+                pending, num_pending = [logs.iloc[chunksize:]], len(logs) - chunksize
+    finally:
+        for stream in streams:
+            stream.close()
+    if num_pending:
+        yield pd.concat(pending, ignore_index=True)
+
+
+class _TSVStream:
+    # Reads a data log file a chunk at a time, keeping the rows read which
+    # haven't been taken yet from _start on. Rows are checked to be sorted by
+    # exp_num; every row of a file has the same block_num.
+    def __init__(
+        self,
+        data_file: Path,
+        chunksize: int,
+        dtypes: dict,
+        analysis_variables: List[str] = None,
+        filters: dict = None,
+        exp_range: Tuple[int, int] = None,
+    ) -> None:
+        self._data_file = data_file
+        self._chunksize = chunksize
+        self._dtypes = dtypes
+        self._analysis_variables = analysis_variables
+        self._filters = filters
+        self._exp_range = exp_range
+        self._usecols = None
         if analysis_variables is not None:
-            default_cols = [
-                "block_num",
-                "exp_num",
-                "block_type",
-                "worker_id",
-                "task_name",
-                "task_params",
-                "exp_status",
-                "timestamp",
-            ]
-            df = pd.read_csv(data_file, sep="\t")[default_cols + analysis_variables]
+            self._usecols = set(_DEFAULT_COLUMNS + analysis_variables).union(
+                filters or {}
+            )
+        self._rows = None
+        self._exp_nums = None
+        self._block_num = None
+        self._start = 0
+        self._rows_read = 0
+        self._last_exp_num = None
+        self.last_key = None
+        self.done = False
+        self._reader = self._open()
+
+    @property
+    def has_rows(self) -> bool:
+        return self._rows is not None
+
+    def fill(self) -> None:
+        # reads chunks until some rows are left after filtering, or the end
+        while self._rows is None and not self.done:
+            chunk = self._read_chunk()
+            if chunk is None or not len(chunk):
+                self.close()
+                return
+            exp_nums = chunk["exp_num"].to_numpy()
+            if (
+                self._last_exp_num is not None and exp_nums[0] < self._last_exp_num
+            ) or np.any(exp_nums[:-1] > exp_nums[1:]):
+                raise RuntimeError(f"{self._data_file} is not sorted by exp_num")
+            self._last_exp_num = exp_nums[-1]
+            self.last_key = (exp_nums[-1], chunk["block_num"].iloc[-1])
+            stop = (self._exp_range or (None, None))[1]
+            if stop is not None and exp_nums[-1] >= stop:
+                # the rest of the file is out of range
+                self.close()
+            chunk = _select_log_data(
+                chunk, self._analysis_variables, self._filters, self._exp_range
+            )
+            if len(chunk):
+                self._rows = chunk
+                self._exp_nums = chunk["exp_num"].to_numpy()
+                self._block_num = chunk["block_num"].iloc[0]
+                self._start = 0
+
+    def take(self, max_key: tuple = None) -> pd.DataFrame:
+        # returns the rows up to (exp_num, block_num) max_key, or all of them
+        if self._rows is None:
+            return None
+        end = len(self._rows)
+        if max_key is not None:
+            side = "right" if self._block_num <= max_key[1] else "left"
+            end = np.searchsorted(self._exp_nums, max_key[0], side=side)
+        if end <= self._start:
+            return None
+        rows = self._rows.iloc[self._start : end]
+        if end == len(self._rows):
+            self._rows = self._exp_nums = None
         else:
-            df = pd.read_csv(data_file, sep="\t")
-        if logs is None:
-            logs = df
+            self._start = end
+        return rows
+
+    def close(self) -> None:
+        self.done = True
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _open(self, skip_rows: int = 0):
+        stream = io.BufferedReader(_CompleteRowsStream(self._data_file))
+        usecols = self._usecols.__contains__ if self._usecols is not None else None
+        return pd.read_csv(
+            stream,
+            sep="\t",
+            usecols=usecols,
+            dtype=self._dtypes,
+            chunksize=self._chunksize,
+            skiprows=range(1, skip_rows + 1) if skip_rows else None,
+        )
+
+    def _read_chunk(self) -> pd.DataFrame:
+        try:
+            chunk = next(self._reader)
+        except StopIteration:
+            return None
+        except ValueError:
+            if self._dtypes is None:
+                raise
+            # Values which don't fit the declared dtypes are left to type
+            # inference from here on, as read_log_data does
+            self._reader.close()
+            self._dtypes = None
+            self._reader = self._open(self._rows_read)
+            return self._read_chunk()
+        self._rows_read += len(chunk)
+        return chunk
+
+
+class _CompleteRowsStream(io.RawIOBase):
+    # Reads a data log file, decompressed if needed, up to the end of its last
+    # complete row, like _read_tsv_file but without reading it all at once
+    def __init__(self, data_file: Path) -> None:
+        self._data_file = data_file
+        self._stream_errors = (EOFError,)
+        if data_file.suffix == ".gz":
+            self._stream = gzip.open(data_file, "rb")
+        elif data_file.suffix == ".zst":
+            if zstandard is None:
+                raise RuntimeError(
+                    "Reading zstd compressed logs requires the zstandard package"
+                )
+            self._stream = zstandard.ZstdDecompressor().stream_reader(
+                open(data_file, "rb"), read_across_frames=True, closefd=True
+            )
+            self._stream_errors = (EOFError, zstandard.ZstdError)
         else:
-            logs = pd.concat([logs, df])
+            self._stream = open(data_file, "rb")
+        # complete rows not returned yet, and the bytes after the last newline
+        self._rows = memoryview(b"")
+        self._partial_row = b""
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not len(self._rows) and not self._eof:
+            try:
+                data = self._stream.read1(max(len(buffer), 1 << 16))
+            except self._stream_errors:
+                logger.warning(f"Compressed log {self._data_file} is truncated")
+                data = b""
+            if not data:
+                self._eof = True
+                if self._partial_row:
+                    logger.warning(f"Skipping torn final row of {self._data_file}")
+                break
+            data = self._partial_row + data
+            end = data.rfind(b"\n") + 1
+            self._rows, self._partial_row = memoryview(data)[:end], data[end:]
+        size = min(len(buffer), len(self._rows))
+        buffer[:size] = self._rows[:size]
+        self._rows = self._rows[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+
+def _read_arrow_log_data(
+    log_dir: Path,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+    jobs: int = None,
+    processes: bool = False,
+) -> pd.DataFrame:
+    if pa is None:
+        raise RuntimeError("Reading arrow logs requires the pyarrow package")
+
+    columns = None
+    if analysis_variables is not None:
+        # Filtered columns are read too, and dropped once the filters are applied
+        columns = _DEFAULT_COLUMNS + analysis_variables
+        columns += [column for column in filters or {} if column not in columns]
+
+    # Columns are typed in the files, so no type inference is needed
+    data_files = sorted(log_dir.rglob("data-log*.arrow"))
+    data_files += sorted(log_dir.rglob("data-log*.parquet"))
+    read_file = partial(_read_arrow_data_file, columns=columns)
+    tables = _read_files(read_file, data_files, jobs, processes)
+
+    logs = _filter_exp_range(pa.concat_tables(tables).to_pandas(), exp_range)
+    logs = _filter_log_data(logs, filters)
+    if analysis_variables is not None:
+        logs = logs[_DEFAULT_COLUMNS + analysis_variables]
 
-    logs = logs.sort_values(["exp_num", "block_num"], ignore_index=True)
-    logs["task_name"] = np.char.lower(list(logs["task_name"]))
+    return logs
 
-    # Add default values for block subtype if it doesn't exist
-    if "block_subtype" not in logs.columns:
-        logs["block_subtype"] = "wake"
 
-    return logs
+def _read_arrow_data_file(data_file: Path, columns: List[str] = None):
+    if data_file.suffix == ".parquet":
+        return pq.read_table(data_file, columns=columns)
+    with pa.OSFile(str(data_file)) as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table if columns is None else table.select(columns)
+
+
+def _read_sqlite_log_data(
+    log_dir: Path,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+    jobs: int = None,
+    processes: bool = False,
+) -> pd.DataFrame:
+    data_file = log_dir / SQLiteSink.FILE_NAME
+    if not data_file.exists():
+        raise FileNotFoundError(f"SQLite data log not found!")
+
+    # Column selection and filters are pushed down to the query, and the whole
+    # log is read by that one query whatever the number of jobs
+    query, params = _get_sqlite_query(analysis_variables, filters, exp_range)
+    connection = sqlite3.connect(str(data_file))
+    try:
+        return pd.read_sql_query(query, connection, params=params)
+    finally:
+        connection.close()
+
+
+def _iter_sqlite_log_data(
+    log_dir: Path,
+    chunksize: int,
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+) -> Iterator[pd.DataFrame]:
+    data_file = log_dir / SQLiteSink.FILE_NAME
+    if not data_file.exists():
+        raise FileNotFoundError(f"SQLite data log not found!")
+
+    # rows with the same exp_num and block_num stay in the order they were logged
+    query, params = _get_sqlite_query(analysis_variables, filters, exp_range)
+    query += " ORDER BY " + ", ".join(
+        quote_identifier(column) for column in ["exp_num", "block_num"]
+    )
+    query += ", rowid"
+    connection = sqlite3.connect(str(data_file))
+    try:
+        yield from pd.read_sql_query(
+            query, connection, params=params, chunksize=chunksize
+        )
+    finally:
+        connection.close()
+
+
+def _get_sqlite_query(
+    analysis_variables: List[str] = None,
+    filters: dict = None,
+    exp_range: Tuple[int, int] = None,
+) -> Tuple[str, list]:
+    columns = "*"
+    if analysis_variables is not None:
+        columns = ", ".join(
+            quote_identifier(column) for column in _DEFAULT_COLUMNS + analysis_variables
+        )
+    query = f"SELECT {columns} FROM {quote_identifier(SQLiteSink.TABLE_NAME)}"
+    conditions = []
+    params = []
+    for column, values in (filters or {}).items():
+        values = _get_filter_values(values)
+        placeholders = ", ".join("?" for _ in values)
+        conditions.append(f"{quote_identifier(column)} IN ({placeholders})")
+        params.extend(values)
+    start, stop = exp_range or (None, None)
+    if start is not None:
+        conditions.append(f"{quote_identifier('exp_num')} >= ?")
+        params.append(start)
+    if stop is not None:
+        conditions.append(f"{quote_identifier('exp_num')} < ?")
+        params.append(stop)
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
+
+
+_LOG_READERS = {
+    "tsv": _read_tsv_log_data,
+    "arrow": _read_arrow_log_data,
+    "sqlite": _read_sqlite_log_data,
+}
 
 
 def fill_regime_num(data: pd.DataFrame) -> pd.DataFrame:
@@ -169,27 +986,168 @@ def fill_regime_num(data: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: The log data with regime numbers filled in.
     """
 
-    block_nums = data.block_num.to_numpy()
-    block_types = data.block_type.to_numpy()
-    block_subtypes = data.block_subtype.to_numpy()
-    task_names = data.task_name.to_numpy()
+    regimes, _ = _get_regime_nums(data)
+
+    # Set regime numbers in data
+    data.insert(1, "regime_num", regimes)
+
+    return data
+
+
+def iter_fill_regime_num(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Add regime numbers to chunks of log data, as fill_regime_num does to the whole log data.
+
+    Args:
+        chunks (Iterator[pd.DataFrame]): Chunks of log data, e.g. from iter_log_data.
+
+    Yields:
+        pd.DataFrame: The next chunk, with regime numbers carried on from the previous ones.
+    """
+
+    last_key, last_regime_num = None, -1
+    for chunk in chunks:
+        regimes, last_key = _get_regime_nums(chunk, last_key, last_regime_num)
+        if len(regimes):
+            last_regime_num = int(regimes[-1])
+        chunk.insert(1, "regime_num", regimes)
+        yield chunk
+
+
+def iter_complete(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Keep only the completed experiences of chunks of log data.
+
+    Args:
+        chunks (Iterator[pd.DataFrame]): Chunks of log data, e.g. from iter_log_data.
+
+    Yields:
+        pd.DataFrame: The completed experiences of the next chunk which has any.
+    """
+
+    for chunk in chunks:
+        chunk = chunk[chunk["exp_status"] == "complete"]
+        if len(chunk):
+            yield chunk.reset_index(drop=True)
+
+
+def _get_regime_nums(data: pd.DataFrame, last_key: tuple = None, last_regime_num=-1):
+    # Numbers the regimes of data following a row with the given regime key and
+    # number, if any, and returns the regime numbers and the last row's key
+    keys = [data[column].to_numpy() for column in _REGIME_COLUMNS]
+    if not len(data):
+        return np.zeros(0, dtype=int), last_key
 
     # Get indices where a regime change has occurred
-    changes = (
-        (block_nums[:-1] != block_nums[1:])
-        + (block_types[:-1] != block_types[1:])
-        + (block_subtypes[:-1] != block_subtypes[1:])
-        + (task_names[:-1] != task_names[1:])
-    )
+    changes = np.zeros(len(data), dtype=bool)
+    changes[0] = last_key is None
+    for i, values in enumerate(keys):
+        changes[1:] |= values[:-1] != values[1:]
+        if last_key is not None:
+            changes[0] |= values[0] != last_key[i]
 
     # Number the regime changes
-    regimes = [np.count_nonzero(changes[:i]) for i, _ in enumerate(changes)]
-    regimes.append(regimes[-1] + 1 if changes[-1] else regimes[-1])
+    regimes = last_regime_num + np.cumsum(changes)
+    return regimes, tuple(values[-1] for values in keys)
 
-    # Set regime numbers in data
-    data.insert(1, "regime_num", regimes)
 
-    return data
+class _FollowedFile:
+    __slots__ = ("header", "offset")
+
+    def __init__(self, header: bytes) -> None:
+        self.header = header
+        # the end of the last complete row read
+        self.offset = len(header)
+
+
+class LogFollower:
+    """Incrementally read the rows appended to the TSV logs of a running scenario.
+
+    Each call to poll reads only the complete rows appended to each data log file since the
+    previous call, including the files of new worker/block directories and segments. The rows
+    are returned with regime numbers carried forward from the previous calls, numbered as
+    fill_regime_num does, which assumes rows are appended in order of experience number.
+    Compressed logs cannot be followed and are skipped.
+
+    Args:
+        log_dir (Path): The top-level log directory.
+
+    Raises:
+        FileNotFoundError: If log directory is not found.
+        RuntimeError: If the logs were not written by the TSV sink.
+    """
+
+    def __init__(self, log_dir: Path) -> None:
+        self._log_dir = get_fully_qualified_name(log_dir)
+        if not self._log_dir.is_dir():
+            raise FileNotFoundError(f"Log directory not found!")
+        if get_log_sink(self._log_dir) != "tsv":
+            raise RuntimeError("Only tsv logs can be followed")
+        self._dtypes = _get_parse_dtypes(self._log_dir)
+        self._files = {}
+        self._skipped_files = set()
+        self._last_regime_key = None
+        self._last_regime_num = -1
+
+    def poll(self) -> pd.DataFrame:
+        """Read the rows appended to the logs since the previous call.
+
+        Returns:
+            pd.DataFrame: The new rows sorted by exp_num with their regime_num, which is empty if
+                there are none. Unlike read_log_data, strings are not read as categoricals, so
+                that the results of several calls can be concatenated.
+        """
+
+        frames = []
+        for data_file in _get_tsv_files(self._log_dir):
+            if data_file.suffix != ".tsv":
+                if data_file not in self._skipped_files:
+                    logger.warning(f"Skipping compressed log {data_file}")
+                    self._skipped_files.add(data_file)
+                continue
+            frame = self._read_new_rows(data_file)
+            if frame is not None:
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+
+        delta = pd.concat(frames)
+        delta = delta.sort_values(
+            ["exp_num", "block_num"], ignore_index=True, kind="stable"
+        )
+        delta["task_name"] = delta["task_name"].str.lower()
+        if "block_subtype" not in delta.columns:
+            delta["block_subtype"] = "wake"
+        regimes, self._last_regime_key = _get_regime_nums(
+            delta, self._last_regime_key, self._last_regime_num
+        )
+        self._last_regime_num = int(regimes[-1])
+        delta.insert(1, "regime_num", regimes)
+        return delta
+
+    def _read_new_rows(self, data_file: Path) -> pd.DataFrame:
+        followed = self._files.get(data_file)
+        with open(data_file, "rb") as tsv_file:
+            size = tsv_file.seek(0, os.SEEK_END)
+            if followed is not None and size < followed.offset:
+                logger.warning(f"{data_file} was truncated, reading it from the start")
+                followed = None
+            if followed is None:
+                # the header may not be complete yet
+                tsv_file.seek(0)
+                header = tsv_file.readline()
+                if not header.endswith(b"\n"):
+                    return None
+                followed = self._files[data_file] = _FollowedFile(header)
+            if size == followed.offset:
+                return None
+            tsv_file.seek(followed.offset)
+            data = tsv_file.read(size - followed.offset)
+
+        # a partial last row is read once it is complete
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return None
+        followed.offset += end
+        return _parse_tsv(io.BytesIO(followed.header + data[:end]), dtypes=self._dtypes)
 
 
 def parse_blocks(data: pd.DataFrame, include_task_params: bool = True) -> pd.DataFrame:
@@ -208,9 +1166,10 @@ def parse_blocks(data: pd.DataFrame, include_task_params: bool = True) -> pd.Dat
     if include_task_params:
         cols.append("task_params")
 
+    # Only the combinations of categoricals found in the data are blocks
     blocks_df = (
         data.reset_index(drop=True)
-        .groupby(cols, as_index=False, dropna=False)
+        .groupby(cols, as_index=False, dropna=False, observed=True)
         .size()
         .rename(columns={"size": "length"})
     )
@@ -372,8 +1331,9 @@ def validate_log(data: pd.DataFrame, metric_fields: List[str]) -> None:
     block_types = data.block_type.to_numpy()
     block_subtypes = data.get("block_subtype", [])
     exp_statuses = data.exp_status.to_numpy()
-    worker_ids = data.worker_id.to_numpy()
-    task_params = data.task_params.fillna("").to_numpy()
+    # Strings are validated once per distinct value
+    worker_ids = pd.unique(data.worker_id)
+    task_params = pd.unique(data.task_params.dropna())
 
     # Validate task naming convention
     if None in [
@@ -417,6 +1377,6 @@ def validate_log(data: pd.DataFrame, metric_fields: List[str]) -> None:
 
     # Validate task parameters is valid JSON
     try:
-        [json.loads(task_param) for task_param in task_params if task_param != ""]
+        [json.loads(task_param) for task_param in task_params]
     except:
         raise RuntimeError("task_params must be valid json")
@@ -39,12 +39,22 @@ def run():
     # Log directories can be absolute paths, relative paths, or paths found in $L2DATA/logs
     parser.add_argument("log_dir", type=str, help="Log directory of scenario")
 
+    # Number of log files read in parallel
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="Number of files to read at once"
+    )
+
+    # Cache the parsed logs in the log directory for later runs
+    parser.add_argument(
+        "--cache", action="store_true", help="Cache parsed logs in the log directory"
+    )
+
     # Parse arguments
     args = parser.parse_args()
     log_dir = Path(args.log_dir)
 
     # Attempt to read log data
-    log_data = util.read_log_data(log_dir)
+    log_data = util.read_log_data(log_dir, jobs=args.jobs, cache=args.cache)
 
     # Get metric fields
     logger_info = util.read_logger_info(log_dir)
@@ -29,4 +29,6 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=["numpy", "pandas>=1.1.1", "tabulate"],
+    extras_require={"arrow": ["pyarrow"], "zstd": ["zstandard"]},
+    entry_points={"console_scripts": ["l2logger=l2logger.__main__:main"]},
 )
@@ -0,0 +1,164 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from l2logger import util
+from l2logger.async_logger import AsyncDataLogger
+
+RECORD = {
+    "block_num": 0,
+    "exp_num": 0,
+    "worker_id": "worker0",
+    "block_type": "train",
+    "task_name": "task_a",
+    "task_params": {"param1": 1},
+    "reward": 1.0,
+}
+
+
+# asyncio.run needs Python 3.7
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestAsyncLogger(unittest.TestCase):
+    def testAsyncLogging(self):
+        async def log(base_dir):
+            async with AsyncDataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}, batch_size=7
+            ) as logger:
+                for exp_num in range(20):
+                    await logger.log_record(
+                        dict(RECORD, exp_num=exp_num, block_num=exp_num // 10)
+                    )
+                await logger.log_records(
+                    [
+                        dict(RECORD, exp_num=exp_num, block_num=2)
+                        for exp_num in range(20, 30)
+                    ]
+                )
+                await logger.flush()
+                logs = util.read_log_data(Path(logger.scenario_dir))
+                self.assertEqual(list(logs["exp_num"]), list(range(30)))
+            with self.assertRaises(RuntimeError) as context:
+                await logger.log_record(dict(RECORD, exp_num=30))
+            self.assertEqual(str(context.exception), "logger is closed")
+            return logger.scenario_dir
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dir = run(log(base_dir))
+            logs = util.read_log_data(Path(scenario_dir))
+            self.assertEqual(list(logs["block_num"]), [0] * 10 + [1] * 10 + [2] * 10)
+
+    def testBatchDelay(self):
+        async def log(base_dir):
+            async with AsyncDataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}, max_delay_ms=10
+            ) as logger:
+                await logger.log_record(RECORD)
+                log_file = os.path.join(
+                    logger.scenario_dir, "worker0", "0-train", "data-log.tsv"
+                )
+                self.assertFalse(os.path.exists(log_file))
+
+                # waits until the timer has submitted the batch, and it's written
+                async def wait_for_batch():
+                    for _ in range(500):
+                        if not logger._batch and all(
+                            future.done() for future in logger._pending
+                        ):
+                            return
+                        await asyncio.sleep(0.01)
+
+                # a partial batch is written once max_delay_ms has passed
+                await wait_for_batch()
+                with open(log_file) as f:
+                    self.assertEqual(len(f.readlines()), 2)
+                # finished writes of partial batches aren't kept around
+                for exp_num in range(1, 6):
+                    await logger.log_record(dict(RECORD, exp_num=exp_num))
+                    await wait_for_batch()
+                self.assertEqual(len(logger._pending), 1)
+
+                # and their errors are raised by the next call
+                def write_rows(rows):
+                    raise OSError("disk full")
+
+                logger.logger._write_rows = write_rows
+                await logger.log_record(dict(RECORD, exp_num=6))
+                await wait_for_batch()
+                with self.assertRaises(RuntimeError):
+                    await logger.log_record(dict(RECORD, exp_num=7))
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            # the error is raised again on close
+            with self.assertRaises(RuntimeError) as context:
+                run(log(base_dir))
+            self.assertIn("disk full", str(context.exception))
+
+    def testAsyncErrors(self):
+        async def log(base_dir):
+            logger = AsyncDataLogger(base_dir, "test", {"metrics_columns": ["reward"]})
+            with self.assertRaises(RuntimeError):
+                await logger.log_record(RECORD)
+            await logger.open()
+            # invalid records raise inline
+            with self.assertRaises(RuntimeError):
+                await logger.log_record(dict(RECORD, block_type="sleep"))
+            with self.assertRaises(RuntimeError):
+                await logger.log_records([RECORD, dict(RECORD, exp_num=-1)])
+
+            # errors on the writer thread are raised by later calls
+            def write_rows(rows):
+                raise OSError("disk full")
+
+            logger.logger._write_rows = write_rows
+            await logger.log_record(RECORD)
+            with self.assertRaises(RuntimeError):
+                await logger.flush()
+            with self.assertRaises(RuntimeError):
+                await logger.log_record(RECORD)
+            with self.assertRaises(RuntimeError):
+                await logger.close()
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            run(log(base_dir))
+            self.assertRaises(
+                RuntimeError,
+                AsyncDataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                batch_size=0,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from l2logger import l2logger, util
+from l2logger.collector import CollectorDataLogger
+
+NUM_WORKERS = 4
+RECORDS_PER_WORKER = 50
+
+
+def log_worker(proxy, worker_index):
+    # workers take interleaved exp nums, so only their own are in order
+    for i in range(RECORDS_PER_WORKER):
+        block_num = 0 if i < RECORDS_PER_WORKER // 2 else 1
+        proxy.log_record(
+            {
+                "block_num": block_num,
+                "exp_num": i * NUM_WORKERS + worker_index,
+                "block_type": "train" if block_num == 0 else "test",
+                "task_name": "task_a",
+                "task_params": {"param1": block_num},
+                "reward": float(i),
+            }
+        )
+    proxy.close()
+
+
+class TestCollector(unittest.TestCase):
+    def testCollector(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            collector = CollectorDataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}, batch_size=7
+            )
+            workers = [
+                multiprocessing.Process(
+                    target=log_worker,
+                    args=(collector.get_proxy(f"worker{i}"), i),
+                )
+                for i in range(NUM_WORKERS)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            stats = collector.close()
+            self.assertEqual(stats["records"], NUM_WORKERS * RECORDS_PER_WORKER)
+            self.assertEqual(stats["rejected_records"], 0)
+            self.assertEqual(stats["proxies"], NUM_WORKERS)
+            self.assertEqual(collector.close(), stats)
+
+            logs = util.read_log_data(Path(collector.scenario_dir))
+            self.assertEqual(
+                list(logs["exp_num"]), list(range(NUM_WORKERS * RECORDS_PER_WORKER))
+            )
+            for worker_id, worker_logs in logs.groupby("worker_id"):
+                self.assertEqual(len(worker_logs), RECORDS_PER_WORKER)
+                self.assertEqual(list(worker_logs["reward"]), list(range(50)))
+            self.assertRaises(RuntimeError, collector.get_proxy)
+
+    def testSharedMemoryTransport(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            logs = {}
+            for transport in ["queue", "shm"]:
+                collector = CollectorDataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    batch_size=7,
+                    transport=transport,
+                    ring_size=16,
+                )
+                self.assertEqual(collector.transport, transport)
+                workers = [
+                    multiprocessing.Process(
+                        target=log_worker,
+                        args=(collector.get_proxy(f"worker{i}"), i),
+                    )
+                    for i in range(NUM_WORKERS)
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                stats = collector.close()
+                self.assertEqual(stats["records"], NUM_WORKERS * RECORDS_PER_WORKER)
+                self.assertEqual(stats["proxies"], NUM_WORKERS)
+                scenario_dir = Path(collector.scenario_dir)
+                logs[transport] = util.read_log_data(scenario_dir)
+            pd.testing.assert_frame_equal(
+                logs["queue"].drop(columns=["timestamp"]),
+                logs["shm"].drop(columns=["timestamp"]),
+            )
+
+    def testSharedMemoryErrors(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            self.assertRaises(
+                RuntimeError,
+                CollectorDataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                transport="pipe",
+            )
+            self.assertRaises(
+                RuntimeError,
+                CollectorDataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                transport="shm",
+                ring_size=10,
+            )
+            # shared memory isn't available before Python 3.8
+            with mock.patch("l2logger.collector.resource_tracker", None):
+                self.assertRaises(
+                    RuntimeError,
+                    CollectorDataLogger,
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    transport="shm",
+                )
+            collector = CollectorDataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}, transport="shm"
+            )
+            proxy = collector.get_proxy("worker0")
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {"param1": 1},
+                "reward": 1,
+            }
+            # values which can't be encoded are rejected by the proxy
+            for invalid in [
+                dict(record, debug_info=""),
+                dict(record, timestamp=""),
+                dict(record, block_num=1.0),
+                dict(record, task_params=[]),
+                dict(record, reward="1"),
+                dict(record, block_type=[]),
+            ]:
+                self.assertRaises(RuntimeError, proxy.log_record, invalid)
+            # while invalid values are rejected by the collector, along with
+            # any other rows it reads at the same time
+            proxy.log_record(record)
+            proxy.log_record(dict(record, block_type="sleep"))
+            proxy.close()
+            with self.assertRaises(RuntimeError) as context:
+                collector.close()
+            self.assertIn("block_type must be one of", str(context.exception))
+            self.assertEqual(collector.stats["rejected_records"], 2)
+
+    def testCollectorErrors(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            collector = CollectorDataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}, batch_size=2
+            )
+            proxy = collector.get_proxy("worker0")
+            self.assertRaises(RuntimeError, proxy.log_record, [])
+            record = {
+                "block_num": 0,
+                "exp_num": 5,
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {},
+                "reward": 1,
+            }
+            proxy.log_records([record, record])
+            # the second batch goes back in exp_num, and is rejected as a whole
+            proxy.log_records([dict(record, exp_num=6), dict(record, exp_num=4)])
+            proxy.close()
+            with self.assertRaises(RuntimeError) as context:
+                collector.close()
+            self.assertIn("exp_num must be non-decreasing", str(context.exception))
+            self.assertEqual(collector.stats["records"], 2)
+            self.assertEqual(collector.stats["rejected_records"], 2)
+            logs = util.read_log_data(Path(collector.scenario_dir))
+            self.assertEqual(list(logs["exp_num"]), [5, 5])
+
+            self.assertRaises(
+                RuntimeError,
+                CollectorDataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                async_mode=True,
+            )
+
+    def testPerWorkerOrdering(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            logger = l2logger.DataLogger(
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                per_worker_ordering=True,
+            )
+            record = {
+                "block_num": 1,
+                "exp_num": 10,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "task_a",
+                "task_params": {},
+                "reward": 1,
+            }
+            logger.log_record(record)
+            logger.log_record(dict(record, worker_id="worker1", block_num=0, exp_num=0))
+            logger.log_records(
+                [
+                    dict(record, worker_id="worker1", exp_num=1),
+                    dict(record, worker_id="worker2", block_num=0, exp_num=0),
+                ]
+            )
+            self.assertRaises(RuntimeError, logger.log_record, dict(record, exp_num=9))
+            columns = {field: [value] for field, value in record.items()}
+            columns.update(worker_id=["worker1"], exp_num=[0])
+            self.assertRaises(RuntimeError, logger.log_columns, columns)
+            logger.log_record(dict(record, worker_id="worker2", exp_num=1))
+            logger.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
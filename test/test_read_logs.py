@@ -0,0 +1,665 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+from l2logger import aggregate, l2logger, sinks, util
+
+
+class TestReadLogs(unittest.TestCase):
+    def helperLogScenario(self, base_dir, **logger_args):
+        logger = l2logger.DataLogger(
+            base_dir,
+            "test",
+            {"metrics_columns": ["reward"]},
+            timestamp_provider=lambda: "20200101T000000.000000",
+            **logger_args,
+        )
+        exp_num = 0
+        for block_num, block_type in enumerate(["train", "test", "train"]):
+            for worker in range(2):
+                for _ in range(5):
+                    logger.log_record(
+                        {
+                            "block_num": block_num,
+                            "exp_num": exp_num,
+                            "worker_id": f"worker{worker}",
+                            "block_type": block_type,
+                            "task_name": "Task_A" if block_num < 2 else "task_b",
+                            "task_params": {"param1": block_num},
+                            "reward": exp_num * 0.5,
+                        }
+                    )
+                    exp_num += 1
+        logger.close()
+        return logger.scenario_dir
+
+    def testReadTSV(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dir = self.helperLogScenario(base_dir)
+            self.assertEqual(util.get_log_sink(Path(scenario_dir)), "tsv")
+            logs = util.read_log_data(Path(scenario_dir))
+            self.assertEqual(len(logs), 30)
+            self.assertEqual(list(logs["exp_num"]), list(range(30)))
+            self.assertEqual(set(logs["task_name"]), {"task_a", "task_b"})
+            logs = util.fill_regime_num(logs)
+            self.assertEqual(logs["regime_num"].max(), 2)
+
+    def testDtypes(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dir = self.helperLogScenario(base_dir)
+            logs = util.read_log_data(Path(scenario_dir))
+            for column in ["block_num", "exp_num"]:
+                self.assertEqual(logs[column].dtype, "int64")
+            for column in ["block_type", "worker_id", "task_name", "task_params"]:
+                self.assertEqual(logs[column].dtype, "category")
+            self.assertEqual(logs["reward"].dtype, "float64")
+            self.assertEqual(
+                list(logs["task_name"].cat.categories), ["task_a", "task_b"]
+            )
+            blocks = util.parse_blocks(util.fill_regime_num(logs))
+            self.assertEqual(list(blocks["length"]), [10, 10, 10])
+
+            # only the columns needed are parsed
+            read_csv = pd.read_csv
+            parsed_columns = []
+
+            def read_and_record(*args, **kwargs):
+                logs = read_csv(*args, **kwargs)
+                parsed_columns.append(list(logs.columns))
+                return logs
+
+            with mock.patch("pandas.read_csv", read_and_record):
+                logs = util.read_log_data(
+                    Path(scenario_dir), [], filters={"task_name": "Task_A"}
+                )
+            self.assertEqual(len(logs), 20)
+            self.assertEqual(set(logs["block_subtype"]), {"wake"})
+            for columns in parsed_columns:
+                self.assertEqual(set(columns), set(util._DEFAULT_COLUMNS))
+
+            # values which don't fit the dtypes are read as they are
+            log_file = os.path.join(scenario_dir, "worker0", "0-train", "data-log.tsv")
+            with open(log_file) as f:
+                rows = f.readlines()
+            with open(log_file, "w") as f:
+                f.writelines(rows[:-1] + [rows[-1].replace("\t2.0\n", "\tunknown\n")])
+            logs = util.read_log_data(Path(scenario_dir))
+            self.assertEqual(len(logs), 30)
+            self.assertEqual(logs["reward"][4], "unknown")
+            self.assertEqual(logs["exp_num"].dtype, "int64")
+
+        # exp_nums beyond the int32 range are read as they are, in order
+        with tempfile.TemporaryDirectory() as base_dir:
+            logger = l2logger.DataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}
+            )
+            for exp_num in [5, 2**31 + 5]:
+                logger.log_record(
+                    {
+                        "block_num": 0,
+                        "exp_num": exp_num,
+                        "worker_id": "worker0",
+                        "block_type": "train",
+                        "task_name": "task_a",
+                        "task_params": {"param1": 0},
+                        "reward": 0.0,
+                    }
+                )
+            logger.close()
+            logs = util.read_log_data(Path(logger.scenario_dir))
+            self.assertEqual(list(logs["exp_num"]), [5, 2**31 + 5])
+            chunks = util.iter_log_data(Path(logger.scenario_dir), chunksize=1)
+            self.assertEqual(
+                [exp_num for chunk in chunks for exp_num in chunk["exp_num"]],
+                [5, 2**31 + 5],
+            )
+
+    def testParallelRead(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dirs = [
+                self.helperLogScenario(base_dir),
+                self.helperLogScenario(base_dir, sink_options={"segment_rows": 2}),
+            ]
+            if util.pa is not None:
+                scenario_dirs.append(self.helperLogScenario(base_dir, sink="arrow"))
+            read_args = [
+                {},
+                {"analysis_variables": ["reward"], "filters": {"block_type": "test"}},
+                {"exp_range": (3, 17)},
+            ]
+            for scenario_dir in scenario_dirs:
+                for args in read_args:
+                    expected = util.read_log_data(Path(scenario_dir), **args)
+                    for jobs, processes in [(1, False), (4, False), (2, True)]:
+                        logs = util.read_log_data(
+                            Path(scenario_dir), jobs=jobs, processes=processes, **args
+                        )
+                        pd.testing.assert_frame_equal(logs, expected)
+
+            for jobs in [0, 1.5]:
+                self.assertRaises(
+                    RuntimeError, util.read_log_data, Path(scenario_dirs[0]), jobs=jobs
+                )
+
+    def testIterLogData(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dirs = [
+                self.helperLogScenario(base_dir),
+                self.helperLogScenario(base_dir, sink_options={"segment_rows": 3}),
+                self.helperLogScenario(base_dir, sink="sqlite"),
+            ]
+            for scenario_dir in scenario_dirs:
+                expected = util.read_log_data(Path(scenario_dir))
+                for chunksize in [1, 7, 100]:
+                    chunks = list(
+                        util.iter_log_data(Path(scenario_dir), chunksize=chunksize)
+                    )
+                    self.assertEqual(len(chunks[0]), min(chunksize, 30))
+                    logs = pd.concat(chunks, ignore_index=True)
+                    pd.testing.assert_frame_equal(
+                        logs, expected, check_dtype=False, check_categorical=False
+                    )
+
+                args = {
+                    "analysis_variables": ["reward"],
+                    "filters": {"worker_id": "worker1"},
+                    "exp_range": (8, 28),
+                }
+                logs = pd.concat(
+                    util.iter_log_data(Path(scenario_dir), chunksize=4, **args),
+                    ignore_index=True,
+                )
+                pd.testing.assert_frame_equal(
+                    logs,
+                    util.read_log_data(Path(scenario_dir), **args),
+                    check_dtype=False,
+                    check_categorical=False,
+                )
+
+            # regimes are numbered and incomplete experiences dropped as with
+            # the whole log data, including by the aggregate command
+            scenario_dir = Path(scenario_dirs[0])
+            log_file = scenario_dir / "worker1" / "1-test" / "data-log.tsv"
+            with open(log_file) as f:
+                rows = f.readlines()
+            with open(log_file, "w") as f:
+                f.writelines(rows[:-1] + [rows[-1].replace("complete", "incomplete")])
+            expected = util.read_log_data(scenario_dir)
+            expected = util.fill_regime_num(
+                expected[expected["exp_status"] == "complete"].reset_index(drop=True)
+            )
+            chunks = util.iter_log_data(scenario_dir, chunksize=4)
+            logs = pd.concat(
+                util.iter_fill_regime_num(util.iter_complete(chunks)),
+                ignore_index=True,
+            )
+            self.assertEqual(len(logs), 29)
+            pd.testing.assert_frame_equal(
+                logs, expected, check_dtype=False, check_categorical=False
+            )
+            output = os.path.join(base_dir, "data")
+            aggregate.export_chunks(scenario_dir, 4, "tsv", output)
+            with open(output + ".tsv") as f:
+                self.assertEqual(f.read(), expected.to_csv(sep="\t", index=False))
+
+            # the same export from the command line, where chunks can't be read
+            # in parallel or cached
+            argv = ["aggregate", str(scenario_dir), "--chunksize", "4", "-o", output]
+            os.remove(output + ".tsv")
+            with mock.patch("sys.argv", argv):
+                aggregate.run()
+            with open(output + ".tsv") as f:
+                self.assertEqual(f.read(), expected.to_csv(sep="\t", index=False))
+            for option in [["-j", "2"], ["--cache"]]:
+                with mock.patch("sys.argv", argv + option), mock.patch(
+                    "sys.stderr"
+                ), self.assertRaises(SystemExit):
+                    aggregate.run()
+
+            # files must be sorted by exp_num to be merged
+            with open(log_file, "w") as f:
+                f.writelines([rows[0]] + rows[:0:-1])
+            self.assertRaises(
+                RuntimeError, list, util.iter_log_data(scenario_dir, chunksize=4)
+            )
+            self.assertRaises(
+                RuntimeError, list, util.iter_log_data(scenario_dir, chunksize=0)
+            )
+
+    def testLogFollower(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            logger = l2logger.DataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}
+            )
+            follower = util.LogFollower(Path(logger.scenario_dir))
+            self.assertEqual(len(follower.poll()), 0)
+
+            def log_block(block_num, block_type, task_name, exp_nums):
+                for exp_num in exp_nums:
+                    logger.log_record(
+                        {
+                            "block_num": block_num,
+                            "exp_num": exp_num,
+                            "worker_id": f"worker{exp_num % 2}",
+                            "block_type": block_type,
+                            "task_name": task_name,
+                            "task_params": {},
+                            "reward": exp_num * 0.5,
+                        }
+                    )
+
+            log_block(0, "train", "Task_A", range(0, 6))
+            log_block(1, "test", "task_a", range(6, 8))
+            first = follower.poll()
+            self.assertEqual(list(first["exp_num"]), list(range(8)))
+            self.assertEqual(list(first["regime_num"]), [0] * 6 + [1] * 2)
+            self.assertEqual(len(follower.poll()), 0)
+
+            # only complete rows are read, and regimes are carried forward
+            log_block(1, "test", "task_a", range(8, 10))
+            log_file = os.path.join(
+                logger.scenario_dir, "worker0", "1-test", "data-log.tsv"
+            )
+            with open(log_file) as f:
+                row = f.readlines()[-1].replace("\t8\t", "\t10\t", 1)
+            with open(log_file, "a") as f:
+                f.write(row[:10])
+            second = follower.poll()
+            self.assertEqual(list(second["exp_num"]), [8, 9])
+            self.assertEqual(list(second["regime_num"]), [1, 1])
+            with open(log_file, "a") as f:
+                f.write(row[10:])
+            log_block(2, "train", "task_b", range(11, 14))
+            third = follower.poll()
+            self.assertEqual(list(third["exp_num"]), [10, 11, 12, 13])
+            self.assertEqual(list(third["regime_num"]), [1, 2, 2, 2])
+            logger.close()
+
+            logs = pd.concat([first, second, third], ignore_index=True)
+            expected = util.fill_regime_num(
+                util.read_log_data(Path(logger.scenario_dir))
+            )
+            for column in ["exp_num", "regime_num", "task_name", "reward"]:
+                self.assertEqual(list(logs[column]), list(expected[column]))
+
+            scenario_dir = self.helperLogScenario(base_dir, sink="sqlite")
+            self.assertRaises(RuntimeError, util.LogFollower, Path(scenario_dir))
+
+    @unittest.skipIf(util.pa is None, "pyarrow is not installed")
+    def testLogCache(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            scenario_dir = Path(self.helperLogScenario(base_dir))
+            expected = util.read_log_data(scenario_dir)
+            read_files = []
+            read_tsv_file = util._read_tsv_file
+
+            def read_and_count(data_file, *args):
+                read_files.append(data_file)
+                return read_tsv_file(data_file, *args)
+
+            with mock.patch("l2logger.util._read_tsv_file", read_and_count):
+                logs = util.read_log_data(scenario_dir, cache=True)
+                pd.testing.assert_frame_equal(logs, expected)
+                self.assertEqual(len(read_files), 6)
+                with open(scenario_dir / ".l2cache" / "manifest.json") as f:
+                    self.assertEqual(len(json.load(f)["files"]), 6)
+
+                # a repeat read parses no files, and only changed ones once
+                # they change
+                logs = util.read_log_data(scenario_dir, cache=True, jobs=2)
+                pd.testing.assert_frame_equal(logs, expected)
+                self.assertEqual(len(read_files), 6)
+                log_file = scenario_dir / "worker1" / "2-train" / "data-log.tsv"
+                writer = sinks.TSVLogFile(str(log_file), list(expected.columns))
+                writer.add_row(dict(expected.iloc[-1], exp_num=30))
+                writer.close()
+                expected = util.read_log_data(scenario_dir)
+                self.assertEqual(len(expected), 31)
+                read_files.clear()
+                logs = util.read_log_data(scenario_dir, cache=True)
+                pd.testing.assert_frame_equal(logs, expected)
+                self.assertEqual(read_files, [log_file])
+
+                # and the cache is filtered like the logs
+                args = {
+                    "analysis_variables": ["reward"],
+                    "filters": {"worker_id": "worker1"},
+                    "exp_range": (5, 25),
+                }
+                read_files.clear()
+                logs = util.read_log_data(scenario_dir, cache=True, **args)
+                self.assertEqual(read_files, [])
+                pd.testing.assert_frame_equal(
+                    logs, util.read_log_data(scenario_dir, **args)
+                )
+
+            # a removed file's rows are dropped
+            os.remove(log_file)
+            logs = util.read_log_data(scenario_dir, cache=True)
+            pd.testing.assert_frame_equal(logs, util.read_log_data(scenario_dir))
+            self.assertEqual(len(logs), 25)
+
+            util.clear_log_cache(scenario_dir)
+            self.assertFalse((scenario_dir / ".l2cache").exists())
+            with self.assertLogs("l2logger.cache", "WARNING"):
+                logs = util.read_log_data(scenario_dir, cache=True, max_cache_bytes=1)
+            self.assertEqual(len(logs), 25)
+            self.assertFalse((scenario_dir / ".l2cache").exists())
+
+            scenario_dir = self.helperLogScenario(base_dir, sink="sqlite")
+            self.assertRaises(
+                RuntimeError, util.read_log_data, Path(scenario_dir), cache=True
+            )
+
+    @unittest.skipIf(util.pa is None, "pyarrow is not installed")
+    def testReadArrow(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            expected = util.read_log_data(Path(self.helperLogScenario(base_dir)))
+            for file_format in ["ipc", "parquet"]:
+                scenario_dir = self.helperLogScenario(
+                    base_dir,
+                    sink="arrow",
+                    sink_options={"file_format": file_format, "batch_rows": 3},
+                )
+                logs = util.read_log_data(Path(scenario_dir))
+                pd.testing.assert_frame_equal(logs, expected)
+                self.assertEqual(logs["reward"].dtype, "float64")
+                logs = util.read_log_data(Path(scenario_dir), ["reward"])
+                self.assertIn("reward", logs.columns)
+
+    def testReadSQLite(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            expected = util.read_log_data(Path(self.helperLogScenario(base_dir)))
+            scenario_dir = self.helperLogScenario(
+                base_dir, sink="sqlite", sink_options={"batch_rows": 4}
+            )
+            self.assertTrue(
+                os.path.exists(os.path.join(scenario_dir, "data-log.sqlite"))
+            )
+            self.assertEqual(list(Path(scenario_dir).rglob("data-log.tsv")), [])
+            logs = util.read_log_data(Path(scenario_dir))
+            pd.testing.assert_frame_equal(logs, expected, check_dtype=False)
+
+            # filters and column selection are applied by every reader
+            filters = {"block_num": 1, "worker_id": ["worker1"]}
+            logs = util.read_log_data(Path(scenario_dir), ["reward"], filters)
+            self.assertEqual(list(logs["exp_num"]), list(range(15, 20)))
+            tsv_logs = util.read_log_data(
+                Path(self.helperLogScenario(base_dir)), ["reward"], filters
+            )
+            pd.testing.assert_frame_equal(logs, tsv_logs, check_dtype=False)
+            logs = util.read_log_data(Path(scenario_dir), exp_range=(3, 8))
+            self.assertEqual(list(logs["exp_num"]), list(range(3, 8)))
+
+    def testReadCompressed(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            expected = util.read_log_data(Path(self.helperLogScenario(base_dir)))
+            compressions = {"gzip": "data-log.tsv.gz"}
+            if sinks.zstandard is not None:
+                compressions["zstd"] = "data-log.tsv.zst"
+            for compression, file_name in compressions.items():
+                scenario_dir = self.helperLogScenario(
+                    base_dir,
+                    sink_options={"compression": compression, "compression_level": 1},
+                )
+                self.assertEqual(len(list(Path(scenario_dir).rglob(file_name))), 6)
+                self.assertEqual(list(Path(scenario_dir).rglob("data-log.tsv")), [])
+                logs = util.read_log_data(Path(scenario_dir))
+                pd.testing.assert_frame_equal(logs, expected)
+
+                # reopening a file appends a new gzip member or zstd frame
+                logger = l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    max_open_writers=1,
+                    sink_options={"compression": compression},
+                )
+                for exp_num in range(10):
+                    logger.log_record(
+                        {
+                            "block_num": 0,
+                            "exp_num": exp_num,
+                            "worker_id": f"worker{exp_num % 2}",
+                            "block_type": "train",
+                            "task_name": "task_a",
+                            "task_params": {},
+                            "reward": exp_num,
+                        }
+                    )
+                logger.close()
+                logs = util.read_log_data(Path(logger.scenario_dir))
+                self.assertEqual(list(logs["exp_num"]), list(range(10)))
+
+            for sink_options in [
+                {"compression": "lzma"},
+                {"compression": "gzip", "compression_level": 10},
+            ]:
+                self.assertRaises(
+                    RuntimeError,
+                    self.helperLogScenario,
+                    base_dir,
+                    sink_options=sink_options,
+                )
+            if sinks.zstandard is None:
+                self.assertRaises(
+                    RuntimeError,
+                    self.helperLogScenario,
+                    base_dir,
+                    sink_options={"compression": "zstd"},
+                )
+
+    def testSegmentedLogs(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            expected = util.read_log_data(Path(self.helperLogScenario(base_dir)))
+            scenario_dir = self.helperLogScenario(
+                base_dir, sink_options={"segment_rows": 2}
+            )
+            block_dir = os.path.join(scenario_dir, "worker0", "0-train")
+            self.assertEqual(
+                sorted(os.listdir(block_dir)),
+                [
+                    "data-log.00001.tsv",
+                    "data-log.00002.tsv",
+                    "data-log.manifest.json",
+                    "data-log.tsv",
+                ],
+            )
+            self.assertEqual(
+                [
+                    (segment["file"], segment["min_exp_num"], segment["max_exp_num"])
+                    for segment in sinks.read_segment_manifest(block_dir)
+                ],
+                [
+                    ("data-log.tsv", 0, 1),
+                    ("data-log.00001.tsv", 2, 3),
+                    ("data-log.00002.tsv", 4, 4),
+                ],
+            )
+            logs = util.read_log_data(Path(scenario_dir))
+            pd.testing.assert_frame_equal(logs, expected)
+
+            # segments outside of the range aren't read
+            read_files = []
+            read_tsv_file = util._read_tsv_file
+
+            def read_and_count(data_file, *args):
+                read_files.append(data_file)
+                return read_tsv_file(data_file, *args)
+
+            with mock.patch.object(util, "_read_tsv_file", read_and_count):
+                logs = util.read_log_data(Path(scenario_dir), exp_range=(7, 12))
+                self.assertEqual(list(logs["exp_num"]), list(range(7, 12)))
+                self.assertEqual(len(read_files), 3)
+                logs = util.read_log_data(Path(scenario_dir), exp_range=(100, None))
+                self.assertEqual(len(logs), 0)
+            self.assertRaises(
+                RuntimeError, util.read_log_data, Path(scenario_dir), exp_range=(-1, 2)
+            )
+
+            # reopened segments are continued, and compressed ones split by
+            # their size before compression
+            for sink_options in [
+                {"segment_rows": 3},
+                {"segment_bytes": 300, "compression": "gzip"},
+            ]:
+                logger = l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    max_open_writers=1,
+                    sink_options=sink_options,
+                )
+                for exp_num in range(20):
+                    logger.log_record(
+                        {
+                            "block_num": 0,
+                            "exp_num": exp_num,
+                            "worker_id": f"worker{exp_num % 2}",
+                            "block_type": "train",
+                            "task_name": "task_a",
+                            "task_params": {},
+                            "reward": exp_num,
+                        }
+                    )
+                logger.close()
+                block_dir = os.path.join(logger.scenario_dir, "worker0", "0-train")
+                segments = sinks.read_segment_manifest(block_dir)
+                self.assertGreater(len(segments), 1)
+                self.assertEqual(sum(segment["rows"] for segment in segments), 10)
+                if "segment_rows" in sink_options:
+                    self.assertTrue(all(segment["rows"] <= 3 for segment in segments))
+                logs = util.read_log_data(
+                    Path(logger.scenario_dir), exp_range=(5, None)
+                )
+                self.assertEqual(list(logs["exp_num"]), list(range(5, 20)))
+
+            self.assertRaises(
+                RuntimeError,
+                self.helperLogScenario,
+                base_dir,
+                sink_options={"segment_rows": 0},
+            )
+
+    def testTornRows(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            with mock.patch("os.fsync") as fsync:
+                scenario_dir = self.helperLogScenario(base_dir, durability="fsync")
+            # one group fsync per file, when it is closed
+            self.assertEqual(fsync.call_count, 6)
+            expected = util.read_log_data(Path(scenario_dir))
+            self.assertEqual(len(expected), 30)
+
+            # a crash mid-write leaves a partial row, which readers skip
+            log_file = os.path.join(scenario_dir, "worker0", "0-train", "data-log.tsv")
+            with open(log_file, "a") as f:
+                f.write("20200101T000000.000000\t0\t")
+            with self.assertLogs(util.logger, "WARNING"):
+                logs = util.read_log_data(Path(scenario_dir))
+            pd.testing.assert_frame_equal(logs, expected)
+
+            # and which is truncated before the file is appended to
+            writer = sinks.TSVLogFile(log_file, list(expected.columns))
+            writer.add_row(dict(expected.iloc[0]))
+            writer.close()
+            self.assertFalse(sinks.truncate_torn_row(log_file))
+            self.assertEqual(len(util.read_log_data(Path(scenario_dir))), 31)
+
+            # truncated compressed streams are read up to the last full row
+            scenario_dir = self.helperLogScenario(
+                base_dir,
+                flush_policy=sinks.FlushPolicy(max_rows=1),
+                sink_options={"compression": "gzip"},
+            )
+            log_file = os.path.join(
+                scenario_dir, "worker0", "0-train", "data-log.tsv.gz"
+            )
+            with open(log_file, "rb+") as f:
+                f.truncate(os.path.getsize(log_file) - 30)
+            with self.assertLogs(util.logger, "WARNING"):
+                logs = util.read_log_data(Path(scenario_dir))
+            self.assertEqual(list(logs["exp_num"]), [0, 1, 2, 3] + list(range(5, 30)))
+
+            for durability in ["sync", None]:
+                self.assertRaises(
+                    RuntimeError,
+                    self.helperLogScenario,
+                    base_dir,
+                    durability=durability,
+                )
+            self.assertRaises(
+                RuntimeError,
+                self.helperLogScenario,
+                base_dir,
+                durability="none",
+                flush_policy=sinks.FlushPolicy(max_rows=1),
+            )
+
+    def testCustomSink(self):
+        class MemorySink(sinks.LogSink):
+            name = "memory"
+            rows = []
+
+            def open(self, worker_id, block_num, block_type):
+                return MemoryWriter()
+
+        class MemoryWriter:
+            def add_row(self, row):
+                MemorySink.rows.append(row)
+
+            def add_rows(self, rows):
+                MemorySink.rows.extend(rows)
+
+            def flush(self):
+                pass
+
+            def close(self):
+                pass
+
+        # the sink is only registered for this test
+        with mock.patch.dict(sinks.SINKS), tempfile.TemporaryDirectory() as base_dir:
+            sinks.register_sink(MemorySink)
+            scenario_dir = self.helperLogScenario(base_dir, sink="memory")
+            self.assertEqual(len(MemorySink.rows), 30)
+            with open(os.path.join(scenario_dir, "logger_info.json")) as f:
+                self.assertEqual(json.load(f)["log_sink"], "memory")
+            self.assertRaises(RuntimeError, util.read_log_data, Path(scenario_dir))
+
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                sink="unknown",
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+"""
+Copyright © 2021-2022 The Johns Hopkins University Applied Physics Laboratory LLC
+
+Permission is hereby granted, free of charge, to any person obtaining a copy 
+of this software and associated documentation files (the “Software”), to 
+deal in the Software without restriction, including without limitation the 
+rights to use, copy, modify, merge, publish, distribute, sublicense, and/or 
+sell copies of the Software, and to permit persons to whom the Software is 
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in 
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND, EXPRESS OR 
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, 
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE 
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, 
+WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR 
+IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from l2logger import l2logger, util
+from l2logger.remote import LogServer, RemoteDataLogger
+
+RECORD = {
+    "block_num": 0,
+    "exp_num": 0,
+    "block_type": "train",
+    "task_name": "task_a",
+    "task_params": {"param1": 1},
+    "reward": 1.0,
+}
+
+
+class TestRemote(unittest.TestCase):
+    def helperStartServer(self, base_dir, address):
+        logger = l2logger.DataLogger(
+            base_dir,
+            "test",
+            {"metrics_columns": ["reward"]},
+            per_worker_ordering=True,
+        )
+        server = LogServer(logger, address)
+        server.start()
+        return server
+
+    def testRemoteLogging(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            server = self.helperStartServer(base_dir, ("127.0.0.1", 0))
+            clients = [RemoteDataLogger(server.address, batch_size=7) for _ in range(2)]
+            for exp_num in range(100):
+                for i, client in enumerate(clients):
+                    client.log_record(
+                        dict(RECORD, exp_num=exp_num, worker_id=f"worker{i}")
+                    )
+            for client in clients:
+                client.close()
+                self.assertEqual(client.spilled_records, 0)
+            server.close()
+            stats = server.stats
+            self.assertEqual(stats["records"], 200)
+            self.assertEqual(stats["clients"], 2)
+            logs = util.read_log_data(Path(server.logger.scenario_dir))
+            self.assertEqual(len(logs), 200)
+            for _, worker_logs in logs.groupby("worker_id"):
+                self.assertEqual(list(worker_logs["exp_num"]), list(range(100)))
+
+    @unittest.skipIf(not hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+    def testReconnect(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            address = os.path.join(base_dir, "l2logger.sock")
+            # records are kept in the spill buffer until the server is up
+            client = RemoteDataLogger(
+                address, client_id="client0", batch_size=10, reconnect_interval=0
+            )
+            self.assertFalse(client.connected)
+            for exp_num in range(25):
+                client.log_record(dict(RECORD, exp_num=exp_num))
+            self.assertEqual(client.spilled_records, 25)
+            server = self.helperStartServer(base_dir, address)
+            client.flush()
+            self.assertTrue(client.connected)
+            self.assertEqual(client.spilled_records, 0)
+            # batches which weren't acknowledged before the connection was lost
+            # are only sent again if the server hasn't logged them
+            read_acks = client._read_acks
+            client._read_acks = lambda block: None
+            for exp_num in range(25, 50):
+                client.log_record(dict(RECORD, exp_num=exp_num))
+            while server.stats["batches"] < 5:
+                time.sleep(0.01)
+            client._read_acks = read_acks
+            client._sock.close()
+            for exp_num in range(50, 75):
+                client.log_record(dict(RECORD, exp_num=exp_num))
+            client.close()
+            self.assertIsNone(server._log_batch("client0", 0, [["", RECORD]]))
+            server.close()
+            self.assertEqual(server.stats["batches"], 8)
+            self.assertEqual(server.stats["duplicate_batches"], 1)
+            logs = util.read_log_data(Path(server.logger.scenario_dir))
+            self.assertEqual(list(logs["exp_num"]), list(range(75)))
+
+    def testRejectedBatch(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            server = self.helperStartServer(base_dir, ("127.0.0.1", 0))
+            client = RemoteDataLogger(server.address, batch_size=2)
+            self.assertRaises(RuntimeError, client.log_record, [])
+            self.assertRaises(
+                RuntimeError, client.log_record, dict(RECORD, timestamp="")
+            )
+            self.assertRaises(
+                RuntimeError, client.log_record, dict(RECORD, reward=set())
+            )
+            client.log_records([RECORD, dict(RECORD, block_type="sleep")])
+            with self.assertRaises(RuntimeError) as context:
+                client.flush()
+            self.assertIn("block_type must be one of", str(context.exception))
+            self.assertEqual(client.rejected_records, 2)
+            self.assertRaises(RuntimeError, client.log_record, RECORD)
+            client._disconnect()
+            server.close()
+            self.assertEqual(server.stats["rejected_records"], 2)
+
+    @unittest.skipIf(not hasattr(socket, "AF_UNIX"), "requires Unix sockets")
+    def testServeCommand(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            address = os.path.join(base_dir, "l2logger.sock")
+            server = subprocess.Popen(
+                [sys.executable, "-m", "l2logger", "serve", base_dir, "test"]
+                + ["--metrics-columns", "reward", "--unix", address]
+            )
+            try:
+                client = RemoteDataLogger(address, reconnect_interval=0.05)
+                for exp_num in range(10):
+                    client.log_record(dict(RECORD, exp_num=exp_num))
+                client.close()
+            finally:
+                server.send_signal(signal.SIGTERM)
+                self.assertEqual(server.wait(timeout=10), 0)
+            scenario_dir = next(Path(base_dir).glob("test-*"))
+            logs = util.read_log_data(scenario_dir)
+            self.assertEqual(list(logs["exp_num"]), list(range(10)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,11 +19,17 @@ WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR
 IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
 
+import csv
 import os
+import sqlite3
 import tempfile
+import threading
+import time
 import unittest
+from datetime import datetime
+from pathlib import Path
 
-from l2logger import l2logger
+from l2logger import l2logger, util
 
 
 class TestSimpleScenarios(unittest.TestCase):
@@ -121,6 +127,771 @@ class TestSimpleScenarios(unittest.TestCase):
             errHelper([self.helperUpdate(valid_full, {"task_params": True})])
             errHelper([self.helperUpdate(valid_full, {"task_params": {"temp": os}})])
 
+    def testFlushPolicy(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {"param1": 1},
+                "exp_status": "complete",
+                "reward": 1,
+            }
+            logger = l2logger.DataLogger(
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                flush_policy=l2logger.FlushPolicy(max_rows=3),
+            )
+            log_file = os.path.join(
+                logger.scenario_dir, "worker0", "0-train", "data-log.tsv"
+            )
+            count_lines = lambda: len(open(log_file).read().splitlines())
+
+            logger.log_record(record)
+            logger.log_record(record)
+            self.assertEqual(count_lines(), 0)
+            logger.log_record(record)
+            self.assertEqual(count_lines(), 4)
+            logger.log_record(record)
+            self.assertEqual(count_lines(), 4)
+            logger.flush()
+            self.assertEqual(count_lines(), 5)
+            logger.close()
+
+            # in async mode, rows are flushed once max_interval_ms has passed
+            # even if no more records are logged
+            for durability, flush_policy in [
+                ("flush", l2logger.FlushPolicy(max_rows=100, max_interval_ms=20)),
+                ("fsync", None),
+            ]:
+                logger = l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    flush_policy=flush_policy,
+                    durability=durability,
+                    async_mode=True,
+                )
+                log_file = os.path.join(
+                    logger.scenario_dir, "worker0", "0-train", "data-log.tsv"
+                )
+                logger.log_record(record)
+                for _ in range(200):
+                    time.sleep(0.01)
+                    if os.path.exists(log_file) and count_lines() == 2:
+                        break
+                self.assertEqual(count_lines(), 2)
+                logger.close()
+
+            # the SQLite sink commits rows as the flush policy says, and only
+            # syncs them to disk with fsync
+            for durability, synchronous in [("flush", 1), ("fsync", 2)]:
+                logger = l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    flush_policy=l2logger.FlushPolicy(max_rows=3),
+                    durability=durability,
+                    sink="sqlite",
+                )
+                logger.log_record(record)
+                db_file = os.path.join(logger.scenario_dir, "data-log.sqlite")
+                connection = sqlite3.connect(db_file)
+                count_rows = lambda: connection.execute(
+                    "SELECT COUNT(*) FROM data_log"
+                ).fetchone()[0]
+                logger.log_record(record)
+                self.assertEqual(count_rows(), 0)
+                logger.log_record(record)
+                self.assertEqual(count_rows(), 3)
+                logger.log_record(record)
+                self.assertEqual(count_rows(), 3)
+                logger.flush()
+                self.assertEqual(count_rows(), 4)
+                self.assertEqual(
+                    logger.sink._connection.execute("PRAGMA synchronous").fetchone()[0],
+                    synchronous,
+                )
+                logger.close()
+                connection.close()
+
+            self.assertRaises(RuntimeError, l2logger.FlushPolicy, max_rows=0)
+            self.assertRaises(RuntimeError, l2logger.FlushPolicy, max_bytes="1")
+
+    def testAsyncMode(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {"param1": 1},
+                "reward": 1,
+            }
+            cols = {"metrics_columns": ["reward"]}
+            logger = l2logger.DataLogger(base_dir, "test", cols, async_mode=True)
+            for exp_num in range(100):
+                logger.log_record(self.helperUpdate(record, {"exp_num": exp_num}))
+            # validation still happens on the caller's thread
+            self.assertRaises(RuntimeError, logger.log_record, record)
+            logger.close()
+            log_file = os.path.join(
+                logger.scenario_dir, "worker0", "0-train", "data-log.tsv"
+            )
+            self.assertEqual(len(open(log_file).read().splitlines()), 101)
+
+            # writer errors surface on the next call
+            logger = l2logger.DataLogger(base_dir, "test", cols, async_mode=True)
+            open(os.path.join(logger.scenario_dir, "worker0"), "w").close()
+            logger.log_record(record)
+            self.assertRaises(RuntimeError, logger.flush)
+            self.assertRaises(RuntimeError, logger.log_record, record)
+            self.assertRaises(RuntimeError, logger.close)
+
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger,
+                base_dir,
+                "test",
+                cols,
+                async_mode=True,
+                backpressure="wait",
+            )
+
+    def testBatchRecords(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {"param1": 1},
+                "reward": 1,
+            }
+            records = [
+                self.helperUpdate(record, {"exp_num": i, "worker_id": f"worker{i % 2}"})
+                for i in range(10)
+            ]
+            cols = {"metrics_columns": ["reward"]}
+            logger = l2logger.DataLogger(base_dir, "test", cols)
+            logger.log_records(records)
+            logger.log_columns(
+                {
+                    "block_num": [1, 1],
+                    "exp_num": [10, 11],
+                    "worker_id": ["worker0", "worker0"],
+                    "block_type": ["test", "test"],
+                    "task_name": ["taskA", "taskA"],
+                    "task_params": [{}, {}],
+                    "reward": [0.5, 1.5],
+                }
+            )
+            logger.close()
+            count_lines = lambda *path: len(
+                open(os.path.join(logger.scenario_dir, *path)).read().splitlines()
+            )
+            self.assertEqual(count_lines("worker0", "0-train", "data-log.tsv"), 6)
+            self.assertEqual(count_lines("worker1", "0-train", "data-log.tsv"), 6)
+            self.assertEqual(count_lines("worker0", "1-test", "data-log.tsv"), 3)
+
+            # a batch with any invalid record is rejected as a whole
+            errHelper = lambda records: self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger(base_dir, "test", cols).log_records,
+                records,
+            )
+            errHelper([record, self.helperUpdate(record, {"exp_num": -1})])
+            errHelper([record, self.helperUpdate(record, {"block_type": "temp"})])
+            errHelper([record, self.helperUpdate(record, {"block_type": ["train"]})])
+            errHelper([record, self.helperUpdate(record, {"block_subtype": {}})])
+            errHelper([record, self.helperUpdate(record, {"exp_status": {}})])
+            errHelper([record, self.helperUpdate(record, {"worker_id": "a+b"})])
+            errHelper([record, self.helperUpdate(record, {"task_params": True})])
+            errHelper([self.helperUpdate(record, {"exp_num": 2}), record])
+            errHelper([record, self.helperUpdate(record, {"extra": 2})])
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger(base_dir, "test", cols).log_columns,
+                {"block_num": [0, 1], "exp_num": [0]},
+            )
+
+    def testCompiledValidator(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            valid_full = {
+                "block_num": 4,
+                "exp_num": 4,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {"param1": 1},
+                "reward": 1,
+            }
+            logger = l2logger.DataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}
+            )
+            logger.log_record(valid_full)
+            invalid_updates = [
+                {"extra": 2},
+                {"block_type": "temp"},
+                {"block_subtype": "nap"},
+                {"exp_status": "Done"},
+                {"block_type": ["train"]},
+                {"block_subtype": {}},
+                {"exp_status": {}},
+                {"worker_id": "a+b"},
+                {"task_params": True},
+                {"block_num": "temp"},
+                {"block_num": 2},
+                {"exp_num": -1},
+                {"exp_num": 3},
+            ]
+            # the compiled fast path raises exactly the same errors
+            for fields in invalid_updates:
+                record = logger._augment_fields(self.helperUpdate(valid_full, fields))
+                with self.assertRaises(RuntimeError) as generic:
+                    logger._validate_record_generic(record)
+                with self.assertRaises(RuntimeError) as compiled:
+                    logger._validate_record_compiled(record)
+                self.assertEqual(str(generic.exception), str(compiled.exception))
+            # fields given in a different order are still accepted
+            logger.log_record(dict(reversed(list(valid_full.items()))))
+            logger.close()
+
+    def testTimestampProvider(self):
+        provider = l2logger.TimestampProvider()
+        for now in [1600000000.0, 1600000000.1234565, 1600000000.9999996, 1.5]:
+            self.assertEqual(
+                provider.format(now),
+                datetime.fromtimestamp(now).strftime("%Y%m%dT%H%M%S.%f"),
+            )
+        monotonic = l2logger.MonotonicTimestampProvider()
+        self.assertLessEqual(monotonic(), monotonic())
+
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {},
+                "reward": 1,
+            }
+            logger = l2logger.DataLogger(
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                timestamp_provider=lambda: "20200101T000000.000000",
+            )
+            logger.log_record(record)
+            logger.log_records([record], timestamp=datetime(2021, 1, 1))
+            logger.close()
+            log_file = os.path.join(
+                logger.scenario_dir, "worker-default", "0-train", "data-log.tsv"
+            )
+            timestamps = [row.split("\t")[8] for row in open(log_file)][1:]
+            self.assertEqual(
+                timestamps, ["20200101T000000.000000", "20210101T000000.000000"]
+            )
+
+    def testTaskParamsSerialization(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            params = {"param1": 1}
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": params,
+                "reward": 1,
+            }
+            logger = l2logger.DataLogger(
+                base_dir, "test", {"metrics_columns": ["reward"]}
+            )
+            logger.log_record(record)
+            logger.log_record(record)
+            # in-place changes to the same dict are picked up
+            params["param1"] = True
+            logger.log_record(record)
+            params["param1"] = 0.0
+            logger.log_record(record)
+            params["param1"] = -0.0
+            logger.log_record(record)
+            params["param2"] = [1, 2]
+            logger.log_record(record)
+            params["param2"].append(3)
+            logger.log_record(record)
+            logger.log_record(self.helperUpdate(record, {"task_params": {"param1": 1}}))
+            # keys which compare equal, but serialize differently
+            for task_params in [{1: 0}, {True: 0}, {1.0: 0}, {0.0: 0}, {-0.0: 0}]:
+                logger.log_record(
+                    self.helperUpdate(record, {"task_params": task_params})
+                )
+            logger.close()
+            log_file = os.path.join(
+                logger.scenario_dir, "worker-default", "0-train", "data-log.tsv"
+            )
+            with open(log_file) as f:
+                rows = list(csv.DictReader(f, delimiter="\t"))
+            self.assertEqual(
+                [row["task_params"] for row in rows],
+                [
+                    '{"param1": 1}',
+                    '{"param1": 1}',
+                    '{"param1": true}',
+                    '{"param1": 0.0}',
+                    '{"param1": -0.0}',
+                    '{"param1": -0.0, "param2": [1, 2]}',
+                    '{"param1": -0.0, "param2": [1, 2, 3]}',
+                    '{"param1": 1}',
+                    '{"1": 0}',
+                    '{"true": 0}',
+                    '{"1.0": 0}',
+                    '{"0.0": 0}',
+                    '{"-0.0": 0}',
+                ],
+            )
+
+    def testWriterPool(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {},
+                "reward": 1,
+            }
+            for max_open_writers, expected_opens in [(1, 30), (2, 30), (3, 3)]:
+                logger = l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    {"metrics_columns": ["reward"]},
+                    max_open_writers=max_open_writers,
+                )
+                opens = []
+                sink_open = logger.sink.open
+                logger.sink.open = lambda *key: opens.append(key) or sink_open(*key)
+                # three workers logging interleaved records
+                for exp_num in range(30):
+                    worker_id = f"worker{exp_num % 3}"
+                    logger.log_record(
+                        self.helperUpdate(
+                            record, {"exp_num": exp_num, "worker_id": worker_id}
+                        )
+                    )
+                logger.close()
+                self.assertEqual(len(opens), expected_opens)
+                for worker in range(3):
+                    log_file = os.path.join(
+                        logger.scenario_dir,
+                        f"worker{worker}",
+                        "0-train",
+                        "data-log.tsv",
+                    )
+                    self.assertEqual(len(open(log_file).read().splitlines()), 11)
+
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                max_open_writers=0,
+            )
+
+    def testThreadSafe(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {},
+                "reward": 1,
+            }
+            logger = l2logger.DataLogger(
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                thread_safe=True,
+                thread_buffer_size=16,
+            )
+            errors = []
+
+            # each thread logs its own worker, half the rows one at a time and
+            # half in batches
+            def log_worker(worker_id):
+                try:
+                    for exp_num in range(0, 200, 2):
+                        logger.log_record(
+                            self.helperUpdate(
+                                record, {"exp_num": exp_num, "worker_id": worker_id}
+                            )
+                        )
+                        logger.log_records(
+                            [
+                                self.helperUpdate(
+                                    record,
+                                    {"exp_num": exp_num + 1, "worker_id": worker_id},
+                                )
+                            ]
+                        )
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [
+                threading.Thread(target=log_worker, args=(f"worker{i}",))
+                for i in range(8)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(errors, [])
+            # rows left in the threads' buffers are written by flush
+            logger.flush()
+            for i in range(8):
+                log_file = os.path.join(
+                    logger.scenario_dir, f"worker{i}", "0-train", "data-log.tsv"
+                )
+                with open(log_file) as f:
+                    rows = list(csv.DictReader(f, delimiter="\t"))
+                self.assertEqual(
+                    [int(row["exp_num"]) for row in rows], list(range(200))
+                )
+
+            # ordering is still checked within each worker
+            self.assertRaises(
+                RuntimeError,
+                logger.log_record,
+                self.helperUpdate(record, {"exp_num": 0, "worker_id": "worker0"}),
+            )
+            logger.log_record(
+                self.helperUpdate(record, {"exp_num": 0, "worker_id": "worker8"})
+            )
+            logger.close()
+
+            # the rows of a thread which stops logging are written once stale
+            logger = l2logger.DataLogger(
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                thread_safe=True,
+                thread_buffer_ms=20,
+            )
+            thread = threading.Thread(
+                target=lambda: [
+                    logger.log_record(self.helperUpdate(record, {"exp_num": i}))
+                    for i in range(3)
+                ]
+            )
+            thread.start()
+            thread.join()
+            log_file = os.path.join(
+                logger.scenario_dir, "worker-default", "0-train", "data-log.tsv"
+            )
+            for _ in range(200):
+                time.sleep(0.01)
+                if os.path.exists(log_file) and len(open(log_file).readlines()) == 4:
+                    break
+            with open(log_file) as f:
+                self.assertEqual(len(f.readlines()), 4)
+            logger.close()
+
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger,
+                base_dir,
+                "test",
+                {"metrics_columns": ["reward"]},
+                thread_safe=True,
+                thread_buffer_size=0,
+            )
+
+    def testBindSchema(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            cols = {"metrics_columns": ["steps", "reward"]}
+            for async_mode in [False, True]:
+                # the same records logged as dicts and positionally
+                dict_logger = l2logger.DataLogger(
+                    base_dir, "dicts", cols, async_mode=async_mode
+                )
+                value_logger = l2logger.DataLogger(
+                    base_dir, "values", cols, async_mode=async_mode
+                )
+                recorder = value_logger.bind_schema("worker0")
+                for exp_num in range(10):
+                    block_num = exp_num // 5
+                    dict_logger.log_record(
+                        {
+                            "block_num": block_num,
+                            "exp_num": exp_num,
+                            "worker_id": "worker0",
+                            "block_type": "train",
+                            "task_name": "taskA",
+                            "task_params": {"param1": exp_num},
+                            "steps": exp_num * 10,
+                            "reward": "1.5",
+                        }
+                    )
+                    recorder.record(
+                        block_num,
+                        exp_num,
+                        "train",
+                        "taskA",
+                        {"param1": exp_num},
+                        exp_num * 10,
+                        "1.5",
+                    )
+                dict_logger.close()
+                value_logger.close()
+                for block in ["0-train", "1-train"]:
+                    dict_rows, value_rows = [
+                        list(
+                            csv.DictReader(
+                                open(
+                                    os.path.join(
+                                        logger.scenario_dir,
+                                        "worker0",
+                                        block,
+                                        "data-log.tsv",
+                                    )
+                                ),
+                                delimiter="\t",
+                            )
+                        )
+                        for logger in [dict_logger, value_logger]
+                    ]
+                    for row in dict_rows + value_rows:
+                        del row["timestamp"]
+                    self.assertEqual(len(value_rows), 5)
+                    self.assertEqual(dict_rows, value_rows)
+
+            logger = l2logger.DataLogger(base_dir, "test", cols)
+            # values are given in the order of fields
+            recorder = logger.bind_schema(fields=["reward", "debug", "steps"])
+            self.assertEqual(recorder.worker_id, "worker-default")
+            recorder.record(0, 5, "test", "taskA", {}, 1.0, "info", 20)
+            for args in [
+                (0, 6, "test", "taskA", {}, 1.0, "info"),
+                (0, 6, "eval", "taskA", {}, 1.0, "info", 20),
+                (0, 6, ["test"], "taskA", {}, 1.0, "info", 20),
+                (0, 6, "test", "taskA", [], 1.0, "info", 20),
+                (1, -1, "test", "taskA", {}, 1.0, "info", 20),
+            ]:
+                self.assertRaises(RuntimeError, recorder.record, *args)
+            # ordering is shared with log_record
+            self.assertRaises(
+                RuntimeError,
+                logger.log_record,
+                {
+                    "block_num": 0,
+                    "exp_num": 0,
+                    "block_type": "test",
+                    "task_name": "taskA",
+                    "task_params": {},
+                    "steps": 20,
+                    "reward": 1.0,
+                    "debug": "info",
+                },
+            )
+            # the fields are fixed by the first record or binding
+            self.assertRaises(RuntimeError, logger.bind_schema)
+            self.assertRaises(RuntimeError, logger.bind_schema, "worker 0")
+            self.assertRaises(RuntimeError, logger.bind_schema, exp_status="done")
+            logger.close()
+            with open(
+                os.path.join(
+                    logger.scenario_dir, "worker-default", "0-test", "data-log.tsv"
+                )
+            ) as f:
+                rows = list(csv.DictReader(f, delimiter="\t"))
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(
+                (rows[0]["reward"], rows[0]["debug"], rows[0]["steps"]),
+                ("1.0", "info", "20"),
+            )
+            self.assertEqual(list(rows[0])[-3:], ["debug", "reward", "steps"])
+
+            logger = l2logger.DataLogger(base_dir, "test", cols)
+            for fields in [["reward"], ["steps", "reward", "steps"], ["exp_num"]]:
+                self.assertRaises(RuntimeError, logger.bind_schema, fields=fields)
+
+            # records can be logged as dicts after binding, before any record
+            logger = l2logger.DataLogger(base_dir, "bound", cols)
+            recorder = logger.bind_schema("worker0")
+            logger.log_record(
+                {
+                    "block_num": 0,
+                    "exp_num": 0,
+                    "worker_id": "worker0",
+                    "block_type": "train",
+                    "task_name": "taskA",
+                    "task_params": {},
+                    "steps": 10,
+                    "reward": 1.0,
+                }
+            )
+            recorder.record(0, 1, "train", "taskA", {}, 20, 2.0)
+            logger.close()
+            with open(
+                os.path.join(logger.scenario_dir, "worker0", "0-train", "data-log.tsv")
+            ) as f:
+                rows = list(csv.DictReader(f, delimiter="\t"))
+            self.assertEqual([row["steps"] for row in rows], ["10", "20"])
+
+    def testColumnar(self):
+        with tempfile.TemporaryDirectory() as base_dir:
+            cols = {"metrics_columns": ["reward", "steps"]}
+            record = {
+                "block_num": 0,
+                "exp_num": 0,
+                "worker_id": "worker0",
+                "block_type": "train",
+                "task_name": "taskA",
+                "task_params": {"param1": 1},
+                "reward": 0.1,
+                "steps": 10,
+                "debug": "",
+            }
+
+            # a float column, a column switching from ints to other values, a
+            # column of strings, and two workers. SQLite only stores integers
+            # of up to 64 bits
+            def get_records(large_int):
+                records = []
+                for exp_num in range(40):
+                    steps = exp_num
+                    if exp_num >= 15:
+                        steps = [large_int, "n/a", True][exp_num % 3]
+                    records.append(
+                        self.helperUpdate(
+                            record,
+                            {
+                                "block_num": exp_num // 20,
+                                "exp_num": exp_num,
+                                "worker_id": f"worker{exp_num % 2}",
+                                "task_params": {"param1": exp_num % 3},
+                                "reward": exp_num / 3,
+                                "steps": steps,
+                                "debug": f'"{exp_num}"\t',
+                            },
+                        )
+                    )
+                return records
+
+            records = get_records(2**64)
+
+            def read_rows(logger, sink="tsv"):
+                if sink != "tsv":
+                    logs = util.read_log_data(Path(logger.scenario_dir))
+                    return logs.to_dict("records")
+                rows = []
+                for worker_id in ["worker0", "worker1"]:
+                    for block in ["0-train", "1-train"]:
+                        log_file = os.path.join(
+                            logger.scenario_dir, worker_id, block, "data-log.tsv"
+                        )
+                        if os.path.exists(log_file):
+                            with open(log_file) as f:
+                                rows.extend(csv.DictReader(f, delimiter="\t"))
+                return rows
+
+            for sink, async_mode in [("tsv", False), ("tsv", True), ("sqlite", False)]:
+                loggers = [
+                    l2logger.DataLogger(
+                        base_dir,
+                        "test",
+                        cols,
+                        columnar=columnar,
+                        async_mode=async_mode,
+                        sink=sink,
+                        timestamp_provider=lambda: "20220101T000000.000000",
+                    )
+                    for columnar in [False, True]
+                ]
+                sink_records = records if sink == "tsv" else get_records(2**62)
+                for logger in loggers:
+                    logger.log_records(sink_records[:10])
+                    for record_in in sink_records[10:]:
+                        logger.log_record(record_in)
+                    logger.close()
+                rows = [read_rows(logger, sink) for logger in loggers]
+                self.assertEqual(rows[0], rows[1])
+                self.assertEqual(len(rows[1]), 40)
+
+            # interned values which compare equal but are written differently,
+            # and exp_nums beyond the int64 range
+            loggers = [
+                l2logger.DataLogger(
+                    base_dir,
+                    "test",
+                    cols,
+                    columnar=columnar,
+                    timestamp_provider=lambda: "20220101T000000.000000",
+                )
+                for columnar in [False, True]
+            ]
+            for logger in loggers:
+                for exp_num, task_name in zip(
+                    [0, 1, 2**63, 2**64, 2**64], ["taskA", True, 1, 1.0, 1]
+                ):
+                    logger.log_record(
+                        self.helperUpdate(
+                            record, {"exp_num": exp_num, "task_name": task_name}
+                        )
+                    )
+                logger.close()
+            rows = [read_rows(logger) for logger in loggers]
+            self.assertEqual(rows[0], rows[1])
+            self.assertEqual(
+                [(row["exp_num"], row["task_name"]) for row in rows[1]],
+                [
+                    ("0", "taskA"),
+                    ("1", "True"),
+                    (str(2**63), "1"),
+                    (str(2**64), "1.0"),
+                    (str(2**64), "1"),
+                ],
+            )
+
+            # rows are written once a worker moves to another block, once
+            # enough are buffered, and on flush
+            logger = l2logger.DataLogger(base_dir, "test", cols, columnar=True)
+            for record_in in records[:19]:
+                logger.log_record(record_in)
+            self.assertEqual(len(read_rows(logger)), 0)
+            # worker0 moves to block 1
+            logger.log_record(records[20])
+            self.assertEqual(len(read_rows(logger)), 10)
+            logger.flush()
+            self.assertEqual(len(read_rows(logger)), 20)
+            logger.close()
+            logger = l2logger.DataLogger(
+                base_dir, "test", cols, columnar=True, columnar_max_rows=4
+            )
+            for record_in in records[:3]:
+                logger.log_record(record_in)
+            self.assertEqual(len(read_rows(logger)), 0)
+            logger.log_record(records[3])
+            self.assertEqual(len(read_rows(logger)), 4)
+            logger.close()
+
+            self.assertRaises(
+                RuntimeError,
+                l2logger.DataLogger,
+                base_dir,
+                "test",
+                cols,
+                columnar=True,
+                columnar_max_rows=0,
+            )
+
     def helperErrorRecord(self, top_dir, cols, records):
         logger = l2logger.DataLogger(top_dir, "test", {"metrics_columns": cols})
         temp_func = lambda logger, records: [logger.log_record(r) for r in records]